@@ -37,6 +37,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework.authtoken',
     'core',
@@ -82,15 +83,56 @@ WSGI_APPLICATION = 'app.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'core.db.backends.postgresql',
         'HOST': os.environ.get('DB_HOST'),
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
         'PASSWORD': os.environ.get('DB_PASS'),
-
+        # Seconds a connection is kept open between requests (0 closes it)
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        # Ping kept connections before reusing them
+        'CONN_HEALTH_CHECKS': os.environ.get('DB_CONN_HEALTH_CHECKS') == '1',
     }
 }
 
+# Borrow connections from a process wide pool in threaded servers
+if os.environ.get('DB_POOL_SIZE'):
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['POOL'] = {
+        'MAX_SIZE': int(os.environ['DB_POOL_SIZE']),
+        'TIMEOUT': int(os.environ.get('DB_POOL_TIMEOUT', 5)),
+    }
+
+
+# New passwords are hashed by the first hasher, the others only verify
+# stored hashes. PBKDF2 hashes with other iterations are upgraded on login.
+PASSWORD_HASHERS = list(dict.fromkeys([
+    os.environ.get('PASSWORD_HASHER', 'core.hashers.PBKDF2PasswordHasher'),
+    'core.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]))
+PASSWORD_PBKDF2_ITERATIONS = int(
+    os.environ.get('PASSWORD_PBKDF2_ITERATIONS', 120000)
+)
+
+# Hash passwords in a pool of this many processes instead of the request
+# worker (0 hashes inline). Hashes waiting beyond PASSWORD_HASHING_QUEUE
+# for PASSWORD_HASHING_TIMEOUT seconds are answered with a 503.
+PASSWORD_HASHING_PROCESSES = int(
+    os.environ.get('PASSWORD_HASHING_PROCESSES', 0)
+)
+PASSWORD_HASHING_QUEUE = int(
+    os.environ.get(
+        'PASSWORD_HASHING_QUEUE',
+        PASSWORD_HASHING_PROCESSES * 4
+    )
+)
+PASSWORD_HASHING_TIMEOUT = float(
+    os.environ.get('PASSWORD_HASHING_TIMEOUT', 10)
+)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.1/ref/settings/#auth-password-validators
@@ -134,4 +176,125 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = 'vol/web/media'
 STATIC_ROOT = '/vol/web/static'
 
+# How media files are sent once the access is checked: 'nginx'
+# (X-Accel-Redirect), 'sendfile' (X-Sendfile, Apache/lighttpd) or 'django'
+MEDIA_SERVE_BACKEND = os.environ.get(
+    'MEDIA_SERVE_BACKEND',
+    'django' if DEBUG else 'nginx'
+)
+# nginx internal location aliased to MEDIA_ROOT
+MEDIA_ACCEL_REDIRECT_PREFIX = os.environ.get(
+    'MEDIA_ACCEL_REDIRECT_PREFIX',
+    '/protected-media/'
+)
+
 AUTH_USER_MODEL = 'core.User'
+
+# Uploaded recipe images are resized by a pool of background threads
+# ('thread') or inside the request ('sync')
+RECIPE_IMAGE_PROCESSING = os.environ.get('RECIPE_IMAGE_PROCESSING', 'thread')
+RECIPE_IMAGE_WORKERS = int(os.environ.get('RECIPE_IMAGE_WORKERS', 2))
+RECIPE_IMAGE_FORMAT = os.environ.get('RECIPE_IMAGE_FORMAT', 'JPEG')
+
+# Limits checked while recipe images are being uploaded
+RECIPE_IMAGE_MAX_UPLOAD_SIZE = int(
+    os.environ.get('RECIPE_IMAGE_MAX_UPLOAD_SIZE', 10 * 1024 * 1024)
+)
+RECIPE_IMAGE_MAX_PIXELS = int(
+    os.environ.get('RECIPE_IMAGE_MAX_PIXELS', 40 * 1000 * 1000)
+)
+
+# Cache shared by every process, a memcached "host:port" (python-memcached
+# must be installed). Without it each process has its own LocMemCache and
+# the caches that are invalidated across processes are turned off
+CACHE_LOCATION = os.environ.get('CACHE_LOCATION')
+if CACHE_LOCATION:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+            'LOCATION': CACHE_LOCATION,
+        }
+    }
+
+# Cache used by core.authentication.CachedTokenAuthentication. It must be
+# shared by every process (e.g. memcached or redis): deleting a token or
+# deactivating a user only drops the entries of the cache it runs against,
+# so with the per-process LocMemCache other workers would keep accepting
+# the token for up to TOKEN_CACHE_TIMEOUT seconds. The lookups are only
+# cached (a timeout above 0) by default when CACHE_LOCATION is set
+TOKEN_CACHE_ALIAS = os.environ.get('TOKEN_CACHE_ALIAS', 'default')
+TOKEN_CACHE_TIMEOUT = int(
+    os.environ.get('TOKEN_CACHE_TIMEOUT', 300 if CACHE_LOCATION else 0)
+)
+
+# Auth tokens expire after TOKEN_TTL seconds without use and TOKEN_MAX_AGE
+# seconds after they were issued. Using a token writes its new expiry at
+# most once per TOKEN_REFRESH_INTERVAL seconds.
+TOKEN_TTL = int(os.environ.get('TOKEN_TTL', 24 * 3600))
+TOKEN_MAX_AGE = int(os.environ.get('TOKEN_MAX_AGE', 30 * 24 * 3600))
+TOKEN_REFRESH_INTERVAL = int(os.environ.get('TOKEN_REFRESH_INTERVAL', 3600))
+# Revoked and unknown keys are rejected by each process without a query
+TOKEN_REVOCATION_SIZE = int(os.environ.get('TOKEN_REVOCATION_SIZE', 10000))
+TOKEN_REVOCATION_TTL = int(os.environ.get('TOKEN_REVOCATION_TTL', 3600))
+
+# Signed access tokens returned next to the token, verified without any
+# lookup (0, the default, disables them). They cannot be revoked: a user
+# deactivated or a token rotated by a refresh keeps its access tokens
+# working until they expire, so keep ACCESS_TOKEN_TTL short.
+# ACCESS_TOKEN_KEYS is "version:secret,..." with the signing key first, the
+# others only verify while keys are rotated.
+ACCESS_TOKEN_TTL = int(os.environ.get('ACCESS_TOKEN_TTL', 0))
+ACCESS_TOKEN_KEYS = [
+    tuple(item.split(':', 1))
+    for item in os.environ.get('ACCESS_TOKEN_KEYS', '').split(',') if item
+] or [('1', SECRET_KEY)]
+
+# Days the tombstones of deleted objects are kept for the delta sync, see
+# the purge_tombstones command. Clients with an older sync token get a full
+# sync flagged with "reset"
+SYNC_TOMBSTONE_RETENTION = int(
+    os.environ.get('SYNC_TOMBSTONE_RETENTION', 30)
+)
+
+# Rendered recipe details are kept in an in-process LRU in front of this
+# cache. A write deletes the version token of the recipe from it, which only
+# reaches the other processes when the cache is shared, so the detail cache
+# is off unless CACHE_LOCATION is set
+RECIPE_DETAIL_CACHE_ENABLED = os.environ.get(
+    'RECIPE_DETAIL_CACHE_ENABLED',
+    '1' if CACHE_LOCATION else '0'
+) == '1'
+RECIPE_DETAIL_CACHE_ALIAS = os.environ.get(
+    'RECIPE_DETAIL_CACHE_ALIAS',
+    'default'
+)
+RECIPE_DETAIL_CACHE_TIMEOUT = int(
+    os.environ.get('RECIPE_DETAIL_CACHE_TIMEOUT', 300)
+)
+RECIPE_DETAIL_CACHE_LRU_SIZE = int(
+    os.environ.get('RECIPE_DETAIL_CACHE_LRU_SIZE', 1000)
+)
+
+# The JSON renderer and parser use orjson when it is installed
+REST_FRAMEWORK = {
+    'PAGE_SIZE': int(os.environ.get('API_PAGE_SIZE', 50)),
+    'DEFAULT_RENDERER_CLASSES': (
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'core.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
+    # Token and sign up requests, each one hashes a password. login_email
+    # only counts failed password checks. The counters live in the default
+    # cache, so they are per-process unless CACHE_LOCATION is set
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': os.environ.get('LOGIN_IP_THROTTLE_RATE', '30/min'),
+        'login_email': os.environ.get('LOGIN_EMAIL_THROTTLE_RATE', '10/min'),
+    },
+}
+
+# PAGE_SIZE is only used by the pagination classes set on the recipe viewsets
+SILENCED_SYSTEM_CHECKS = ['rest_framework.W001']
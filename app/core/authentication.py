@@ -0,0 +1,290 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.functional import SimpleLazyObject, empty
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import exceptions
+from rest_framework.authentication import (
+    BaseAuthentication,
+    TokenAuthentication,
+    get_authorization_header,
+)
+
+from core.models import AuthToken
+from core.tokens import (
+    ExpiredAccessToken,
+    InvalidAccessToken,
+    access_token_ttl,
+    read_access_token,
+)
+
+
+class CacheStats:
+    """Thread safe hit/miss counters for a cache"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def hit(self):
+        with self._lock:
+            self.hits += 1
+
+    def miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def reset(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+token_cache_stats = CacheStats()
+
+
+class RevokedKeys:
+    """
+    Thread safe set of keys remembered for ``ttl`` seconds.
+
+    It holds at most ``max_size`` keys, the oldest ones are forgotten first.
+    """
+
+    def __init__(self, max_size=10000, ttl=3600):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._keys = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, key):
+        with self._lock:
+            self._keys.pop(key, None)
+            self._keys[key] = time.monotonic() + self.ttl
+
+            while len(self._keys) > self.max_size:
+                self._keys.popitem(last=False)
+
+    def __contains__(self, key):
+        with self._lock:
+            until = self._keys.get(key)
+
+            if until is None:
+                return False
+
+            if until <= time.monotonic():
+                del self._keys[key]
+                return False
+
+            return True
+
+    def __len__(self):
+        return len(self._keys)
+
+    def clear(self):
+        with self._lock:
+            self._keys.clear()
+
+
+# Keys revoked, expired or unknown to this process, rejected without a query.
+# It is only ever a negative cache: keys are never reused and an expired
+# token never becomes valid again, so the other processes, which do not see
+# these entries, still reject the key through the shared cache or a query
+revoked_tokens = RevokedKeys(
+    getattr(settings, 'TOKEN_REVOCATION_SIZE', 10000),
+    getattr(settings, 'TOKEN_REVOCATION_TTL', 3600)
+)
+
+
+def get_token_cache():
+    """Return the cache used to store token lookups"""
+    return caches[getattr(settings, 'TOKEN_CACHE_ALIAS', 'default')]
+
+
+# Raised whenever the cached token changes, so the entries written by an
+# older release are never read back
+TOKEN_CACHE_VERSION = 3
+
+
+def token_cache_key(key):
+    """Return the cache key for a token key"""
+    return f'auth-token:v{TOKEN_CACHE_VERSION}:{key}'
+
+
+def invalidate_tokens(keys):
+    """Drop the cached lookups of the given token keys"""
+    get_token_cache().delete_many([token_cache_key(key) for key in keys])
+
+
+def load_user(user_id):
+    """Return the active user authenticated by a token"""
+
+    user = get_user_model().objects.filter(pk=user_id).first()
+
+    if user is None or not user.is_active:
+        raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+    return user
+
+
+class LazyUser(SimpleLazyObject):
+    """
+    Authenticated principal knowing the id and is_active of its user, the
+    user row is read the first time any other attribute is used.
+    """
+
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, user_id, is_active=True):
+        self.__dict__['_user_id'] = user_id
+        self.__dict__['_is_active'] = is_active
+        super().__init__(partial(load_user, user_id))
+
+    def __bool__(self):
+        return True
+
+    @property
+    def id(self):
+        return self._user_id
+
+    pk = id
+
+    @property
+    def is_active(self):
+        if self._wrapped is empty:
+            return self._is_active
+        return self._wrapped.is_active
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Expiring token authentication that caches the token -> user lookup.
+
+    Entries are dropped when the token is deleted or when its user is saved,
+    so a deactivated user is rejected on the next request. Using a token
+    slides its expiry, see ``AuthToken.refresh``. Only the id and is_active
+    of the user are read, the request user is a ``LazyUser``. Nothing is
+    cached while ``TOKEN_CACHE_TIMEOUT`` is 0, the default without a shared
+    cache.
+    """
+
+    model = AuthToken
+
+    def authenticate_credentials(self, key):
+        if key in revoked_tokens:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+        timeout = getattr(settings, 'TOKEN_CACHE_TIMEOUT', 0)
+        cache = get_token_cache()
+        cache_key = token_cache_key(key)
+        token = cache.get(cache_key) if timeout else None
+        changed = token is None
+
+        if token is None:
+            token_cache_stats.miss()
+            try:
+                token = self.model.objects.annotate(
+                    user_is_active=F('user__is_active')
+                ).get(key=key)
+            except self.model.DoesNotExist:
+                revoked_tokens.add(key)
+                raise exceptions.AuthenticationFailed(_('Invalid token.'))
+        else:
+            token_cache_stats.hit()
+
+        now = timezone.now()
+
+        if token.is_expired(now):
+            revoked_tokens.add(key)
+            cache.delete(cache_key)
+            raise exceptions.AuthenticationFailed(_('Token has expired.'))
+
+        if not token.user_is_active:
+            raise exceptions.AuthenticationFailed(
+                _('User inactive or deleted.')
+            )
+
+        if (token.refresh(now) or changed) and timeout:
+            cache.set(
+                cache_key,
+                token,
+                min(timeout, (token.expires - now).total_seconds())
+            )
+
+        return (LazyUser(token.user_id, token.user_is_active), token)
+
+
+class SignedTokenAuthentication(BaseAuthentication):
+    """
+    Authentication with the signed access tokens of ``core.tokens``.
+
+    Clients send ``Authorization: Bearer <access token>``. Nothing is read
+    to authenticate, so a deactivated user keeps access until the token
+    expires, ``ACCESS_TOKEN_TTL`` seconds at most.
+    """
+
+    keyword = 'Bearer'
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+
+        if not access_token_ttl():
+            return None
+
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed(
+                _('Invalid token header.')
+            )
+
+        try:
+            user_id = read_access_token(auth[1].decode())
+        except ExpiredAccessToken:
+            raise exceptions.AuthenticationFailed(_('Token has expired.'))
+        except (InvalidAccessToken, UnicodeError):
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+        return (LazyUser(user_id), None)
+
+    def authenticate_header(self, request):
+        return self.keyword
+
+
+@receiver(post_delete, sender=AuthToken)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    """Reject a deleted or rotated token from now on"""
+
+    # Purged tokens had expired already
+    if instance.is_expired(timezone.now()):
+        return
+
+    revoked_tokens.add(instance.key)
+    invalidate_tokens([instance.key])
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidate_user_tokens(sender, instance, created, **kwargs):
+    """Drop the cached lookups of a changed user"""
+    if created:
+        return
+
+    invalidate_tokens(
+        AuthToken.objects.filter(user=instance).values_list('key', flat=True)
+    )
@@ -0,0 +1,128 @@
+"""
+PostgreSQL backend with connection health checks and optional pooling.
+
+Extra keys read from the DATABASES entry:
+
+* ``CONN_HEALTH_CHECKS``: ping a persistent connection the first time a
+  request uses it and drop it if it stopped working, as Django 4.1 does.
+* ``POOL``: ``{'MAX_SIZE': 10, 'TIMEOUT': 5}`` to borrow connections from a
+  process wide pool instead of opening one per thread. Closing a connection
+  gives it back to the pool, so it is meant to be used with
+  ``CONN_MAX_AGE = 0`` in threaded servers.
+"""
+import functools
+import threading
+
+from django.db.backends.postgresql import base
+
+from core.db.pool import ConnectionPool
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def connect(conn_params, isolation_level=None):
+    """Open a psycopg2 connection for the pool"""
+
+    connection = base.Database.connect(**conn_params)
+
+    if isolation_level is not None:
+        connection.set_session(isolation_level=isolation_level)
+
+    return connection
+
+
+def is_alive(connection):
+    """Return if a psycopg2 connection answers a trivial query"""
+
+    if connection.closed:
+        return False
+
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+    connection.rollback()
+
+    return True
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    # Whether the connection was checked since the request started
+    health_check_done = False
+
+    def connect(self):
+        super().connect()
+        # A new connection needs no check
+        self.health_check_done = True
+
+    def ensure_connection(self):
+        self.close_if_health_check_failed()
+        super().ensure_connection()
+
+    def get_new_connection(self, conn_params):
+        pool = self._get_pool(conn_params)
+
+        if pool is None:
+            return super().get_new_connection(conn_params)
+
+        # Pooled connections keep the isolation level they were opened with
+        connection = pool.acquire()
+        self.isolation_level = connection.isolation_level
+        return connection
+
+    def _close(self):
+        pool = _pools.get(self.alias)
+
+        if (pool is None or not self.settings_dict.get('POOL') or
+                self.connection is None):
+            return super()._close()
+
+        with self.wrap_database_errors:
+            pool.release(self.connection)
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+
+        # Runs at the start and end of requests, the next request to use the
+        # connection checks it once
+        self.health_check_done = False
+
+    def close_if_health_check_failed(self):
+        """Close a reused connection that stopped working"""
+
+        if (self.connection is None or self.health_check_done or
+                not self.settings_dict.get('CONN_HEALTH_CHECKS')):
+            return
+
+        self.health_check_done = True
+
+        if not self.in_atomic_block and not self.is_usable():
+            self.close()
+
+    def _get_pool(self, conn_params):
+        """Return the pool of this database, if pooling is enabled"""
+
+        options = self.settings_dict.get('POOL')
+
+        if not options:
+            return None
+
+        with _pools_lock:
+            if self.alias not in _pools:
+                _pools[self.alias] = ConnectionPool(
+                    functools.partial(
+                        connect,
+                        conn_params,
+                        self.settings_dict['OPTIONS'].get('isolation_level')
+                    ),
+                    max_size=options.get('MAX_SIZE', 10),
+                    timeout=options.get('TIMEOUT', 5),
+                    check=(
+                        is_alive
+                        if self.settings_dict.get('CONN_HEALTH_CHECKS')
+                        else None
+                    ),
+                )
+
+        return _pools[self.alias]
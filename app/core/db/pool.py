@@ -0,0 +1,118 @@
+import queue
+import threading
+import time
+
+
+class PoolExhausted(Exception):
+    """Raised when no connection is released before the timeout"""
+
+
+class ConnectionPool:
+    """
+    Thread safe pool of DB-API connections.
+
+    Idle connections are reused most recently used first, up to ``max_size``
+    connections are open at the same time and callers wait ``timeout``
+    seconds for a connection to be released before giving up.
+    """
+
+    def __init__(self, connect, max_size=10, timeout=5, check=None):
+        self.connect = connect
+        self.max_size = max_size
+        self.timeout = timeout
+        self.check = check
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._size = 0
+
+    @property
+    def size(self):
+        """Number of open connections, idle or in use"""
+        return self._size
+
+    def acquire(self):
+        """Return an idle connection, opening a new one if allowed"""
+
+        deadline = time.monotonic() + self.timeout
+
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                connection = self._open_or_wait(deadline)
+
+            if connection is None:
+                continue
+
+            if self._usable(connection):
+                return connection
+
+            self._discard(connection)
+
+    def release(self, connection):
+        """Give a connection back to the pool, resetting its transaction"""
+
+        try:
+            connection.rollback()
+        except Exception:
+            self._discard(connection)
+        else:
+            self._idle.put(connection)
+
+    def close_all(self):
+        """Close the idle connections"""
+
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+    def _open_or_wait(self, deadline):
+        """Open a connection while under max_size, wait for one otherwise"""
+
+        with self._lock:
+            can_open = self._size < self.max_size
+            if can_open:
+                self._size += 1
+
+        if can_open:
+            try:
+                return self.connect()
+            except Exception:
+                with self._lock:
+                    self._size -= 1
+                raise
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise PoolExhausted(
+                f'No connection released within {self.timeout} seconds'
+            )
+
+        try:
+            return self._idle.get(timeout=min(remaining, 0.1))
+        except queue.Empty:
+            return None
+
+    def _usable(self, connection):
+        """Run the health check of a connection, if any"""
+
+        if self.check is None:
+            return True
+
+        try:
+            return self.check(connection)
+        except Exception:
+            return False
+
+    def _discard(self, connection):
+        """Close a connection and free its slot"""
+
+        with self._lock:
+            self._size -= 1
+
+        try:
+            connection.close()
+        except Exception:
+            pass
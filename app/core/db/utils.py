@@ -0,0 +1,11 @@
+def run_on_postgresql(statements):
+    """Return a RunPython function executing statements on PostgreSQL"""
+
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+
+        for statement in statements:
+            schema_editor.execute(statement)
+
+    return run
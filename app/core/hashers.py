@@ -0,0 +1,145 @@
+"""
+Password hashing kept off the request workers.
+
+PBKDF2 is CPU bound by design, so a burst of logins or sign ups can use
+every core and starve the other requests. The iterations of the default
+hasher come from the settings, and the hashes can run in a small process
+pool. Each server worker process starts its own pool, so up to workers x
+``PASSWORD_HASHING_PROCESSES`` cores are spent hashing, and in each worker
+requests beyond ``PASSWORD_HASHING_QUEUE`` waiting ones are turned away.
+"""
+import base64
+import hashlib
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.utils.encoding import force_bytes
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import exceptions, status
+
+
+class HashingPoolBusy(exceptions.APIException):
+    """Raised when too many password hashes are waiting for a process"""
+
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = _('Too many sign in attempts, try again later.')
+    default_code = 'hashing_busy'
+
+
+def pbkdf2(digest_name, password, salt, iterations):
+    """Return the raw PBKDF2 hash, run in the pool processes"""
+    return hashlib.pbkdf2_hmac(digest_name, password, salt, iterations)
+
+
+class HashingPool:
+    """
+    Process pool running password hashes with a bounded number of waiters.
+
+    The pool is started on first use in each process, so it is never
+    inherited by forked server workers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._slots = None
+        self._key = None
+
+    def submit(self, func, *args):
+        """Run func in the pool and return its result"""
+
+        processes = getattr(settings, 'PASSWORD_HASHING_PROCESSES', 0)
+        if not processes:
+            return func(*args)
+
+        executor, slots = self._get(processes)
+
+        if not slots.acquire(
+            timeout=getattr(settings, 'PASSWORD_HASHING_TIMEOUT', 10)
+        ):
+            raise HashingPoolBusy()
+
+        try:
+            try:
+                return executor.submit(func, *args).result()
+            except BrokenProcessPool:
+                # A pool process died, e.g. killed for memory, retry once
+                return self._restart(executor).submit(func, *args).result()
+        finally:
+            slots.release()
+
+    def shutdown(self):
+        """Stop the processes of the pool"""
+
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+            self._executor = self._slots = self._key = None
+
+    def _restart(self, broken):
+        """Replace a broken executor, keeping the waiting slots"""
+
+        with self._lock:
+            if self._executor is broken:
+                broken.shutdown(wait=False)
+                self._executor = ProcessPoolExecutor(max_workers=self._key[1])
+
+            return self._executor
+
+    def _get(self, processes):
+        """Return the executor and the waiting slots for the settings"""
+
+        waiting = getattr(settings, 'PASSWORD_HASHING_QUEUE', processes * 4)
+        key = (os.getpid(), processes, waiting)
+
+        with self._lock:
+            if self._key != key:
+                if self._executor is not None and self._key[0] == key[0]:
+                    self._executor.shutdown(wait=False)
+                self._executor = ProcessPoolExecutor(max_workers=processes)
+                # Hashes running in the pool plus the ones waiting for it
+                self._slots = threading.BoundedSemaphore(processes + waiting)
+                self._key = key
+
+            return self._executor, self._slots
+
+
+hashing_pool = HashingPool()
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """
+    PBKDF2 hasher using ``PASSWORD_PBKDF2_ITERATIONS`` and the hashing pool.
+
+    Stored hashes with another iteration count still verify and are
+    rehashed on the next successful login.
+    """
+
+    @property
+    def iterations(self):
+        return getattr(
+            settings,
+            'PASSWORD_PBKDF2_ITERATIONS',
+            hashers.PBKDF2PasswordHasher.iterations
+        )
+
+    def encode(self, password, salt, iterations=None):
+        assert password is not None
+        assert salt and '$' not in salt
+        iterations = iterations or self.iterations
+
+        digest = hashing_pool.submit(
+            pbkdf2,
+            self.digest().name,
+            force_bytes(password),
+            force_bytes(salt),
+            iterations
+        )
+        digest = base64.b64encode(digest).decode('ascii').strip()
+
+        return '%s$%d$%s$%s' % (self.algorithm, iterations, salt, digest)
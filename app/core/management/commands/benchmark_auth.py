@@ -0,0 +1,71 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from rest_framework.authentication import TokenAuthentication
+
+from core.authentication import (
+    CachedTokenAuthentication,
+    invalidate_tokens,
+    token_cache_stats,
+)
+from core.models import AuthToken
+
+
+class StockTokenAuthentication(TokenAuthentication):
+    """DRF's token authentication reading the expiring tokens"""
+
+    model = AuthToken
+
+
+class Command(BaseCommand):
+    """
+    Django command to compare the stock and the cached token authentication
+    """
+
+    help = 'Benchmark TokenAuthentication against CachedTokenAuthentication'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+
+        # Work inside a transaction that is rolled back so no data is kept
+        with transaction.atomic():
+            user = get_user_model().objects.create_user(
+                'benchmark-auth@example.com'
+            )
+            key = AuthToken.objects.issue(user).key
+            invalidate_tokens([key])
+            token_cache_stats.reset()
+
+            for auth_class in (
+                StockTokenAuthentication,
+                CachedTokenAuthentication
+            ):
+                self._run(auth_class(), key, iterations)
+
+            self.stdout.write(
+                f'cache hits={token_cache_stats.hits} '
+                f'misses={token_cache_stats.misses}'
+            )
+            transaction.set_rollback(True)
+
+    def _run(self, authentication, key, iterations):
+        """Authenticate the key repeatedly and report time and queries"""
+
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            for _ in range(iterations):
+                authentication.authenticate_credentials(key)
+            elapsed = time.perf_counter() - start
+
+        self.stdout.write(
+            f'{type(authentication).__name__}: '
+            f'{elapsed / iterations * 1e6:.1f} us/request, '
+            f'{len(queries)} queries for {iterations} requests'
+        )
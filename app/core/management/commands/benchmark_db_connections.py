@@ -0,0 +1,91 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from core.models import AuthToken
+
+
+# DATABASES options of each connection mode
+MODES = {
+    'new': {'CONN_MAX_AGE': 0, 'POOL': None},
+    'persistent': {'CONN_MAX_AGE': 600, 'POOL': None},
+    'pool': {'CONN_MAX_AGE': 0, 'POOL': {'MAX_SIZE': 10, 'TIMEOUT': 5}},
+}
+
+
+def percentile(samples, fraction):
+    """Return the value below which a fraction of the sorted samples fall"""
+    return samples[min(int(len(samples) * fraction), len(samples) - 1)]
+
+
+class Command(BaseCommand):
+    """
+    Django command to compare the latency of the tags list under each
+    database connection mode.
+
+    A temporary user is created, and deleted at the end, because each
+    request commits on its own connection.
+    """
+
+    help = 'Benchmark /api/recipe/tags/ with new, persistent and pooled ' \
+           'database connections'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--threads', type=int, default=4)
+        parser.add_argument(
+            '--modes',
+            nargs='+',
+            choices=list(MODES),
+            default=list(MODES)
+        )
+
+    def handle(self, *args, **options):
+        user = get_user_model().objects.create_user(
+            'benchmark-db@example.com'
+        )
+        key = AuthToken.objects.issue(user).key
+
+        try:
+            with override_settings(ALLOWED_HOSTS=['testserver']):
+                for mode in options['modes']:
+                    self._run(
+                        mode,
+                        key,
+                        options['requests'],
+                        options['threads']
+                    )
+        finally:
+            user.delete()
+
+    def _run(self, mode, key, requests, threads):
+        """Send the requests from several threads and report latencies"""
+
+        connections['default'].close()
+        connections['default'].settings_dict.update(MODES[mode])
+        url = reverse('recipe:tag-list')
+
+        def worker(count):
+            client = Client(HTTP_AUTHORIZATION=f'Token {key}')
+            latencies = []
+            for _ in range(count):
+                start = time.perf_counter()
+                client.get(url)
+                latencies.append(time.perf_counter() - start)
+            connections.close_all()
+            return latencies
+
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            results = executor.map(worker, [requests // threads] * threads)
+            latencies = sorted(sum(results, []))
+
+        self.stdout.write(
+            f'{mode}: p50={percentile(latencies, 0.5) * 1000:.2f}ms '
+            f'p99={percentile(latencies, 0.99) * 1000:.2f}ms '
+            f'({len(latencies)} requests)'
+        )
@@ -0,0 +1,70 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from rest_framework.renderers import JSONRenderer
+
+from core.renderers import FastJSONRenderer, orjson
+
+
+def recipe_payload(rows):
+    """Return a recipe list page shaped like the API responses"""
+
+    return {
+        'next': None,
+        'previous': None,
+        'results': [
+            {
+                'id': i,
+                'title': f'Recipe {i} with crème fraîche',
+                'ingredients': [i, i + 1, i + 2],
+                'tags': [i, i + 1],
+                'time_minutes': i % 120,
+                'price': f'{i % 100}.50',
+                'link': f'https://example.com/recipies/{i}',
+                'image': f'http://testserver/media/uploads/recipe/{i}.jpg',
+            }
+            for i in range(rows)
+        ],
+    }
+
+
+class Command(BaseCommand):
+    """
+    Django command to compare DRF's JSONRenderer and FastJSONRenderer
+    """
+
+    help = 'Benchmark rendering 1k and 10k recipe payloads'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            nargs='+',
+            default=[1000, 10000]
+        )
+        parser.add_argument('--repeat', type=int, default=10)
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f'fast encoder: {"orjson" if orjson else "stdlib fallback"}'
+        )
+
+        for rows in options['rows']:
+            payload = recipe_payload(rows)
+            for renderer in (JSONRenderer(), FastJSONRenderer()):
+                self._run(renderer, payload, rows, options['repeat'])
+
+    def _run(self, renderer, payload, rows, repeat):
+        """Render the payload repeatedly and report the best time"""
+
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            content = renderer.render(payload)
+            timings.append(time.perf_counter() - start)
+
+        self.stdout.write(
+            f'{type(renderer).__name__} {rows} rows: '
+            f'{min(timings) * 1000:.2f} ms, {len(content)} bytes'
+        )
@@ -0,0 +1,151 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Prefetch
+
+from core.models import Ingredient, Recipe, Tag
+from recipe.fastpath import (
+    ValuesSerializer,
+    aggregate_relations,
+    fetch_relations,
+)
+from recipe.serializers import (
+    IngredientSerializer,
+    RecipeSerializer,
+    TagSerializer,
+)
+
+
+class Command(BaseCommand):
+    """
+    Django command to compare the list throughput of the model serializers
+    and of the values based read path
+    """
+
+    help = 'Benchmark serializing recipies, tags and ingredients with ' \
+           'ModelSerializer and with .values() rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+
+        # Work inside a transaction that is rolled back so no data is kept
+        with transaction.atomic():
+            user = self._create_rows(rows)
+
+            for model, serializer_class in (
+                (Recipe, RecipeSerializer),
+                (Tag, TagSerializer),
+                (Ingredient, IngredientSerializer),
+            ):
+                queryset = model.objects.filter(user=user).order_by('-id')
+                self._run(
+                    model,
+                    'serializer',
+                    lambda: self._serialize(queryset, serializer_class),
+                    options['repeat']
+                )
+                self._run(
+                    model,
+                    'values',
+                    lambda: self._values(queryset, serializer_class),
+                    options['repeat']
+                )
+
+            transaction.set_rollback(True)
+
+    def _create_rows(self, rows):
+        """Create a user owning rows recipies, tags and ingredients"""
+
+        user = get_user_model().objects.create_user(
+            'benchmark-list@example.com'
+        )
+        tags = Tag.objects.bulk_create(
+            Tag(user=user, name=f'tag {i}') for i in range(rows)
+        )
+        ingredients = Ingredient.objects.bulk_create(
+            Ingredient(user=user, name=f'ingredient {i}') for i in range(rows)
+        )
+        Recipe.objects.bulk_create(
+            Recipe(
+                user=user,
+                title=f'recipe {i}',
+                time_minutes=i % 120,
+                price=f'{i % 100}.50'
+            )
+            for i in range(rows)
+        )
+
+        # bulk_create only returns ids on PostgreSQL
+        tags = list(Tag.objects.filter(user=user).values_list('id', flat=True))
+        ingredients = list(
+            Ingredient.objects.filter(user=user).values_list('id', flat=True)
+        )
+        recipies = Recipe.objects.filter(user=user).values_list(
+            'id',
+            flat=True
+        )
+
+        for name, ids in (('tags', tags), ('ingredients', ingredients)):
+            field = Recipe._meta.get_field(name)
+            through = field.remote_field.through
+            through.objects.bulk_create(
+                through(**{
+                    f'{field.m2m_field_name()}_id': recipe_id,
+                    f'{field.m2m_reverse_field_name()}_id': ids[
+                        (recipe_id + offset) % len(ids)
+                    ],
+                })
+                for recipe_id in recipies
+                for offset in range(3)
+            )
+
+        return user
+
+    def _serialize(self, queryset, serializer_class):
+        """Return the list data built by the model serializer"""
+
+        if serializer_class is RecipeSerializer:
+            queryset = queryset.prefetch_related(
+                Prefetch('tags', queryset=Tag.objects.only('id')),
+                Prefetch(
+                    'ingredients',
+                    queryset=Ingredient.objects.only('id')
+                ),
+            )
+
+        return serializer_class(queryset, many=True).data
+
+    def _values(self, queryset, serializer_class):
+        """Return the list data built from .values() rows"""
+
+        values_serializer = ValuesSerializer(serializer_class())
+        relations = values_serializer.relations
+        rows = list(aggregate_relations(
+            queryset.values(*values_serializer.values),
+            relations
+        ))
+        fetch_relations(rows, queryset.model, relations)
+
+        return values_serializer.to_representation(rows)
+
+    def _run(self, model, path, serialize, repeat):
+        """Serialize the rows repeatedly and report the best throughput"""
+
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            count = len(serialize())
+            timings.append(time.perf_counter() - start)
+
+        best = min(timings)
+        self.stdout.write(
+            f'{model.__name__} {path}: '
+            f'{best / count * 1000 * 1000:.2f} ms/1k rows, '
+            f'{count / best:.0f} rows/s'
+        )
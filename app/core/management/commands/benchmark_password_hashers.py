@@ -0,0 +1,70 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.contrib.auth.hashers import get_hashers
+from django.core.management.base import BaseCommand
+
+
+def hash_for(hasher_class, seconds):
+    """Hash passwords for some seconds and return how many were made"""
+
+    hasher = hasher_class()
+    salt = hasher.salt()
+    count = 0
+    deadline = time.perf_counter() + seconds
+
+    while time.perf_counter() < deadline:
+        hasher.encode(f'password-{count}', salt)
+        count += 1
+
+    return count
+
+
+class Command(BaseCommand):
+    """
+    Django command to measure the password hashes per second per core
+    """
+
+    help = 'Benchmark the configured password hashers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=float, default=2)
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=os.cpu_count(),
+            help='Hash on this many cores at once to measure the throughput'
+        )
+
+    def handle(self, *args, **options):
+        seconds = options['seconds']
+        processes = options['processes']
+
+        for hasher in get_hashers():
+            hasher_class = type(hasher)
+            name = f'{hasher_class.__module__}.{hasher_class.__name__}'
+
+            if hasher.library:
+                try:
+                    hasher._load_library()
+                except ValueError:
+                    self.stdout.write(f'{name}: library not installed')
+                    continue
+
+            single = hash_for(hasher_class, seconds) / seconds
+
+            with ProcessPoolExecutor(max_workers=processes) as executor:
+                counts = executor.map(
+                    hash_for,
+                    [hasher_class] * processes,
+                    [seconds] * processes
+                )
+                total = sum(counts) / seconds
+
+            self.stdout.write(
+                f'{name}: {1000 / single:.1f} ms/hash, '
+                f'{single:.1f} hashes/s on one core, '
+                f'{total / processes:.1f} hashes/s/core '
+                f'with {processes} processes'
+            )
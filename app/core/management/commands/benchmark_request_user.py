@@ -0,0 +1,107 @@
+import time
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import F
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from rest_framework.authentication import TokenAuthentication
+
+from core.authentication import (
+    CachedTokenAuthentication,
+    invalidate_tokens,
+    revoked_tokens,
+)
+from core.models import AuthToken, Recipe
+from recipe.views import RecipeViewSet
+
+
+class FullUserAuthentication(TokenAuthentication):
+    """DRF's token authentication loading every column of the user"""
+
+    model = AuthToken
+
+
+def fetched_bytes(queryset):
+    """Return the size of the column values of the rows as text"""
+
+    with connection.cursor() as cursor:
+        cursor.execute(*queryset.query.sql_with_params())
+        rows = cursor.fetchall()
+
+    return sum(
+        len(str(value).encode())
+        for row in rows for value in row if value is not None
+    )
+
+
+class Command(BaseCommand):
+    """
+    Django command to compare authenticating with the full user row and
+    with the id and is_active principal
+    """
+
+    help = 'Benchmark the bytes and time spent loading the request user'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+
+    def handle(self, *args, **options):
+        requests = options['requests']
+
+        # Work inside a transaction that is rolled back so no data is kept
+        with transaction.atomic():
+            user = get_user_model().objects.create_user(
+                'benchmark-user@example.com',
+                'benchmark-password'
+            )
+            key = AuthToken.objects.issue(user).key
+            Recipe.objects.create(
+                user=user,
+                title='Benchmark',
+                time_minutes=5,
+                price=1
+            )
+            tokens = AuthToken.objects.filter(key=key)
+            full = fetched_bytes(tokens.select_related('user'))
+            principal = fetched_bytes(
+                tokens.annotate(user_is_active=F('user__is_active'))
+            )
+
+            self.stdout.write(
+                f'token lookup: full user {full} bytes, '
+                f'principal {principal} bytes'
+            )
+
+            for auth_class in (FullUserAuthentication,
+                               CachedTokenAuthentication):
+                self._run(auth_class, key, requests)
+
+            transaction.set_rollback(True)
+
+    def _run(self, auth_class, key, requests):
+        """List the recipies with an authentication and report the time"""
+
+        client = Client(HTTP_AUTHORIZATION=f'Token {key}')
+        url = reverse('recipe:recipe-list')
+
+        with patch.object(
+            RecipeViewSet,
+            'authentication_classes',
+            (auth_class,)
+        ), override_settings(ALLOWED_HOSTS=['testserver']):
+            start = time.perf_counter()
+            for _ in range(requests):
+                # Every request misses the token cache
+                invalidate_tokens([key])
+                revoked_tokens.clear()
+                client.get(url)
+            elapsed = time.perf_counter() - start
+
+        self.stdout.write(
+            f'{auth_class.__name__}: '
+            f'{elapsed / requests * 1000:.2f} ms/request'
+        )
@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import AuthToken
+
+
+class Command(BaseCommand):
+    """
+    Django command to delete the expired auth tokens in small batches
+    """
+
+    help = 'Delete expired auth tokens'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0,
+            help='Seconds to wait between batches to spare the database'
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        purged = 0
+
+        # Short transactions keep the locks brief on a busy token table
+        while True:
+            keys = list(AuthToken.objects.filter(
+                expires__lte=now
+            ).values_list('key', flat=True)[:options['batch_size']])
+
+            if not keys:
+                break
+
+            AuthToken.objects.filter(key__in=keys).delete()
+            purged += len(keys)
+
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS(f'Purged {purged} tokens'))
@@ -0,0 +1,67 @@
+import datetime
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from core.models import CollectionVersion, Tombstone
+
+
+class Command(BaseCommand):
+    """
+    Django command to delete the tombstones older than the sync retention
+    in small batches
+    """
+
+    help = 'Delete tombstones older than SYNC_TOMBSTONE_RETENTION days'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=getattr(settings, 'SYNC_TOMBSTONE_RETENTION', 30),
+            help='Keep the tombstones of the last days'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0,
+            help='Seconds to wait between batches to spare the database'
+        )
+
+    def handle(self, *args, **options):
+        before = timezone.now() - datetime.timedelta(days=options['days'])
+        purged = 0
+
+        while True:
+            ids = list(Tombstone.objects.filter(
+                deleted_at__lt=before
+            ).values_list('id', flat=True)[:options['batch_size']])
+
+            if not ids:
+                break
+
+            tombstones = Tombstone.objects.filter(id__in=ids)
+
+            # Sync tokens before the purged versions now need a full sync
+            with transaction.atomic():
+                for row in tombstones.values('user_id').annotate(
+                    version=Max('sync_version')
+                ):
+                    CollectionVersion.objects.filter(
+                        user_id=row['user_id'],
+                        purged_version__lt=row['version']
+                    ).update(purged_version=row['version'])
+
+                tombstones.delete()
+
+            purged += len(ids)
+
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS(f'Purged {purged} tombstones'))
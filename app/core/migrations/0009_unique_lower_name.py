@@ -0,0 +1,64 @@
+from django.db import migrations
+from django.db.models import Count, Min
+from django.db.models.functions import Lower
+
+
+def merge_duplicate_names(apps, schema_editor):
+    """Merge tags and ingredients of a user that only differ in case"""
+
+    Recipe = apps.get_model('core', 'Recipe')
+
+    for model_name, relation in (('Tag', 'tags'), ('Ingredient', 'ingredients')):
+        model = apps.get_model('core', model_name)
+        through = getattr(Recipe, relation).through
+        target = f'{model_name.lower()}_id'
+
+        duplicates = model.objects.annotate(
+            lower_name=Lower('name')
+        ).values('user_id', 'lower_name').annotate(
+            count=Count('id'),
+            kept=Min('id')
+        ).filter(count__gt=1)
+
+        for group in duplicates:
+            others = list(model.objects.annotate(
+                lower_name=Lower('name')
+            ).filter(
+                user_id=group['user_id'],
+                lower_name=group['lower_name']
+            ).exclude(id=group['kept']).values_list('id', flat=True))
+
+            tagged = set(through.objects.filter(
+                **{target: group['kept']}
+            ).values_list('recipe_id', flat=True))
+
+            for link in through.objects.filter(**{f'{target}__in': others}):
+                if link.recipe_id not in tagged:
+                    through.objects.create(
+                        recipe_id=link.recipe_id,
+                        **{target: group['kept']}
+                    )
+                    tagged.add(link.recipe_id)
+
+            model.objects.filter(id__in=others).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_recipe_image_renditions'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_names, migrations.RunPython.noop),
+        migrations.RunSQL(
+            ['CREATE UNIQUE INDEX core_tag_user_lower_name_uniq '
+             'ON core_tag (user_id, lower(name))'],
+            ['DROP INDEX core_tag_user_lower_name_uniq'],
+        ),
+        migrations.RunSQL(
+            ['CREATE UNIQUE INDEX core_ingredient_user_lower_name_uniq '
+             'ON core_ingredient (user_id, lower(name))'],
+            ['DROP INDEX core_ingredient_user_lower_name_uniq'],
+        ),
+    ]
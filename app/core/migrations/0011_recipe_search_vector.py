@@ -0,0 +1,135 @@
+# Generated by Django 2.1.15 on 2026-10-18 04:34
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+from core.db.utils import run_on_postgresql
+
+
+# The vector weighs the title above the tag and ingredient names. Triggers
+# refresh it when a recipe is written, when its tags or ingredients change
+# and when a tag or ingredient is renamed, so bulk writes are covered too.
+CREATE_SEARCH_TRIGGERS = [
+    """
+    CREATE FUNCTION core_recipe_related_search_vector(recipe integer)
+    RETURNS tsvector AS $$
+        SELECT setweight(to_tsvector('english', coalesce((
+            SELECT string_agg(t.name, ' ')
+            FROM core_tag t
+            JOIN core_recipe_tags rt ON rt.tag_id = t.id
+            WHERE rt.recipe_id = recipe
+        ), '')), 'B') || setweight(to_tsvector('english', coalesce((
+            SELECT string_agg(i.name, ' ')
+            FROM core_ingredient i
+            JOIN core_recipe_ingredients ri ON ri.ingredient_id = i.id
+            WHERE ri.recipe_id = recipe
+        ), '')), 'B')
+    $$ LANGUAGE sql STABLE
+    """,
+    """
+    CREATE FUNCTION core_recipe_search_vector_trigger() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+            core_recipe_related_search_vector(NEW.id);
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER core_recipe_search_vector
+    BEFORE INSERT OR UPDATE ON core_recipe
+    FOR EACH ROW EXECUTE PROCEDURE core_recipe_search_vector_trigger()
+    """,
+    """
+    CREATE FUNCTION core_recipe_relation_search_trigger() RETURNS trigger AS $$
+    BEGIN
+        -- Setting the title runs the trigger computing the vector
+        UPDATE core_recipe SET title = title
+        WHERE id = (CASE TG_OP WHEN 'DELETE' THEN OLD.recipe_id
+                    ELSE NEW.recipe_id END);
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER core_recipe_tags_search_vector
+    AFTER INSERT OR DELETE ON core_recipe_tags
+    FOR EACH ROW EXECUTE PROCEDURE core_recipe_relation_search_trigger()
+    """,
+    """
+    CREATE TRIGGER core_recipe_ingredients_search_vector
+    AFTER INSERT OR DELETE ON core_recipe_ingredients
+    FOR EACH ROW EXECUTE PROCEDURE core_recipe_relation_search_trigger()
+    """,
+    """
+    CREATE FUNCTION core_tag_search_trigger() RETURNS trigger AS $$
+    BEGIN
+        UPDATE core_recipe SET title = title WHERE id IN (
+            SELECT recipe_id FROM core_recipe_tags WHERE tag_id = NEW.id
+        );
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER core_tag_search_vector
+    AFTER UPDATE OF name ON core_tag
+    FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name)
+    EXECUTE PROCEDURE core_tag_search_trigger()
+    """,
+    """
+    CREATE FUNCTION core_ingredient_search_trigger() RETURNS trigger AS $$
+    BEGIN
+        UPDATE core_recipe SET title = title WHERE id IN (
+            SELECT recipe_id FROM core_recipe_ingredients
+            WHERE ingredient_id = NEW.id
+        );
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER core_ingredient_search_vector
+    AFTER UPDATE OF name ON core_ingredient
+    FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name)
+    EXECUTE PROCEDURE core_ingredient_search_trigger()
+    """,
+    'UPDATE core_recipe SET title = title',
+    'CREATE INDEX core_recipe_search_vector_idx '
+    'ON core_recipe USING gin (search_vector)',
+]
+
+DROP_SEARCH_TRIGGERS = [
+    'DROP INDEX core_recipe_search_vector_idx',
+    'DROP TRIGGER core_ingredient_search_vector ON core_ingredient',
+    'DROP FUNCTION core_ingredient_search_trigger()',
+    'DROP TRIGGER core_tag_search_vector ON core_tag',
+    'DROP FUNCTION core_tag_search_trigger()',
+    'DROP TRIGGER core_recipe_ingredients_search_vector '
+    'ON core_recipe_ingredients',
+    'DROP TRIGGER core_recipe_tags_search_vector ON core_recipe_tags',
+    'DROP FUNCTION core_recipe_relation_search_trigger()',
+    'DROP TRIGGER core_recipe_search_vector ON core_recipe',
+    'DROP FUNCTION core_recipe_search_vector_trigger()',
+    'DROP FUNCTION core_recipe_related_search_vector(integer)',
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_collection_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(
+            run_on_postgresql(CREATE_SEARCH_TRIGGERS),
+            run_on_postgresql(DROP_SEARCH_TRIGGERS),
+        ),
+    ]
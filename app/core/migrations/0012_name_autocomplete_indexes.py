@@ -0,0 +1,38 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+from core.db.utils import run_on_postgresql
+
+
+CREATE_INDEXES = [
+    'CREATE INDEX core_tag_user_lower_name_prefix_idx '
+    'ON core_tag (user_id, lower(name) text_pattern_ops)',
+    'CREATE INDEX core_tag_lower_name_trgm_idx '
+    'ON core_tag USING gin (lower(name) gin_trgm_ops)',
+    'CREATE INDEX core_ingredient_user_lower_name_prefix_idx '
+    'ON core_ingredient (user_id, lower(name) text_pattern_ops)',
+    'CREATE INDEX core_ingredient_lower_name_trgm_idx '
+    'ON core_ingredient USING gin (lower(name) gin_trgm_ops)',
+]
+
+DROP_INDEXES = [
+    'DROP INDEX core_tag_user_lower_name_prefix_idx',
+    'DROP INDEX core_tag_lower_name_trgm_idx',
+    'DROP INDEX core_ingredient_user_lower_name_prefix_idx',
+    'DROP INDEX core_ingredient_lower_name_trgm_idx',
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_recipe_search_vector'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(
+            run_on_postgresql(CREATE_INDEXES),
+            run_on_postgresql(DROP_INDEXES),
+        ),
+    ]
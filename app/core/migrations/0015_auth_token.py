@@ -0,0 +1,53 @@
+# Generated by Django 2.1.15 on 2026-10-18 04:48
+
+import datetime
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def copy_tokens(apps, schema_editor):
+    """Keep the clients holding a token signed in until it expires"""
+
+    Token = apps.get_model('authtoken', 'Token')
+    AuthToken = apps.get_model('core', 'AuthToken')
+    now = django.utils.timezone.now()
+    expires = now + datetime.timedelta(
+        seconds=getattr(settings, 'TOKEN_TTL', 86400)
+    )
+
+    AuthToken.objects.bulk_create(
+        [
+            AuthToken(
+                key=token.key,
+                user_id=token.user_id,
+                created=now,
+                expires=expires
+            )
+            for token in Token.objects.iterator()
+        ],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_delta_sync'),
+        ('authtoken', '0002_auto_20160226_1747'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthToken',
+            fields=[
+                ('key', models.CharField(max_length=40, primary_key=True, serialize=False)),
+                ('created', models.DateTimeField(default=django.utils.timezone.now)),
+                ('expires', models.DateTimeField(db_index=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='auth_tokens', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(copy_tokens, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+from django.db import migrations
+from django.utils import timezone
+
+
+def backfill_sync_versions(apps, schema_editor):
+    """Version the rows older than the delta sync for the full sync"""
+
+    CollectionVersion = apps.get_model('core', 'CollectionVersion')
+    models = [
+        apps.get_model('core', name)
+        for name in ('Recipe', 'Tag', 'Ingredient')
+    ]
+
+    user_ids = set()
+    for model in models:
+        user_ids.update(
+            model.objects.filter(sync_version=0).values_list(
+                'user_id',
+                flat=True
+            ).distinct()
+        )
+
+    for user_id in user_ids:
+        version, created = CollectionVersion.objects.get_or_create(
+            user_id=user_id
+        )
+        if not created:
+            version.version += 1
+            version.modified = timezone.now()
+            version.save()
+
+        for model in models:
+            model.objects.filter(user_id=user_id, sync_version=0).update(
+                sync_version=version.version
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_auth_token'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            backfill_sync_versions,
+            migrations.RunPython.noop
+        ),
+    ]
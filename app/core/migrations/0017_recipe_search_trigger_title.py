@@ -0,0 +1,37 @@
+from django.db import migrations
+
+
+# Updates of the sync version or the image status leave the vector alone,
+# the relation triggers still set the title to refresh it
+def replace_recipe_trigger(events):
+    """Return a RunPython function recreating the recipe search trigger"""
+
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+
+        schema_editor.execute(
+            'DROP TRIGGER core_recipe_search_vector ON core_recipe'
+        )
+        schema_editor.execute(
+            f'CREATE TRIGGER core_recipe_search_vector '
+            f'BEFORE {events} ON core_recipe '
+            f'FOR EACH ROW EXECUTE PROCEDURE '
+            f'core_recipe_search_vector_trigger()'
+        )
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_backfill_sync_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            replace_recipe_trigger('INSERT OR UPDATE OF title'),
+            replace_recipe_trigger('INSERT OR UPDATE'),
+        ),
+    ]
@@ -0,0 +1,147 @@
+from django.db import migrations
+
+from core.db.utils import run_on_postgresql
+
+
+# UPDATE OF title fires on every statement setting the title, so a full
+# save() recomputed the vector even with the same title. The update trigger
+# now only runs when the title changes, and the relation triggers write the
+# vector themselves instead of setting the title to itself.
+CREATE_WHEN_TRIGGERS = [
+    """
+    CREATE FUNCTION core_recipe_search_vector_of(title text, recipe integer)
+    RETURNS tsvector AS $$
+        SELECT setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+            core_recipe_related_search_vector(recipe)
+    $$ LANGUAGE sql STABLE
+    """,
+    """
+    CREATE OR REPLACE FUNCTION core_recipe_search_vector_trigger()
+    RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector := core_recipe_search_vector_of(NEW.title, NEW.id);
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION core_recipe_relation_search_trigger()
+    RETURNS trigger AS $$
+    BEGIN
+        UPDATE core_recipe SET search_vector =
+            core_recipe_search_vector_of(title, id)
+        WHERE id = (CASE TG_OP WHEN 'DELETE' THEN OLD.recipe_id
+                    ELSE NEW.recipe_id END);
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION core_tag_search_trigger() RETURNS trigger AS $$
+    BEGIN
+        UPDATE core_recipe SET search_vector =
+            core_recipe_search_vector_of(title, id)
+        WHERE id IN (
+            SELECT recipe_id FROM core_recipe_tags WHERE tag_id = NEW.id
+        );
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION core_ingredient_search_trigger()
+    RETURNS trigger AS $$
+    BEGIN
+        UPDATE core_recipe SET search_vector =
+            core_recipe_search_vector_of(title, id)
+        WHERE id IN (
+            SELECT recipe_id FROM core_recipe_ingredients
+            WHERE ingredient_id = NEW.id
+        );
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    'DROP TRIGGER core_recipe_search_vector ON core_recipe',
+    """
+    CREATE TRIGGER core_recipe_search_vector
+    BEFORE INSERT ON core_recipe
+    FOR EACH ROW EXECUTE PROCEDURE core_recipe_search_vector_trigger()
+    """,
+    """
+    CREATE TRIGGER core_recipe_search_vector_title
+    BEFORE UPDATE OF title ON core_recipe
+    FOR EACH ROW WHEN (OLD.title IS DISTINCT FROM NEW.title)
+    EXECUTE PROCEDURE core_recipe_search_vector_trigger()
+    """,
+]
+
+DROP_WHEN_TRIGGERS = [
+    'DROP TRIGGER core_recipe_search_vector_title ON core_recipe',
+    'DROP TRIGGER core_recipe_search_vector ON core_recipe',
+    """
+    CREATE TRIGGER core_recipe_search_vector
+    BEFORE INSERT OR UPDATE OF title ON core_recipe
+    FOR EACH ROW EXECUTE PROCEDURE core_recipe_search_vector_trigger()
+    """,
+    """
+    CREATE OR REPLACE FUNCTION core_ingredient_search_trigger()
+    RETURNS trigger AS $$
+    BEGIN
+        UPDATE core_recipe SET title = title WHERE id IN (
+            SELECT recipe_id FROM core_recipe_ingredients
+            WHERE ingredient_id = NEW.id
+        );
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION core_tag_search_trigger() RETURNS trigger AS $$
+    BEGIN
+        UPDATE core_recipe SET title = title WHERE id IN (
+            SELECT recipe_id FROM core_recipe_tags WHERE tag_id = NEW.id
+        );
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION core_recipe_relation_search_trigger()
+    RETURNS trigger AS $$
+    BEGIN
+        -- Setting the title runs the trigger computing the vector
+        UPDATE core_recipe SET title = title
+        WHERE id = (CASE TG_OP WHEN 'DELETE' THEN OLD.recipe_id
+                    ELSE NEW.recipe_id END);
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION core_recipe_search_vector_trigger()
+    RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+            core_recipe_related_search_vector(NEW.id);
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    'DROP FUNCTION core_recipe_search_vector_of(text, integer)',
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_recipe_search_trigger_title'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_on_postgresql(CREATE_WHEN_TRIGGERS),
+            run_on_postgresql(DROP_WHEN_TRIGGERS),
+        ),
+    ]
@@ -1,8 +1,13 @@
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager
 from django.contrib.auth.models import PermissionsMixin
+from django.contrib.postgres.search import SearchVectorField
+from django.db.models import F
 from django.db.models.deletion import CASCADE
+from django.utils import timezone
+import binascii
+import datetime
 import uuid
 import os
 
@@ -18,6 +23,15 @@ def recipe_image_file_path(instance, filename):
     return os.path.join('uploads/recipe/', filename)
 
 
+def recipe_rendition_file_path(instance, filename):
+    """Generate filepath for a resized rendition of a recipe image"""
+
+    ext = filename.split('.')[-1]
+    filename = f'{uuid.uuid4()}-{instance.name}.{ext}'
+
+    return os.path.join('uploads/recipe/renditions/', filename)
+
+
 class UserManager(BaseUserManager):
     """
         Manager for UserProfiles
@@ -77,30 +91,100 @@ class User(AbstractBaseUser, PermissionsMixin):
         return self.email
 
 
-class Tag(models.Model):
+class SyncVersionMixin:
+    """Record the new collection version of the user on each save"""
+
+    def save(self, *args, sync_version=None, **kwargs):
+        """Save with a new version, or the one bumped by a batch"""
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields:
+            kwargs['update_fields'] = {
+                *update_fields, 'sync_version', 'updated_at'
+            }
+
+        # The version bump and the row commit together
+        with transaction.atomic(savepoint=False):
+            if sync_version is None:
+                sync_version = CollectionVersion.objects.bump(self.user_id)
+
+            if sync_version is not None:
+                self.sync_version = sync_version
+
+            super().save(*args, **kwargs)
+
+
+class Tag(SyncVersionMixin, models.Model):
     """Tag for to be use for recipe"""
 
     name = models.CharField(max_length=255)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=CASCADE)
+    updated_at = models.DateTimeField(auto_now=True)
+    sync_version = models.BigIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            # Serves the per user listing ordered by ('-name', 'id')
+            models.Index(
+                fields=['user', '-name', 'id'],
+                name='core_tag_user_name_idx'
+            ),
+            models.Index(
+                fields=['user', 'sync_version'],
+                name='core_tag_user_sync_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
 
-class Ingredient(models.Model):
+class Ingredient(SyncVersionMixin, models.Model):
     """
     Ingredients to be use in the recipe
     """
     name = models.CharField(max_length=255)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=CASCADE)
+    updated_at = models.DateTimeField(auto_now=True)
+    sync_version = models.BigIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', '-name', 'id'],
+                name='core_ingredient_user_name_idx'
+            ),
+            models.Index(
+                fields=['user', 'sync_version'],
+                name='core_ingredient_user_sync_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
 
-class Recipe(models.Model):
+class RecipeManager(models.Manager):
+    """Manager leaving out the search vector, only read by searches"""
+
+    def get_queryset(self):
+        return super().get_queryset().defer('search_vector')
+
+
+class Recipe(SyncVersionMixin, models.Model):
     """Recipe model """
 
+    IMAGE_NONE = 'none'
+    IMAGE_PENDING = 'pending'
+    IMAGE_READY = 'ready'
+    IMAGE_FAILED = 'failed'
+    IMAGE_STATUS_CHOICES = (
+        (IMAGE_NONE, 'No image'),
+        (IMAGE_PENDING, 'Processing'),
+        (IMAGE_READY, 'Ready'),
+        (IMAGE_FAILED, 'Failed'),
+    )
+
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=CASCADE)
     title = models.CharField(max_length=255)
     time_minutes = models.IntegerField()
@@ -110,6 +194,238 @@ class Recipe(models.Model):
     ingredients = models.ManyToManyField('Ingredient')
     tags = models.ManyToManyField('Tag')
     image = models.ImageField(null=True, upload_to=recipe_image_file_path)
+    image_status = models.CharField(
+        max_length=10,
+        choices=IMAGE_STATUS_CHOICES,
+        default=IMAGE_NONE
+    )
+    # Title, tag and ingredient names, kept up to date by database triggers
+    # on PostgreSQL and left empty on other databases
+    search_vector = SearchVectorField(null=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Collection version of the last change, see CollectionVersion
+    sync_version = models.BigIntegerField(default=0, editable=False)
+
+    objects = RecipeManager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', 'id'],
+                name='core_recipe_user_id_idx'
+            ),
+            models.Index(
+                fields=['user', 'time_minutes', 'id'],
+                name='core_recipe_user_time_idx'
+            ),
+            models.Index(
+                fields=['user', 'price', 'id'],
+                name='core_recipe_user_price_idx'
+            ),
+            models.Index(
+                fields=['user', 'sync_version'],
+                name='core_recipe_user_sync_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.title
+
+
+# Recipe field of each related model and of its through model
+RELATION_FIELDS = {
+    Tag: 'tags',
+    Ingredient: 'ingredients',
+    Recipe.tags.through: 'tags',
+    Recipe.ingredients.through: 'ingredients',
+}
+
+
+class RecipeImageRendition(models.Model):
+    """Resized version of the image of a recipe"""
+
+    recipe = models.ForeignKey(
+        'Recipe',
+        on_delete=CASCADE,
+        related_name='renditions'
+    )
+    name = models.CharField(max_length=20)
+    image = models.ImageField(upload_to=recipe_rendition_file_path)
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ('recipe', 'name')
+
+    def __str__(self):
+        return f'{self.recipe} ({self.name})'
+
+
+class CollectionVersionManager(models.Manager):
+    """Manager for the collection versions of users"""
+
+    def current(self, user_id):
+        """Return the version of a user, creating it the first time"""
+
+        version, _ = self.get_or_create(user_id=user_id)
+
+        return version
+
+    def bump(self, user_id):
+        """
+        Mark the recipies, tags and ingredients of a user as changed and
+        return the new version, or None if the user has no version.
+
+        The row stays locked until the transaction commits, so concurrent
+        writes of a user commit their versions in order.
+        """
+
+        with transaction.atomic(savepoint=False):
+            updated = self.filter(user_id=user_id).update(
+                version=F('version') + 1,
+                modified=timezone.now()
+            )
+
+            if not updated:
+                return None
+
+            return self.filter(user_id=user_id).values_list(
+                'version',
+                flat=True
+            ).get()
+
+
+class CollectionVersion(models.Model):
+    """
+    Version of the recipies, tags and ingredients of a user.
+
+    It is bumped on every change so list responses can be validated with a
+    single primary key lookup, and each changed row records it in
+    ``sync_version`` for the delta sync.
+    """
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=CASCADE,
+        primary_key=True
+    )
+    version = models.BigIntegerField(default=1)
+    modified = models.DateTimeField(default=timezone.now)
+    # Greatest version of the purged tombstones, older sync tokens may have
+    # missed deletions and need a full sync
+    purged_version = models.BigIntegerField(default=0)
+
+    objects = CollectionVersionManager()
+
+    def __str__(self):
+        return f'{self.user_id}: {self.version}'
+
+
+class Tombstone(models.Model):
+    """Record of a deleted recipe, tag or ingredient for the delta sync"""
+
+    RECIPE = 'recipe'
+    TAG = 'tag'
+    INGREDIENT = 'ingredient'
+    MODEL_CHOICES = (
+        (RECIPE, 'Recipe'),
+        (TAG, 'Tag'),
+        (INGREDIENT, 'Ingredient'),
+    )
+
+    # Not a foreign key: objects are deleted before their user in cascades
+    user_id = models.IntegerField()
+    model = models.CharField(max_length=20, choices=MODEL_CHOICES)
+    object_id = models.IntegerField()
+    sync_version = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user_id', 'sync_version'],
+                name='core_tombstone_user_sync_idx'
+            ),
+            models.Index(
+                fields=['deleted_at'],
+                name='core_tombstone_deleted_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.model} {self.object_id}'
+
+
+def token_ttl():
+    """Return how long a token stays valid without being used"""
+    return datetime.timedelta(seconds=getattr(settings, 'TOKEN_TTL', 86400))
+
+
+class AuthTokenManager(models.Manager):
+    """Manager for the expiring auth tokens"""
+
+    def issue(self, user):
+        """Create and return a new token of the user"""
+
+        now = timezone.now()
+
+        return self.create(
+            user_id=user.id,
+            created=now,
+            expires=now + token_ttl()
+        )
+
+
+class AuthToken(models.Model):
+    """
+    Expiring auth token of a user.
+
+    Using a token pushes its expiry back, up to ``TOKEN_MAX_AGE`` after it
+    was issued, when the client has to get a new one.
+    """
+
+    key = models.CharField(max_length=40, primary_key=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=CASCADE,
+        related_name='auth_tokens'
+    )
+    created = models.DateTimeField(default=timezone.now)
+    expires = models.DateTimeField(db_index=True)
+
+    objects = AuthTokenManager()
+
+    def save(self, *args, **kwargs):
+        if not self.key:
+            self.key = binascii.hexlify(os.urandom(20)).decode()
+        return super().save(*args, **kwargs)
+
+    def is_expired(self, now):
+        return self.expires <= now
+
+    def refresh(self, now):
+        """
+        Extend the expiry of the token and return whether it changed.
+
+        It is written at most once per ``TOKEN_REFRESH_INTERVAL`` so most
+        requests do not write anything.
+        """
+
+        max_age = datetime.timedelta(
+            seconds=getattr(settings, 'TOKEN_MAX_AGE', 30 * 86400)
+        )
+        interval = datetime.timedelta(
+            seconds=getattr(settings, 'TOKEN_REFRESH_INTERVAL', 3600)
+        )
+        expires = min(now + token_ttl(), self.created + max_age)
+
+        if expires - self.expires < interval:
+            return False
+
+        AuthToken.objects.filter(key=self.key).update(expires=expires)
+        self.expires = expires
+
+        return True
+
+    def __str__(self):
+        return self.key
@@ -0,0 +1,139 @@
+from contextlib import contextmanager
+from threading import local
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.models import (
+    RELATION_FIELDS,
+    CollectionVersion,
+    Ingredient,
+    Recipe,
+    Tag,
+    Tombstone,
+)
+
+
+TOMBSTONE_MODELS = {
+    Recipe: Tombstone.RECIPE,
+    Tag: Tombstone.TAG,
+    Ingredient: Tombstone.INGREDIENT,
+}
+
+# Recipies saved in the current saving_relations block of each thread
+_saving = local()
+
+
+@receiver(post_save, sender=get_user_model())
+def create_collection_version(sender, instance, created, **kwargs):
+    """Start the collection version of a new user"""
+    if created:
+        CollectionVersion.objects.create(user=instance)
+
+
+@receiver(post_delete, sender=get_user_model())
+def delete_tombstones(sender, instance, **kwargs):
+    """Drop the tombstones left by the objects of a deleted user"""
+    Tombstone.objects.filter(user_id=instance.id).delete()
+
+
+@contextmanager
+def saving_relations():
+    """
+    Write recipies and their tags and ingredients in one transaction.
+
+    Relations set after a recipe is saved in the block do not touch it
+    again, the saved row already carries the version of the transaction.
+    """
+
+    previous = getattr(_saving, 'recipies', None)
+    _saving.recipies = set()
+
+    try:
+        with transaction.atomic():
+            yield
+    finally:
+        _saving.recipies = previous
+
+
+@receiver(post_save, sender=Recipe)
+def remember_saved_recipe(sender, instance, **kwargs):
+    """Note the recipies saved in a saving_relations block"""
+
+    recipies = getattr(_saving, 'recipies', None)
+
+    if recipies is not None:
+        recipies.add(instance.pk)
+
+
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def create_tombstone(sender, instance, **kwargs):
+    """Record the deletion of an object for the delta sync"""
+
+    version = CollectionVersion.objects.bump(instance.user_id)
+
+    # The user is being deleted too
+    if version is None:
+        return
+
+    Tombstone.objects.create(
+        user_id=instance.user_id,
+        model=TOMBSTONE_MODELS[sender],
+        object_id=instance.id,
+        sync_version=version
+    )
+
+
+def touch_recipies(user_id, recipies):
+    """Mark recipies whose relations changed without saving them"""
+
+    with transaction.atomic(savepoint=False):
+        version = CollectionVersion.objects.bump(user_id)
+
+        if version is not None:
+            recipies.update(sync_version=version, updated_at=timezone.now())
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def touch_recipe_relations(sender, instance, action, reverse, pk_set,
+                           **kwargs):
+    """Mark the recipies whose tags or ingredients changed"""
+
+    if not reverse:
+        if instance.pk in (getattr(_saving, 'recipies', None) or ()):
+            return
+
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            touch_recipies(
+                instance.user_id,
+                Recipe.objects.filter(pk=instance.pk)
+            )
+    elif action in ('post_add', 'post_remove'):
+        touch_recipies(instance.user_id, Recipe.objects.filter(pk__in=pk_set))
+    elif action == 'pre_clear':
+        touch_recipies(
+            instance.user_id,
+            Recipe.objects.filter(**{RELATION_FIELDS[sender]: instance})
+        )
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def touch_deleted_relations(sender, instance, **kwargs):
+    """Mark the recipies losing a deleted tag or ingredient"""
+
+    touch_recipies(
+        instance.user_id,
+        Recipe.objects.filter(**{RELATION_FIELDS[sender]: instance})
+    )
@@ -0,0 +1,316 @@
+import datetime
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import exceptions, status
+from rest_framework.test import APIClient
+
+from core.authentication import (
+    CachedTokenAuthentication,
+    RevokedKeys,
+    get_token_cache,
+    revoked_tokens,
+    token_cache_stats,
+)
+from core.models import AuthToken
+
+
+def at(moment):
+    """Patch the time seen by the authentication"""
+    return patch('core.authentication.timezone.now', return_value=moment)
+
+
+@override_settings(TOKEN_CACHE_TIMEOUT=300)
+class CachedTokenAuthenticationTests(TestCase):
+    """Test the cached token authentication backend"""
+
+    def setUp(self):
+        get_token_cache().clear()
+        token_cache_stats.reset()
+        revoked_tokens.clear()
+        self.user = get_user_model().objects.create_user(
+            'auth@auth.com',
+            '123456'
+        )
+        self.token = AuthToken.objects.issue(self.user)
+        self.auth = CachedTokenAuthentication()
+
+    def test_lookup_is_cached(self):
+        """Test a second lookup of the same token hits no database"""
+
+        self.auth.authenticate_credentials(self.token.key)
+
+        with self.assertNumQueries(0):
+            user, token = self.auth.authenticate_credentials(self.token.key)
+
+        self.assertEqual(user, self.user)
+        self.assertEqual(token.key, self.token.key)
+        self.assertEqual(token_cache_stats.hits, 1)
+        self.assertEqual(token_cache_stats.misses, 1)
+
+    def test_entries_of_older_releases_ignored(self):
+        """Test a token cached under an older key format is not read"""
+
+        get_token_cache().set(f'auth-token:{self.token.key}', object())
+        # Tokens cached before the user_is_active annotation
+        get_token_cache().set(f'auth-token:v2:{self.token.key}', self.token)
+
+        user, token = self.auth.authenticate_credentials(self.token.key)
+
+        self.assertEqual(token.key, self.token.key)
+        self.assertTrue(user.is_active)
+        self.assertEqual(token_cache_stats.misses, 1)
+
+    def test_token_header_authenticates_request(self):
+        """Test the API authenticates requests through the cached backend"""
+
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+        res = client.get(reverse('user:me'))
+        client.get(reverse('recipe:tag-list'))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['email'], self.user.email)
+        self.assertEqual(token_cache_stats.hits, 1)
+
+    def test_user_row_not_loaded(self):
+        """Test listing recipies never reads the full user row"""
+
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+        with CaptureQueriesContext(connection) as queries:
+            res = client.get(reverse('recipe:recipe-list'))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        for query in queries:
+            self.assertNotIn('"core_user"."password"', query['sql'])
+
+    def test_principal_loads_user_lazily(self):
+        """Test the request user reads its row only for other fields"""
+
+        with self.assertNumQueries(1):
+            user, _ = self.auth.authenticate_credentials(self.token.key)
+            self.assertTrue(user)
+            self.assertTrue(user.is_active)
+            self.assertEqual(user.pk, self.user.id)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(user.email, self.user.email)
+
+    def test_invalid_token_rejected(self):
+        """Test an unknown token is rejected"""
+
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.auth.authenticate_credentials('invalid')
+
+    def test_deleted_token_invalidated(self):
+        """Test a deleted token is rejected even if it was cached"""
+
+        self.auth.authenticate_credentials(self.token.key)
+        self.token.delete()
+
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.auth.authenticate_credentials(self.token.key)
+
+    def test_deactivated_user_invalidated(self):
+        """Test a deactivated user is rejected even if it was cached"""
+
+        self.auth.authenticate_credentials(self.token.key)
+        self.user.is_active = False
+        self.user.save()
+
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.auth.authenticate_credentials(self.token.key)
+
+    @override_settings(TOKEN_CACHE_TIMEOUT=0)
+    def test_lookup_not_cached_without_timeout(self):
+        """Test lookups are not cached when the cache timeout is 0"""
+
+        self.auth.authenticate_credentials(self.token.key)
+
+        with self.assertNumQueries(1):
+            self.auth.authenticate_credentials(self.token.key)
+
+        self.assertIsNone(
+            get_token_cache().get(f'auth-token:v3:{self.token.key}')
+        )
+
+    def test_benchmark_command(self):
+        """Test the benchmark command reports both backends"""
+
+        out = StringIO()
+        call_command('benchmark_auth', iterations=5, stdout=out)
+
+        self.assertIn('TokenAuthentication', out.getvalue())
+        self.assertIn('CachedTokenAuthentication', out.getvalue())
+        self.assertIn('hits=4 misses=1', out.getvalue())
+
+    def test_request_user_benchmark_command(self):
+        """Test the request user benchmark reports both lookups"""
+
+        out = StringIO()
+        call_command('benchmark_request_user', requests=2, stdout=out)
+
+        self.assertIn('principal', out.getvalue())
+        self.assertIn('FullUserAuthentication', out.getvalue())
+
+
+@override_settings(
+    TOKEN_CACHE_TIMEOUT=300,
+    TOKEN_TTL=3600,
+    TOKEN_MAX_AGE=4 * 3600,
+    TOKEN_REFRESH_INTERVAL=600
+)
+class ExpiringTokenTests(TestCase):
+    """Test tokens expire, slide and are revoked"""
+
+    def setUp(self):
+        get_token_cache().clear()
+        revoked_tokens.clear()
+        self.user = get_user_model().objects.create_user(
+            'auth@auth.com',
+            '123456'
+        )
+        self.token = AuthToken.objects.issue(self.user)
+        self.issued = self.token.created
+        self.auth = CachedTokenAuthentication()
+
+    def test_expiry_boundary(self):
+        """Test a token is valid until, but not at, its expiry"""
+
+        expires = self.token.expires
+        self.assertEqual(expires, self.issued + datetime.timedelta(hours=1))
+
+        with at(expires - datetime.timedelta(microseconds=1)):
+            self.auth.authenticate_credentials(self.token.key)
+
+        with at(expires + datetime.timedelta(hours=1)):
+            get_token_cache().clear()
+            with self.assertRaises(exceptions.AuthenticationFailed):
+                self.auth.authenticate_credentials(self.token.key)
+
+    def test_expired_at_exact_expiry(self):
+        """Test a token is rejected at its expiry, even when cached"""
+
+        self.auth.authenticate_credentials(self.token.key)
+
+        with at(self.token.expires):
+            with self.assertRaises(exceptions.AuthenticationFailed):
+                self.auth.authenticate_credentials(self.token.key)
+
+    def test_expiry_slides_once_per_interval(self):
+        """Test using a token extends it only after the refresh interval"""
+
+        with at(self.issued + datetime.timedelta(minutes=9)):
+            self.auth.authenticate_credentials(self.token.key)
+
+        self.token.refresh_from_db()
+        self.assertEqual(
+            self.token.expires,
+            self.issued + datetime.timedelta(hours=1)
+        )
+
+        moment = self.issued + datetime.timedelta(minutes=50)
+        with at(moment):
+            self.auth.authenticate_credentials(self.token.key)
+            with self.assertNumQueries(0):
+                self.auth.authenticate_credentials(self.token.key)
+
+        self.token.refresh_from_db()
+        self.assertEqual(
+            self.token.expires,
+            moment + datetime.timedelta(hours=1)
+        )
+
+        with at(moment + datetime.timedelta(minutes=59)):
+            self.auth.authenticate_credentials(self.token.key)
+
+    def test_expiry_capped_at_max_age(self):
+        """Test a token in use still expires at its maximum age"""
+
+        for minutes in range(0, 4 * 60, 50):
+            with at(self.issued + datetime.timedelta(minutes=minutes)):
+                self.auth.authenticate_credentials(self.token.key)
+
+        self.token.refresh_from_db()
+        self.assertEqual(
+            self.token.expires,
+            self.issued + datetime.timedelta(hours=4)
+        )
+
+        with at(self.token.expires):
+            with self.assertRaises(exceptions.AuthenticationFailed):
+                self.auth.authenticate_credentials(self.token.key)
+
+    def test_revoked_token_rejected_without_query(self):
+        """Test deleted and unknown keys are rejected from memory"""
+
+        key = self.token.key
+        self.auth.authenticate_credentials(key)
+        self.token.delete()
+
+        with self.assertNumQueries(0):
+            with self.assertRaises(exceptions.AuthenticationFailed):
+                self.auth.authenticate_credentials(key)
+
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.auth.authenticate_credentials('unknown')
+
+        with self.assertNumQueries(0):
+            with self.assertRaises(exceptions.AuthenticationFailed):
+                self.auth.authenticate_credentials('unknown')
+
+    def test_revoked_keys_bounded(self):
+        """Test the revoked keys forget the oldest and expired ones"""
+
+        keys = RevokedKeys(max_size=2, ttl=60)
+        for key in ('a', 'b', 'c'):
+            keys.add(key)
+
+        self.assertNotIn('a', keys)
+        self.assertIn('c', keys)
+
+        with patch('core.authentication.time.monotonic') as monotonic:
+            monotonic.return_value = 10 ** 9
+            self.assertNotIn('c', keys)
+
+    def test_refresh_rotates_token(self):
+        """Test refreshing returns a new token and revokes the old one"""
+
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+        res = client.post(reverse('user:token-refresh'))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res.data['token'], self.token.key)
+        self.assertFalse(AuthToken.objects.filter(key=self.token.key))
+
+        res = client.post(reverse('user:token-refresh'))
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_purge_expired_tokens(self):
+        """Test the purge command deletes only expired tokens in batches"""
+
+        past = timezone.now() - datetime.timedelta(seconds=1)
+        for _ in range(5):
+            AuthToken.objects.create(user=self.user, expires=past)
+
+        out = StringIO()
+        call_command('purge_expired_tokens', batch_size=2, stdout=out)
+
+        self.assertIn('Purged 5 tokens', out.getvalue())
+        self.assertEqual(
+            list(AuthToken.objects.values_list('key', flat=True)),
+            [self.token.key]
+        )
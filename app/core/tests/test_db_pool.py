@@ -0,0 +1,179 @@
+import sqlite3
+import threading
+import unittest
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import SimpleTestCase, TransactionTestCase
+
+from core.db.pool import ConnectionPool, PoolExhausted
+
+
+def sqlite_connect():
+    return sqlite3.connect(':memory:', check_same_thread=False)
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    """Test the thread safe connection pool"""
+
+    def test_released_connection_reused(self):
+        """Test a released connection is handed out again"""
+
+        pool = ConnectionPool(sqlite_connect, max_size=2)
+
+        first = pool.acquire()
+        pool.release(first)
+
+        self.assertIs(pool.acquire(), first)
+        self.assertEqual(pool.size, 1)
+
+    def test_max_size_waits_then_fails(self):
+        """Test callers wait for a release and give up after the timeout"""
+
+        pool = ConnectionPool(sqlite_connect, max_size=1, timeout=0.2)
+        held = pool.acquire()
+
+        with self.assertRaises(PoolExhausted):
+            pool.acquire()
+
+        threading.Timer(0.05, pool.release, [held]).start()
+        self.assertIs(pool.acquire(), held)
+
+    def test_unhealthy_connection_discarded(self):
+        """Test connections failing the health check are replaced"""
+
+        def check(conn):
+            conn.execute('SELECT 1')
+            return True
+
+        pool = ConnectionPool(sqlite_connect, max_size=1, check=check)
+        broken = pool.acquire()
+        pool.release(broken)
+        broken.close()
+
+        conn = pool.acquire()
+
+        self.assertIsNot(conn, broken)
+        self.assertEqual(pool.size, 1)
+
+    def test_release_rolls_back(self):
+        """Test a released connection does not keep an open transaction"""
+
+        pool = ConnectionPool(sqlite_connect, max_size=1)
+        conn = pool.acquire()
+        conn.execute('CREATE TABLE t (x INTEGER)')
+        conn.commit()
+        conn.execute('INSERT INTO t VALUES (1)')
+
+        pool.release(conn)
+
+        self.assertEqual(
+            pool.acquire().execute('SELECT COUNT(*) FROM t').fetchone(),
+            (0,)
+        )
+
+    def test_threads_share_max_size(self):
+        """Test concurrent threads never open more than max_size"""
+
+        opened = []
+
+        def connect():
+            opened.append(1)
+            return sqlite_connect()
+
+        pool = ConnectionPool(connect, max_size=3, timeout=5)
+
+        def work():
+            for _ in range(20):
+                pool.release(pool.acquire())
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertLessEqual(len(opened), 3)
+
+
+@unittest.skipUnless(
+    connection.settings_dict['ENGINE'] == 'core.db.backends.postgresql',
+    'Requires the pooled PostgreSQL backend'
+)
+class PooledBackendTests(TransactionTestCase):
+    """Test the PostgreSQL backend gives connections back to the pool"""
+
+    def setUp(self):
+        self.settings_dict = connection.settings_dict.copy()
+        connection.close()
+        connection.settings_dict['POOL'] = {'MAX_SIZE': 2, 'TIMEOUT': 1}
+
+    def tearDown(self):
+        connection.close()
+        connection.settings_dict.clear()
+        connection.settings_dict.update(self.settings_dict)
+
+    def test_close_returns_connection_to_pool(self):
+        """Test closing the Django connection keeps the raw one open"""
+
+        connection.ensure_connection()
+        raw = connection.connection
+        connection.close()
+
+        self.assertFalse(raw.closed)
+        connection.ensure_connection()
+        self.assertIs(connection.connection, raw)
+
+
+@unittest.skipUnless(
+    connection.settings_dict['ENGINE'] == 'core.db.backends.postgresql',
+    'Requires the PostgreSQL backend'
+)
+class HealthCheckTests(TransactionTestCase):
+    """Test persistent connections are checked once per request"""
+
+    def setUp(self):
+        self.settings_dict = connection.settings_dict.copy()
+        connection.close()
+        connection.settings_dict['CONN_MAX_AGE'] = None
+        connection.settings_dict['CONN_HEALTH_CHECKS'] = True
+
+    def tearDown(self):
+        connection.close()
+        connection.settings_dict.clear()
+        connection.settings_dict.update(self.settings_dict)
+
+    def query(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+
+    def test_reused_connection_checked_once(self):
+        """Test only the first query of a request pings the connection"""
+
+        self.query()
+
+        with patch.object(
+            type(connection),
+            'is_usable',
+            return_value=True
+        ) as is_usable:
+            # Request finished then a new one started
+            connection.close_if_unusable_or_obsolete()
+            connection.close_if_unusable_or_obsolete()
+            self.assertEqual(is_usable.call_count, 0)
+
+            self.query()
+            self.query()
+            self.assertEqual(is_usable.call_count, 1)
+
+    def test_broken_connection_replaced(self):
+        """Test a connection failing the check is reopened"""
+
+        self.query()
+        raw = connection.connection
+        connection.close_if_unusable_or_obsolete()
+
+        with patch.object(type(connection), 'is_usable', return_value=False):
+            self.query()
+
+        self.assertIsNot(connection.connection, raw)
@@ -0,0 +1,97 @@
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model, hashers
+from django.contrib.auth.hashers import check_password, make_password
+from django.test import TestCase, override_settings
+
+from core.hashers import HashingPoolBusy, PBKDF2PasswordHasher, hashing_pool
+
+
+HASHERS = ['core.hashers.PBKDF2PasswordHasher']
+
+
+def exit_once(path):
+    """Kill the pool process the first time, return on the next call"""
+
+    if not os.path.exists(path):
+        open(path, 'w').close()
+        os._exit(1)
+
+    return 'done'
+
+
+@override_settings(PASSWORD_HASHERS=HASHERS, PASSWORD_PBKDF2_ITERATIONS=1000)
+class PasswordHasherTests(TestCase):
+    """Test the configurable PBKDF2 hasher"""
+
+    def test_iterations_from_settings(self):
+        """Test new hashes use the configured iterations"""
+
+        encoded = make_password('secret', salt='salt')
+
+        self.assertTrue(encoded.startswith('pbkdf2_sha256$1000$salt$'))
+        self.assertTrue(check_password('secret', encoded))
+
+    def test_hash_matches_django_hasher(self):
+        """Test stored hashes of the stock hasher still verify"""
+
+        encoded = hashers.PBKDF2PasswordHasher().encode('secret', 'salt', 1000)
+
+        self.assertEqual(
+            PBKDF2PasswordHasher().encode('secret', 'salt', 1000),
+            encoded
+        )
+
+    def test_hash_upgraded_on_login(self):
+        """Test a hash with other iterations is replaced on login"""
+
+        user = get_user_model().objects.create_user('a@a.com', 'secret')
+
+        with self.settings(PASSWORD_PBKDF2_ITERATIONS=2000):
+            self.assertTrue(user.check_password('secret'))
+            user.refresh_from_db()
+
+        self.assertIn('$2000$', user.password)
+
+
+@override_settings(
+    PASSWORD_HASHERS=HASHERS,
+    PASSWORD_PBKDF2_ITERATIONS=1000,
+    PASSWORD_HASHING_PROCESSES=1,
+    PASSWORD_HASHING_QUEUE=0,
+    PASSWORD_HASHING_TIMEOUT=0.1
+)
+class HashingPoolTests(TestCase):
+    """Test password hashes running in the process pool"""
+
+    def tearDown(self):
+        hashing_pool.shutdown()
+
+    def test_pool_hash_matches_inline(self):
+        """Test hashes from the pool equal the inline ones"""
+
+        encoded = make_password('secret', salt='salt')
+
+        with self.settings(PASSWORD_HASHING_PROCESSES=0):
+            self.assertEqual(make_password('secret', salt='salt'), encoded)
+
+    def test_pool_busy(self):
+        """Test hashes are refused when every slot is taken"""
+
+        _, slots = hashing_pool._get(1)
+        slots.acquire()
+        self.addCleanup(slots.release)
+
+        with self.assertRaises(HashingPoolBusy):
+            make_password('secret')
+
+    def test_broken_pool_restarted(self):
+        """Test a hash is retried once in a new pool when a process dies"""
+
+        path = os.path.join(tempfile.mkdtemp(), 'exited')
+        self.addCleanup(os.rmdir, os.path.dirname(path))
+        self.addCleanup(os.remove, path)
+
+        self.assertEqual(hashing_pool.submit(exit_once, path), 'done')
+        self.assertTrue(check_password('secret', make_password('secret')))
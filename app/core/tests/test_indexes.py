@@ -0,0 +1,140 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+
+from core.models import Tag, Ingredient, Recipe
+
+
+class QueryPlanTestCase(TestCase):
+    """
+    Test case with helpers to check the query plans of querysets.
+
+    On Postgres sequential scans are disabled while the plan is computed so
+    the assertions check that a usable index exists rather than relying on
+    the planner costs of a small test dataset.
+    """
+
+    def explain(self, queryset):
+        """Return the query plan of a queryset"""
+
+        if connection.vendor != 'postgresql':
+            return queryset.explain()
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+            cursor.execute('SET enable_seqscan = off')
+        try:
+            return queryset.explain()
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute('RESET enable_seqscan')
+
+    def assertIndexScan(self, queryset, index=None):
+        """Assert the queryset is answered with an index (optionally named)"""
+
+        plan = self.explain(queryset)
+
+        if connection.vendor == 'postgresql':
+            self.assertIn('Index', plan)
+            self.assertNotIn('Seq Scan', plan)
+        else:
+            self.assertIn('INDEX', plan)
+            self.assertNotIn('SCAN TABLE', plan)
+
+        if index:
+            self.assertIn(index, plan)
+
+
+class UserIndexesTests(QueryPlanTestCase):
+    """Test the per user access patterns are served by indexes"""
+
+    def setUp(self):
+        self.users = [
+            get_user_model().objects.create_user(f'{i}@index.com', '123456')
+            for i in range(3)
+        ]
+
+        for user in self.users:
+            Tag.objects.bulk_create(
+                Tag(user=user, name=f'tag {i}') for i in range(30)
+            )
+            Ingredient.objects.bulk_create(
+                Ingredient(user=user, name=f'ingredient {i}')
+                for i in range(30)
+            )
+            tags = list(Tag.objects.filter(user=user))
+            ingredients = list(Ingredient.objects.filter(user=user))
+            for i in range(10):
+                recipe = Recipe.objects.create(
+                    user=user,
+                    title=f'recipe {i}',
+                    time_minutes=i,
+                    price=i
+                )
+                recipe.tags.add(*tags[i:i + 3])
+                recipe.ingredients.add(*ingredients[i:i + 3])
+
+        self.user = self.users[0]
+
+    def test_tags_listing_uses_index(self):
+        """Test listing the tags of a user by name uses the user/name index"""
+
+        queryset = Tag.objects.filter(user=self.user).order_by('-name', 'id')
+
+        self.assertIndexScan(queryset, 'core_tag_user_name_idx')
+
+    def test_ingredients_listing_uses_index(self):
+        """Test listing the ingredients of a user uses the user/name index"""
+
+        queryset = Ingredient.objects.filter(
+            user=self.user
+        ).order_by('-name', 'id')
+
+        self.assertIndexScan(queryset, 'core_ingredient_user_name_idx')
+
+    def test_recipies_listing_uses_index(self):
+        """Test listing the recipies of a user uses the user/id index"""
+
+        queryset = Recipe.objects.filter(user=self.user).order_by('-id')
+
+        self.assertIndexScan(queryset, 'core_recipe_user_id_idx')
+
+    def test_recipies_by_time_use_index(self):
+        """Test quick recipies are ordered with the user/time index"""
+
+        queryset = Recipe.objects.filter(
+            user=self.user,
+            time_minutes__lte=5
+        ).order_by('time_minutes', 'id')
+
+        self.assertIndexScan(queryset, 'core_recipe_user_time_idx')
+
+    def test_recipies_by_price_use_index(self):
+        """Test cheap recipies are ordered with the user/price index"""
+
+        queryset = Recipe.objects.filter(
+            user=self.user,
+            price__lte=5
+        ).order_by('-price', '-id')
+
+        self.assertIndexScan(queryset, 'core_recipe_user_price_idx')
+
+    def test_tag_recipies_lookup_uses_index(self):
+        """Test finding the recipies of tags uses an index"""
+
+        tags = Tag.objects.filter(user=self.user)[:3]
+        queryset = Recipe.tags.through.objects.filter(
+            tag__in=list(tags)
+        ).values('recipe_id')
+
+        self.assertIndexScan(queryset)
+
+    def test_ingredient_recipies_lookup_uses_index(self):
+        """Test finding the recipies of ingredients uses an index"""
+
+        ingredients = Ingredient.objects.filter(user=self.user)[:3]
+        queryset = Recipe.ingredients.through.objects.filter(
+            ingredient__in=list(ingredients)
+        ).values('recipe_id')
+
+        self.assertIndexScan(queryset)
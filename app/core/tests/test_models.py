@@ -1,4 +1,5 @@
 
+from django.db import IntegrityError
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 from core import models
@@ -79,6 +80,16 @@ class ModelTests(TestCase):
 
         self.assertEqual(str(ingredient), ingredient.name)
 
+    def test_tag_name_unique_per_user_ignoring_case(self):
+        """Test a user can not have two tags differing only in case"""
+
+        user = sample_user()
+        models.Tag.objects.create(user=user, name='Vegan')
+        models.Tag.objects.create(user=sample_user('o@o.com'), name='vegan')
+
+        with self.assertRaises(IntegrityError):
+            models.Tag.objects.create(user=user, name='VEGAN')
+
     def test_recipe_str(self):
         """Test the recipe string representation"""
 
@@ -91,6 +102,13 @@ class ModelTests(TestCase):
 
         self.assertEqual(str(recipe), recipe.title)
 
+    def test_recipe_search_vector_deferred(self):
+        """Test recipe queries leave out the search vector"""
+
+        sql = str(models.Recipe.objects.all().query)
+
+        self.assertNotIn('search_vector', sql)
+
     @patch('uuid.uuid4')
     def test_recipe_img_uuid(self, mock_uuid):
         """Test that image is save in thecorrect location"""
@@ -0,0 +1,108 @@
+import datetime
+import decimal
+import io
+import uuid
+from unittest.mock import patch
+
+from django.core.files.storage import default_storage
+from django.test import SimpleTestCase
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+
+from core.models import Recipe
+from core.parsers import FastJSONParser
+from core.renderers import FastJSONRenderer
+
+
+PAYLOAD = {
+    'id': 1,
+    'title': 'Crème brûlée \u2028 \u2029 ok',
+    'price': decimal.Decimal('5.50'),
+    'created': datetime.datetime(2020, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+    'day': datetime.date(2020, 1, 2),
+    'uuid': uuid.UUID('12345678123456781234567812345678'),
+    'label': gettext_lazy('Recipe'),
+    'tags': [1, 2, 3],
+    'link': None,
+}
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    """Test the fast renderer produces the stdlib renderer output"""
+
+    def test_output_matches_stdlib_renderer(self):
+        """Test decimals, dates and escaped characters render the same"""
+
+        self.assertEqual(
+            FastJSONRenderer().render(PAYLOAD),
+            JSONRenderer().render(PAYLOAD)
+        )
+
+    def test_fallback_without_orjson(self):
+        """Test the stdlib encoder is used when orjson is not installed"""
+
+        with patch('core.renderers.orjson', None):
+            self.assertEqual(
+                FastJSONRenderer().render(PAYLOAD),
+                JSONRenderer().render(PAYLOAD)
+            )
+
+    def test_indent_uses_stdlib_renderer(self):
+        """Test an indent requested in the media type is honoured"""
+
+        rendered = FastJSONRenderer().render(
+            {'id': 1},
+            'application/json; indent=2'
+        )
+
+        self.assertEqual(rendered, b'{\n  "id": 1\n}')
+
+    def test_image_rendered_as_url(self):
+        """Test image fields render as their URL, or null when empty"""
+
+        recipe = Recipe(image='uploads/recipe/image.jpg')
+        empty = Recipe()
+
+        rendered = FastJSONRenderer().render(
+            {'image': recipe.image, 'empty': empty.image}
+        )
+
+        self.assertEqual(
+            rendered,
+            b'{"image":"%s","empty":null}' % default_storage.url(
+                'uploads/recipe/image.jpg'
+            ).encode()
+        )
+
+
+class FastJSONParserTests(SimpleTestCase):
+    """Test the fast JSON parser"""
+
+    def parse(self, content):
+        return FastJSONParser().parse(io.BytesIO(content))
+
+    def test_parse(self):
+        """Test a JSON body is parsed"""
+
+        self.assertEqual(
+            self.parse('{"title": "Crème", "tags": [1, 2]}'.encode()),
+            {'title': 'Crème', 'tags': [1, 2]}
+        )
+
+    def test_invalid_json_rejected(self):
+        """Test malformed bodies and NaN raise a parse error"""
+
+        for content in (b'{"title": ', b'{"price": NaN}'):
+            with self.assertRaises(ParseError):
+                self.parse(content)
+
+    def test_fallback_without_orjson(self):
+        """Test the stdlib parser is used when orjson is not installed"""
+
+        with patch('core.parsers.orjson', None):
+            self.assertEqual(self.parse(b'{"id": 1}'), {'id': 1})
+            with self.assertRaises(ParseError):
+                self.parse(b'{"price": NaN}')
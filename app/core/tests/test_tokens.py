@@ -0,0 +1,158 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import exceptions, status
+from rest_framework.test import APIClient, APIRequestFactory
+
+from core.authentication import LazyUser, SignedTokenAuthentication
+from core.tokens import (
+    ExpiredAccessToken,
+    InvalidAccessToken,
+    issue_access_token,
+    read_access_token,
+)
+
+
+KEYS = [('2', 'new-secret'), ('1', 'old-secret')]
+
+
+@override_settings(ACCESS_TOKEN_TTL=300, ACCESS_TOKEN_KEYS=KEYS)
+class AccessTokenTests(TestCase):
+    """Test the signed access tokens"""
+
+    def test_token_round_trip(self):
+        """Test a token gives back its user id until it expires"""
+
+        token, expires = issue_access_token(7, now=1000)
+
+        self.assertEqual(expires, 1300)
+        self.assertTrue(token.startswith('2.7.1300.'))
+        self.assertEqual(read_access_token(token, now=1299), 7)
+
+        with self.assertRaises(ExpiredAccessToken):
+            read_access_token(token, now=1300)
+
+    def test_tampered_token_rejected(self):
+        """Test changing any part of a token breaks its signature"""
+
+        token, _ = issue_access_token(7, now=1000)
+        version, user_id, expires, signed = token.split('.')
+        other = 'B' if signed.endswith('A') else 'A'
+
+        for forged in (
+            f'{version}.8.{expires}.{signed}',
+            f'{version}.{user_id}.9999.{signed}',
+            f'{version}.{user_id}.{expires}.{signed[:-1]}{other}',
+            f'{user_id}.{expires}.{signed}',
+            'not a token',
+        ):
+            with self.assertRaises(InvalidAccessToken):
+                read_access_token(forged, now=1000)
+
+    def test_key_rotation(self):
+        """Test tokens of older keys verify until their key is removed"""
+
+        with self.settings(ACCESS_TOKEN_KEYS=[('1', 'old-secret')]):
+            token, _ = issue_access_token(7, now=1000)
+
+        self.assertEqual(read_access_token(token, now=1000), 7)
+
+        with self.settings(ACCESS_TOKEN_KEYS=[('2', 'new-secret')]):
+            with self.assertRaises(InvalidAccessToken):
+                read_access_token(token, now=1000)
+
+
+@override_settings(ACCESS_TOKEN_TTL=300, ACCESS_TOKEN_KEYS=KEYS)
+class SignedTokenAuthenticationTests(TestCase):
+    """Test authenticating requests with access tokens"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'auth@auth.com',
+            '123456'
+        )
+        self.token, _ = issue_access_token(self.user.id)
+
+    def authenticate(self, header):
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=header)
+        return SignedTokenAuthentication().authenticate(request)
+
+    def test_authenticate_without_queries(self):
+        """Test a valid token authenticates with no database query"""
+
+        with self.assertNumQueries(0):
+            user, _ = self.authenticate(f'Bearer {self.token}')
+            self.assertEqual(user.id, self.user.id)
+            self.assertEqual(user.pk, self.user.id)
+            self.assertTrue(user.is_authenticated)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(user.email, self.user.email)
+
+    def test_invalid_token_rejected(self):
+        """Test forged tokens fail and other schemes are left alone"""
+
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.authenticate(f'Bearer {self.token}x')
+
+        self.assertIsNone(self.authenticate('Token abc'))
+
+    def test_inactive_user_rejected_on_load(self):
+        """Test the user is checked once the view needs it"""
+
+        self.user.is_active = False
+        self.user.save()
+
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            LazyUser(self.user.id).email
+
+    def test_login_returns_access_token(self):
+        """Test the token endpoint issues an access token usable on the API"""
+
+        client = APIClient()
+        res = client.post(
+            reverse('user:token'),
+            {'email': 'auth@auth.com', 'password': '123456'}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(read_access_token(res.data['access_token']),
+                         self.user.id)
+
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {res.data["access_token"]}'
+        )
+        res = client.get(reverse('user:me'))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['email'], self.user.email)
+
+    def test_recipe_api_with_access_token(self):
+        """Test recipies are created and listed with an access token"""
+
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+
+        res = client.post(reverse('recipe:recipe-list'), {
+            'title': 'Soup',
+            'time_minutes': 10,
+            'price': '2.00',
+        })
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        res = client.get(reverse('recipe:recipe-list'))
+        self.assertEqual(
+            [recipe['title'] for recipe in res.data['results']], ['Soup']
+        )
+
+    def test_access_token_disabled(self):
+        """Test access tokens are neither issued nor accepted when off"""
+
+        with self.settings(ACCESS_TOKEN_TTL=0):
+            res = APIClient().post(
+                reverse('user:token'),
+                {'email': 'auth@auth.com', 'password': '123456'}
+            )
+            self.assertNotIn('access_token', res.data)
+            self.assertIsNone(self.authenticate(f'Bearer {self.token}'))
@@ -0,0 +1,80 @@
+"""
+Signed, short lived access tokens.
+
+An access token is ``<key version>.<user id>.<expiry>.<signature>``, the
+signature being an HMAC-SHA256 of the rest with the key of that version.
+Checking it is pure CPU work: no token row, cache entry or user is read,
+so it stays valid until it expires whatever happens to its user. They are
+only issued when ``ACCESS_TOKEN_TTL`` is set.
+
+Keys come from ``ACCESS_TOKEN_KEYS``, a list of ``(version, secret)`` pairs.
+The first one signs new tokens, the others keep verifying the tokens they
+signed until those expire, which is how keys are rotated.
+"""
+import base64
+import hashlib
+import hmac
+import time
+
+from django.conf import settings
+from django.utils.crypto import constant_time_compare
+
+
+class InvalidAccessToken(Exception):
+    """Raised for malformed, forged or unknown key access tokens"""
+
+
+class ExpiredAccessToken(InvalidAccessToken):
+    """Raised for access tokens past their expiry"""
+
+
+def access_token_ttl():
+    """Return the lifetime of access tokens in seconds, 0 if disabled"""
+    return getattr(settings, 'ACCESS_TOKEN_TTL', 0)
+
+
+def signature(secret, payload):
+    """Return the url safe signature of a payload"""
+
+    digest = hmac.new(
+        secret.encode(),
+        b'access-token:' + payload.encode(),
+        hashlib.sha256
+    ).digest()
+
+    return base64.urlsafe_b64encode(digest).rstrip(b'=').decode()
+
+
+def issue_access_token(user_id, now=None):
+    """Return a new access token of the user and its expiry timestamp"""
+
+    version, secret = settings.ACCESS_TOKEN_KEYS[0]
+    expires = int(now or time.time()) + access_token_ttl()
+    payload = f'{version}.{user_id}.{expires}'
+
+    return f'{payload}.{signature(secret, payload)}', expires
+
+
+def read_access_token(token, now=None):
+    """Return the user id of a valid access token"""
+
+    try:
+        payload, signed = token.rsplit('.', 1)
+        version, user_id, expires = payload.split('.')
+        user_id = int(user_id)
+        expires = int(expires)
+    except ValueError:
+        raise InvalidAccessToken('Malformed access token.')
+
+    secret = dict(settings.ACCESS_TOKEN_KEYS).get(version)
+
+    if secret is None or not constant_time_compare(
+        signature(secret, payload),
+        signed
+    ):
+        raise InvalidAccessToken('Invalid access token signature.')
+
+    if expires <= (now or time.time()):
+        raise ExpiredAccessToken('Access token has expired.')
+
+    return user_id
@@ -0,0 +1,44 @@
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db import connection
+from django.db.models import BooleanField, Case, Q, Value, When
+from django.db.models.functions import Lower
+
+
+def autocomplete(queryset, prefix=None, q=None, limit=10):
+    """
+    Return the id and name of the objects matching a partial name.
+
+    ``prefix`` matches the start of the name, served on PostgreSQL by the
+    ``(user_id, lower(name) text_pattern_ops)`` index. ``q`` also accepts
+    misspellings through the pg_trgm GIN index and ranks names starting
+    with it first, then by similarity. Other databases fall back to
+    substring matches.
+    """
+
+    queryset = queryset.annotate(lower_name=Lower('name'))
+
+    if prefix is not None:
+        queryset = queryset.filter(
+            lower_name__startswith=prefix.lower()
+        ).order_by('lower_name', 'id')
+
+    else:
+        term = q.lower()
+        starts = Q(lower_name__startswith=term)
+
+        if connection.vendor == 'postgresql':
+            queryset = queryset.filter(
+                starts | Q(lower_name__trigram_similar=term)
+            )
+            similarity = TrigramSimilarity('lower_name', term).desc()
+        else:
+            queryset = queryset.filter(lower_name__contains=term)
+            similarity = 'lower_name'
+
+        queryset = queryset.annotate(starts=Case(
+            When(starts, then=Value(True)),
+            default=Value(False),
+            output_field=BooleanField()
+        )).order_by('-starts', similarity, 'id')
+
+    return list(queryset.values('id', 'name')[:limit])
@@ -0,0 +1,256 @@
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Case, Value, When
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from core.models import CollectionVersion, Recipe
+from recipe.cache import recipe_detail_cache
+from recipe.serializers import RecipeSerializer
+
+
+# Many to many relations of a recipe written through their through tables
+RELATIONS = ('tags', 'ingredients')
+
+BATCH_SIZE = 100
+
+
+def bulk_update(objs, fields, batch_size=BATCH_SIZE):
+    """Update the fields of many objects with one UPDATE per batch"""
+
+    model = type(objs[0])
+
+    for start in range(0, len(objs), batch_size):
+        batch = objs[start:start + batch_size]
+        model.objects.filter(pk__in=[obj.pk for obj in batch]).update(**{
+            name: Case(
+                *[When(pk=obj.pk, then=Value(getattr(obj, name)))
+                  for obj in batch],
+                output_field=model._meta.get_field(name)
+            )
+            for name in fields
+        })
+
+
+def upsert_by_name(model, user, names):
+    """
+    Return a name -> id map of the user's objects, creating missing ones.
+
+    Names are matched ignoring case, existing rows are found with a single
+    query and the missing ones are inserted with one bulk_create.
+    """
+
+    wanted = {}
+    for name in names:
+        wanted.setdefault(name.lower(), name)
+
+    def existing():
+        rows = model.objects.annotate(
+            lower_name=Lower('name')
+        ).filter(
+            user_id=user.id,
+            lower_name__in=list(wanted)
+        ).values_list('name', 'id')
+        return {name.lower(): iD for name, iD in rows}
+
+    ids = existing()
+    missing = [
+        model(user_id=user.id, name=name)
+        for lower_name, name in wanted.items() if lower_name not in ids
+    ]
+
+    if missing:
+        try:
+            with transaction.atomic():
+                # bulk_create does not send pre_save
+                version = CollectionVersion.objects.bump(user.id) or 0
+                for obj in missing:
+                    obj.sync_version = version
+
+                model.objects.bulk_create(missing, batch_size=BATCH_SIZE)
+        except IntegrityError:
+            # Another request created some of the names in the meantime
+            missing = []
+            for lower_name, name in wanted.items():
+                if lower_name not in ids:
+                    obj, _ = model.objects.get_or_create(
+                        user_id=user.id,
+                        name__iexact=name,
+                        defaults={'name': name}
+                    )
+                    missing.append(obj)
+
+        if all(obj.id for obj in missing):
+            ids.update((obj.name.lower(), obj.id) for obj in missing)
+        else:
+            ids = existing()
+
+    return {name: ids[name.lower()] for name in names}
+
+
+class RecipeBatch:
+    """
+    Validate and write a batch of recipe creates, updates and deletes.
+
+    Everything is validated before anything is written, then all the changes
+    are saved in a single transaction with a few statements per operation
+    type instead of a few per recipe.
+    """
+
+    def __init__(self, user, data, context=None):
+        self.user = user
+        self.creates = data.get('create', [])
+        self.updates = data.get('update', [])
+        self.deletes = data.get('delete', [])
+        self.context = context
+        self.errors = {}
+        self.updated = []
+
+    def is_valid(self):
+        """Validate the updates and deletes against the user's recipies"""
+
+        ids = [item.get('id') for item in self.updates] + self.deletes
+        recipies = Recipe.objects.filter(user_id=self.user.id, id__in=[
+            iD for iD in ids if isinstance(iD, int)
+        ]).in_bulk()
+
+        update_errors = []
+        for item in self.updates:
+            recipe = recipies.get(item.get('id'))
+            if recipe is None:
+                update_errors.append({'id': ['Recipe not found.']})
+                continue
+
+            serializer = RecipeSerializer(
+                recipe,
+                data=item,
+                partial=True,
+                context=self.context
+            )
+            if serializer.is_valid():
+                update_errors.append({})
+                self.updated.append((recipe, serializer.validated_data))
+            else:
+                update_errors.append(serializer.errors)
+
+        delete_errors = [
+            {} if iD in recipies else {'id': ['Recipe not found.']}
+            for iD in self.deletes
+        ]
+
+        if any(update_errors):
+            self.errors['update'] = update_errors
+        if any(delete_errors):
+            self.errors['delete'] = delete_errors
+
+        return not self.errors
+
+    def save(self):
+        """Write the batch and return the id of each item"""
+
+        with transaction.atomic():
+            # Bulk writes do not send pre_save or m2m_changed
+            self.version = CollectionVersion.objects.bump(self.user.id) or 0
+            created = self._create()
+            self._update()
+            Recipe.objects.filter(
+                user_id=self.user.id,
+                id__in=self.deletes
+            ).delete()
+
+        recipe_detail_cache.invalidate(
+            [recipe.id for recipe in created] +
+            [recipe.id for recipe, _ in self.updated]
+        )
+
+        return {
+            'create': [{'id': recipe.id} for recipe in created],
+            'update': [{'id': recipe.id} for recipe, _ in self.updated],
+            'delete': [{'id': iD} for iD in self.deletes],
+        }
+
+    def _create(self):
+        """Insert the new recipies and their tags and ingredients"""
+
+        recipies = []
+        relations = []
+        for attrs in self.creates:
+            attrs = dict(attrs)
+            relations.append({
+                name: attrs.pop(name) for name in RELATIONS if name in attrs
+            })
+            recipies.append(Recipe(
+                user_id=self.user.id,
+                sync_version=self.version,
+                **attrs
+            ))
+
+        if connection.features.can_return_ids_from_bulk_insert:
+            Recipe.objects.bulk_create(recipies, batch_size=BATCH_SIZE)
+        else:
+            for recipe in recipies:
+                recipe.save(sync_version=self.version)
+
+        self._set_relations(zip(recipies, relations))
+
+        return recipies
+
+    def _update(self):
+        """Update the changed fields and relations of existing recipies"""
+
+        if not self.updated:
+            return
+
+        # Relation changes mark the recipe as changed too
+        now = timezone.now()
+        fields = {'sync_version', 'updated_at'}
+        relations = []
+        for recipe, attrs in self.updated:
+            recipe.sync_version = self.version
+            recipe.updated_at = now
+            attrs = dict(attrs)
+            relations.append({
+                name: attrs.pop(name) for name in RELATIONS if name in attrs
+            })
+            for name, value in attrs.items():
+                setattr(recipe, name, value)
+            fields.update(attrs)
+
+        bulk_update([recipe for recipe, _ in self.updated], fields)
+
+        self._set_relations(
+            (recipe, related)
+            for (recipe, _), related in zip(self.updated, relations)
+        )
+
+    def _set_relations(self, items):
+        """Replace the tags and ingredients given for each recipe"""
+
+        items = list(items)
+
+        for name in RELATIONS:
+            field = Recipe._meta.get_field(name)
+            through = field.remote_field.through
+            source = field.m2m_field_name()
+            target = field.m2m_reverse_field_name()
+            changed = [
+                (recipe, related[name])
+                for recipe, related in items if name in related
+            ]
+
+            if not changed:
+                continue
+
+            through.objects.filter(**{
+                f'{source}__in': [recipe.id for recipe, _ in changed]
+            }).delete()
+            through.objects.bulk_create(
+                [
+                    through(**{
+                        f'{source}_id': recipe.id,
+                        f'{target}_id': obj.id
+                    })
+                    for recipe, objs in changed
+                    for obj in set(objs)
+                ],
+                batch_size=BATCH_SIZE
+            )
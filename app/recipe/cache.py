@@ -0,0 +1,155 @@
+import threading
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from core.authentication import CacheStats
+
+
+class LRUCache:
+    """Thread safe in-process cache keeping the most recently used items"""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            try:
+                self._items.move_to_end(key)
+            except KeyError:
+                return None
+            return self._items[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+
+class RecipeDetailCache:
+    """
+    Two tier cache of the rendered recipe detail responses.
+
+    Entries are keyed by the owner, the recipe and a version token kept in
+    the shared cache. Invalidating a recipe drops its token, so stale
+    entries of every process using that cache stop matching at once and age
+    out of the LRU and the shared cache on their own. With a per-process
+    cache other processes would keep their token, hence the cache is only
+    used when ``RECIPE_DETAIL_CACHE_ENABLED`` is set.
+    """
+
+    def __init__(self):
+        self.local = LRUCache(
+            getattr(settings, 'RECIPE_DETAIL_CACHE_LRU_SIZE', 1000)
+        )
+        self.local_stats = CacheStats()
+        self.shared_stats = CacheStats()
+
+    @property
+    def enabled(self):
+        return getattr(settings, 'RECIPE_DETAIL_CACHE_ENABLED', False)
+
+    @property
+    def shared(self):
+        return caches[
+            getattr(settings, 'RECIPE_DETAIL_CACHE_ALIAS', 'default')
+        ]
+
+    @property
+    def timeout(self):
+        return getattr(settings, 'RECIPE_DETAIL_CACHE_TIMEOUT', 300)
+
+    def _version_key(self, recipe_id):
+        return f'recipe-detail-version:{recipe_id}'
+
+    def _version(self, recipe_id):
+        """Return the current version token of a recipe"""
+
+        key = self._version_key(recipe_id)
+        version = self.shared.get(key)
+
+        if version is None:
+            self.shared.add(key, uuid.uuid4().hex, self.timeout)
+            version = self.shared.get(key)
+
+        return version
+
+    def _key(self, user_id, recipe_id, version):
+        return f'recipe-detail:{user_id}:{recipe_id}:{version}'
+
+    def get(self, user_id, recipe_id):
+        """Return the cached response body and the key to store a new one"""
+
+        key = self._key(user_id, recipe_id, self._version(recipe_id))
+
+        content = self.local.get(key)
+        if content is not None:
+            self.local_stats.hit()
+            return content, key
+        self.local_stats.miss()
+
+        content = self.shared.get(key)
+        if content is not None:
+            self.shared_stats.hit()
+            self.local.set(key, content)
+            return content, key
+        self.shared_stats.miss()
+
+        return None, key
+
+    def set(self, key, content):
+        """Store a rendered response body in both tiers"""
+
+        self.local.set(key, content)
+        self.shared.set(key, content, self.timeout)
+
+    def invalidate(self, recipe_ids):
+        """Drop the cached responses of the given recipies on commit"""
+
+        keys = [self._version_key(recipe_id) for recipe_id in recipe_ids]
+
+        # Until then other requests read the old rows and could cache them
+        # again under a fresh version
+        transaction.on_commit(lambda: self.shared.delete_many(keys))
+
+    def clear(self):
+        """Empty the local tier and reset the stats"""
+
+        self.local.clear()
+        self.local_stats.reset()
+        self.shared_stats.reset()
+
+    @property
+    def stats(self):
+        """Return the hit counters of both tiers"""
+
+        return {
+            'local': {
+                'hits': self.local_stats.hits,
+                'misses': self.local_stats.misses,
+                'hit_rate': self.local_stats.hit_rate,
+                'size': len(self.local),
+            },
+            'shared': {
+                'hits': self.shared_stats.hits,
+                'misses': self.shared_stats.misses,
+                'hit_rate': self.shared_stats.hit_rate,
+            },
+        }
+
+
+recipe_detail_cache = RecipeDetailCache()
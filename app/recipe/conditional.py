@@ -0,0 +1,55 @@
+import hashlib
+from calendar import timegm
+
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+    quote_etag,
+)
+from django.utils.http import http_date
+
+from core.models import CollectionVersion
+
+
+class ConditionalListMixin:
+    """
+    Answer list requests of unchanged collections with 304 Not Modified.
+
+    The ETag is derived from the collection version of the user instead of
+    the response body, so a revalidation costs one primary key lookup and
+    never touches the recipe, tag or ingredient tables.
+    """
+
+    def list(self, request, *args, **kwargs):
+        version = CollectionVersion.objects.current(request.user.id)
+        etag = self.get_list_etag(request, version)
+        last_modified = timegm(version.modified.utctimetuple())
+
+        response = get_conditional_response(
+            request,
+            etag=etag,
+            last_modified=last_modified
+        )
+
+        if response is None:
+            response = super().list(request, *args, **kwargs)
+
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ('Authorization',))
+
+        return response
+
+    def get_list_etag(self, request, version):
+        """Return the ETag of a list response for a collection version"""
+
+        key = ':'.join((
+            str(request.user.id),
+            str(version.version),
+            request.get_full_path(),
+            request.accepted_media_type or '',
+        ))
+
+        return quote_etag(hashlib.md5(key.encode()).hexdigest())
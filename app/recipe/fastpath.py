@@ -0,0 +1,194 @@
+"""
+Read path building list responses straight from ``.values()`` rows.
+
+Instantiating a ModelSerializer per object and walking its fields is the
+main CPU cost of large list pages. The output of a serializer is described
+once, by its fields, and then filled from plain dicts.
+"""
+from functools import lru_cache
+
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.contrib.postgres.fields import ArrayField
+from django.db import connection
+from django.db.models import IntegerField, OuterRef, Subquery
+
+from rest_framework.relations import ManyRelatedField
+from rest_framework.response import Response
+from rest_framework.serializers import ListSerializer
+
+
+class ValuesSerializer:
+    """Represent the rows of a queryset like a read-only serializer"""
+
+    def __init__(self, serializer):
+        self.columns = []
+        # Relation name -> ValuesSerializer of nested objects, or None when
+        # only the ids are rendered
+        self.relations = {}
+
+        for name, field in serializer.fields.items():
+            if isinstance(field, ManyRelatedField):
+                self.relations[name] = None
+                self.columns.append((name, None))
+            elif isinstance(field, ListSerializer):
+                self.relations[name] = ValuesSerializer(field.child)
+                self.columns.append((name, None))
+            else:
+                self.columns.append((name, field.to_representation))
+
+    @property
+    def values(self):
+        """Return the names of the columns to fetch"""
+
+        values = [name for name, convert in self.columns if convert]
+
+        # The id is needed to attach relations and to paginate
+        if 'id' not in values:
+            values.append('id')
+
+        return values
+
+    def to_representation(self, rows):
+        """Return the output dicts of rows with their relations set"""
+
+        data = []
+
+        for row in rows:
+            item = {}
+            for name, convert in self.columns:
+                value = row[name]
+                if convert is not None and value is not None:
+                    value = convert(value)
+                item[name] = value
+            data.append(item)
+
+        return data
+
+
+def relation_ids(model, name):
+    """Return a subquery of the array of ids linked to each row"""
+
+    field = model._meta.get_field(name)
+    source = field.m2m_field_name()
+    target = field.m2m_reverse_field_name()
+    links = field.remote_field.through.objects.filter(**{
+        source: OuterRef('pk')
+    }).order_by().values(source).annotate(
+        ids=ArrayAgg(f'{target}_id')
+    ).values('ids')
+
+    return Subquery(links, output_field=ArrayField(IntegerField()))
+
+
+def aggregate_relations(queryset, relations):
+    """
+    Annotate the ids of each many to many relation as an array.
+
+    Only PostgreSQL has ArrayAgg, other databases and nested relations get
+    their rows with ``fetch_relations`` once the page is known. Each
+    relation is aggregated in its own subquery: joining them all in one
+    GROUP BY would multiply the rows of every relation by the others.
+    """
+
+    if connection.vendor != 'postgresql':
+        return queryset
+
+    # Annotations cannot reuse the name of the relation field
+    return queryset.annotate(**{
+        f'{name}_ids': relation_ids(queryset.model, name)
+        for name, nested in relations.items() if nested is None
+    })
+
+
+def fetch_relations(rows, model, relations):
+    """Set the related ids, or nested objects, of the rows ordered by id"""
+
+    for name, nested in relations.items():
+        if nested is None and connection.vendor == 'postgresql':
+            for row in rows:
+                row[name] = sorted(row.pop(f'{name}_ids') or [])
+            continue
+
+        field = model._meta.get_field(name)
+        source = field.m2m_field_name()
+        target = field.m2m_reverse_field_name()
+        related = {row['id']: [] for row in rows}
+
+        # Nested objects are read through the join in the same query
+        columns = nested.values if nested else ['id']
+        links = field.remote_field.through.objects.filter(**{
+            f'{source}_id__in': list(related)
+        }).order_by(f'{target}_id').values_list(
+            f'{source}_id',
+            *[f'{target}__{column}' for column in columns]
+        )
+
+        for row_id, *values in links:
+            related[row_id].append(
+                dict(zip(columns, values)) if nested else values[0]
+            )
+
+        for row in rows:
+            row[name] = (
+                nested.to_representation(related[row['id']]) if nested
+                else related[row['id']]
+            )
+
+    return rows
+
+
+@lru_cache(maxsize=128)
+def cached_values_serializer(serializer_class, options):
+    """Return the ValuesSerializer of a serializer class and its options"""
+    return ValuesSerializer(serializer_class(**dict(options)))
+
+
+class ValuesListMixin:
+    """List objects from ``.values()`` rows instead of model instances"""
+
+    def get_fieldset(self):
+        """Return the serializer options narrowing the fields to render"""
+        return {}
+
+    def get_values_serializer(self):
+        """Return the ValuesSerializer of the current serializer"""
+
+        return cached_values_serializer(
+            self.get_serializer_class(),
+            tuple(sorted(self.get_fieldset().items()))
+        )
+
+    def list(self, request, *args, **kwargs):
+        values_serializer = self.get_values_serializer()
+        relations = values_serializer.relations
+
+        queryset = self.filter_queryset(self.get_queryset())
+
+        # The cursor of the page is read from the ordering columns
+        values = values_serializer.values
+        get_ordering = getattr(self.paginator, 'get_ordering', None)
+        if get_ordering is not None:
+            ordering = get_ordering(request, queryset, self)
+            if isinstance(ordering, str):
+                ordering = (ordering,)
+            values = list(dict.fromkeys(
+                values + [name.lstrip('-') for name in ordering]
+            ))
+
+        queryset = aggregate_relations(
+            queryset.prefetch_related(None).values(*values),
+            relations
+        )
+
+        page = self.paginate_queryset(queryset)
+        rows = list(queryset) if page is None else page
+
+        if relations:
+            fetch_relations(rows, queryset.model, relations)
+
+        data = values_serializer.to_representation(rows)
+
+        if page is None:
+            return Response(data)
+
+        return self.get_paginated_response(data)
@@ -0,0 +1,308 @@
+import decimal
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import (
+    Case,
+    Count,
+    Exists,
+    F,
+    IntegerField,
+    OuterRef,
+    Q,
+    Value,
+    When,
+)
+from django.db.models.functions import Cast
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from core.models import Recipe
+
+
+class RecipeRelationFilter(BaseFilterBackend):
+    """
+    Filter recipies by the ids of their tags and ingredients.
+
+    ``?tags=1,2`` returns the recipies with any of the tags and
+    ``?tags=1,2&match=all`` the ones with all of them. Tags and ingredients
+    filters are combined with AND. Each recipe is returned only once.
+    """
+
+    relations = ('tags', 'ingredients')
+    match_choices = ('any', 'all')
+    max_ids = 50
+
+    def filter_queryset(self, request, queryset, view):
+        match = request.query_params.get('match', 'any')
+
+        if match not in self.match_choices:
+            raise ValidationError({
+                'match': _('Must be one of: any, all.')
+            })
+
+        for relation in self.relations:
+            value = request.query_params.get(relation)
+
+            if value:
+                ids = self._params_to_ints(relation, value)
+                queryset = getattr(self, f'_match_{match}')(
+                    queryset, relation, ids
+                )
+
+        return queryset
+
+    def _params_to_ints(self, relation, value):
+        """Convert a comma separated string of ids in a set of integers"""
+
+        try:
+            ids = {int(iD) for iD in value.split(',')}
+        except ValueError:
+            raise ValidationError({
+                relation: _('Must be a comma separated list of ids.')
+            })
+
+        if len(ids) > self.max_ids:
+            raise ValidationError({
+                relation: _('At most %(max)d ids are allowed.') % {
+                    'max': self.max_ids
+                }
+            })
+
+        return ids
+
+    def _links(self, relation, ids):
+        """Return the through table rows linking recipies to the ids"""
+
+        field = self._field(relation)
+
+        return field.remote_field.through.objects.filter(**{
+            f'{field.m2m_reverse_field_name()}__in': ids
+        })
+
+    def _field(self, relation):
+        """Return the many to many field of a relation"""
+        return Recipe._meta.get_field(relation)
+
+    def _match_any(self, queryset, relation, ids):
+        """Keep recipies linked to at least one of the ids"""
+
+        links = self._links(relation, ids).filter(**{
+            self._field(relation).m2m_field_name(): OuterRef('pk')
+        })
+        matched = f'{relation}_matched'
+
+        return queryset.annotate(
+            **{matched: Exists(links)}
+        ).filter(**{matched: True})
+
+    def _match_all(self, queryset, relation, ids):
+        """Keep recipies linked to every one of the ids"""
+
+        recipe = self._field(relation).m2m_field_name()
+        matching = self._links(relation, ids).values(recipe).annotate(
+            matched=Count(recipe)
+        ).filter(matched=len(ids)).values(recipe)
+
+        return queryset.filter(pk__in=matching)
+
+
+class PrefixSearchQuery(SearchQuery):
+    """Full text query matching words starting with each of the terms"""
+
+    def __init__(self, terms, config):
+        super().__init__(
+            ' & '.join(f'{term}:*' for term in terms),
+            config=config
+        )
+
+    def as_sql(self, compiler, connection):
+        config_sql, config_params = compiler.compile(self.config)
+
+        return (
+            f'to_tsquery({config_sql}::regconfig, %s)',
+            config_params + [self.value]
+        )
+
+
+class RecipeSearchFilter(BaseFilterBackend):
+    """
+    Search recipies by title, tag and ingredient names with ``?q=``.
+
+    Every term must match the start of a word, so partial input works for
+    type-ahead. Matches are annotated with ``search_rank``, higher for title
+    matches, that RecipeOrderingFilter orders by. On
+    PostgreSQL the stored search vector and its GIN index are used, other
+    databases fall back to substring matches.
+    """
+
+    search_param = 'q'
+    search_config = 'english'
+    max_terms = 10
+
+    def get_terms(self, request):
+        """Return the words of the search parameter"""
+        return re.findall(
+            r'\w+',
+            request.query_params.get(self.search_param, '')
+        )[:self.max_terms]
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_terms(request)
+
+        if not terms:
+            return queryset
+
+        if connection.vendor == 'postgresql':
+            return self._search_vector(queryset, terms)
+
+        return self._search_substrings(queryset, terms)
+
+    def _search_vector(self, queryset, terms):
+        """Match and rank recipies with the stored search vector"""
+
+        query = PrefixSearchQuery(terms, self.search_config)
+
+        # An integer rank keeps cursor positions exact
+        return queryset.filter(search_vector=query).annotate(
+            search_rank=Cast(
+                SearchRank(F('search_vector'), query) * Value(1000000),
+                IntegerField()
+            )
+        )
+
+    def _search_substrings(self, queryset, terms):
+        """Match recipies by substrings, ranking title matches first"""
+
+        title = Q()
+        for i, term in enumerate(terms):
+            matched = f'search_{i}_matched'
+            related = Q()
+
+            for relation in ('tags', 'ingredients'):
+                field = Recipe._meta.get_field(relation)
+                links = field.remote_field.through.objects.filter(**{
+                    field.m2m_field_name(): OuterRef('pk'),
+                    f'{field.m2m_reverse_field_name()}__name__icontains': term
+                })
+                queryset = queryset.annotate(
+                    **{f'{matched}_{relation}': Exists(links)}
+                )
+                related |= Q(**{f'{matched}_{relation}': True})
+
+            queryset = queryset.filter(Q(title__icontains=term) | related)
+            title &= Q(title__icontains=term)
+
+        return queryset.annotate(search_rank=Case(
+            When(title, then=Value(2)),
+            default=Value(1),
+            output_field=IntegerField()
+        ))
+
+
+class RecipeRangeFilter(BaseFilterBackend):
+    """
+    Filter recipies by ``?max_time=`` minutes and ``?min_price=`` and
+    ``?max_price=`` prices, all inclusive.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+        lookups = {}
+
+        if params.get('max_time'):
+            lookups['time_minutes__lte'] = self._to_int(
+                'max_time',
+                params['max_time']
+            )
+
+        for param, lookup in (
+            ('min_price', 'price__gte'),
+            ('max_price', 'price__lte'),
+        ):
+            if params.get(param):
+                lookups[lookup] = self._to_decimal(param, params[param])
+
+        return queryset.filter(**lookups)
+
+    def _to_int(self, param, value):
+        """Convert a parameter to a positive integer"""
+
+        try:
+            value = int(value)
+        except ValueError:
+            value = -1
+
+        if value < 0:
+            raise ValidationError({
+                param: _('Must be a positive integer.')
+            })
+
+        return value
+
+    def _to_decimal(self, param, value):
+        """Convert a parameter to a finite decimal"""
+
+        try:
+            value = decimal.Decimal(value)
+        except decimal.InvalidOperation:
+            value = None
+
+        if value is None or not value.is_finite():
+            raise ValidationError({
+                param: _('Must be a number.')
+            })
+
+        return value
+
+
+class RecipeOrderingFilter(BaseFilterBackend):
+    """
+    Order recipies with ``?ordering=``, by search rank or newest first.
+
+    The cursor pagination reads the ordering from ``get_ordering``. Each
+    choice ends with the id in the same direction: the cursor keeps both
+    values, which makes the position unique, and the pages are read from
+    the ``(user, field, id)`` indexes.
+    """
+
+    ordering_param = 'ordering'
+    ordering_choices = {
+        'time_minutes': ('time_minutes', 'id'),
+        '-time_minutes': ('-time_minutes', '-id'),
+        'price': ('price', 'id'),
+        '-price': ('-price', '-id'),
+        'id': ('id',),
+        '-id': ('-id',),
+    }
+    search_ordering = ('-search_rank', '-id')
+
+    def get_ordering(self, request, queryset, view):
+        """Return the validated ordering of the request"""
+
+        value = request.query_params.get(self.ordering_param)
+
+        if value:
+            if value not in self.ordering_choices:
+                raise ValidationError({
+                    self.ordering_param: _('Must be one of: %(choices)s.') % {
+                        'choices': ', '.join(self.ordering_choices)
+                    }
+                })
+            return self.ordering_choices[value]
+
+        if RecipeSearchFilter().get_terms(request):
+            return self.search_ordering
+
+        return view.paginator.ordering
+
+    def filter_queryset(self, request, queryset, view):
+        ordering = self.get_ordering(request, queryset, view)
+
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+
+        return queryset.order_by(*ordering)
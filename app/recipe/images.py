@@ -0,0 +1,192 @@
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+
+from core.models import (
+    Recipe,
+    RecipeImageRendition,
+    recipe_rendition_file_path,
+)
+
+
+logger = logging.getLogger(__name__)
+
+# Name and maximum side in pixels of each rendition, largest first so each
+# one can be resized from the previous one
+RENDITIONS = (
+    ('full', 2048),
+    ('medium', 800),
+    ('thumb', 200),
+)
+
+FORMAT_EXTENSIONS = {
+    'JPEG': 'jpg',
+    'WEBP': 'webp',
+}
+
+# Transpose needed for each EXIF orientation value
+EXIF_ORIENTATION = 0x0112
+ORIENTATION_TRANSPOSE = {
+    2: Image.FLIP_LEFT_RIGHT,
+    3: Image.ROTATE_180,
+    4: Image.FLIP_TOP_BOTTOM,
+    5: Image.TRANSPOSE,
+    6: Image.ROTATE_270,
+    7: Image.TRANSVERSE,
+    8: Image.ROTATE_90,
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Return the pool of workers processing recipe images"""
+
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.RECIPE_IMAGE_WORKERS,
+                thread_name_prefix='recipe-image'
+            )
+
+    return _executor
+
+
+def schedule_processing(recipe):
+    """Process the image of a recipe once the current transaction commits"""
+
+    args = (recipe.pk, recipe.image.name)
+
+    if settings.RECIPE_IMAGE_PROCESSING == 'sync':
+        process_recipe_image(*args)
+        return
+
+    transaction.on_commit(
+        lambda: get_executor().submit(_process_in_worker, *args)
+    )
+
+
+def _process_in_worker(*args):
+    """Process an image releasing the worker's broken or expired connection"""
+
+    try:
+        process_recipe_image(*args)
+    finally:
+        close_old_connections()
+
+
+def process_recipe_image(recipe_id, image_name):
+    """
+    Create the renditions of an uploaded recipe image.
+
+    The full rendition replaces the uploaded file. If another image was
+    uploaded to the recipe in the meantime the work is discarded.
+    """
+
+    try:
+        renditions = _render(image_name)
+    except Exception:
+        logger.exception('Processing recipe image %s failed', image_name)
+        Recipe.objects.filter(pk=recipe_id, image=image_name).update(
+            image_status=Recipe.IMAGE_FAILED
+        )
+        return
+
+    full = next(r for r in renditions if r.name == 'full')
+
+    with transaction.atomic():
+        updated = Recipe.objects.filter(
+            pk=recipe_id,
+            image=image_name
+        ).update(image=full.image.name, image_status=Recipe.IMAGE_READY)
+
+        if updated:
+            previous = list(
+                RecipeImageRendition.objects.filter(recipe_id=recipe_id)
+            )
+            RecipeImageRendition.objects.filter(recipe_id=recipe_id).delete()
+            for rendition in renditions:
+                rendition.recipe_id = recipe_id
+            RecipeImageRendition.objects.bulk_create(renditions)
+
+    if not updated:
+        _delete_files(rendition.image.name for rendition in renditions)
+        return
+
+    _delete_files(
+        [image_name] +
+        [rendition.image.name for rendition in previous
+         if rendition.image.name != image_name]
+    )
+
+
+def _render(image_name):
+    """Decode an image once and write a rendition for each size"""
+
+    image_format = settings.RECIPE_IMAGE_FORMAT
+    extension = FORMAT_EXTENSIONS[image_format]
+
+    with default_storage.open(image_name) as image_file:
+        image = Image.open(image_file)
+        image = _apply_orientation(image)
+        mode = 'RGBA' if (
+            image_format == 'WEBP' and 'A' in image.getbands()
+        ) else 'RGB'
+        image = image.convert(mode)
+
+    renditions = []
+    for name, size in RENDITIONS:
+        image.thumbnail((size, size), Image.LANCZOS)
+
+        # Saving a new image without passing exif strips the metadata
+        content = io.BytesIO()
+        image.save(content, format=image_format, quality=85)
+
+        rendition = RecipeImageRendition(
+            name=name,
+            width=image.width,
+            height=image.height
+        )
+        path = recipe_rendition_file_path(rendition, f'{name}.{extension}')
+        rendition.image.name = default_storage.save(
+            path,
+            ContentFile(content.getvalue())
+        )
+        renditions.append(rendition)
+
+    return renditions
+
+
+def _apply_orientation(image):
+    """Rotate the image as told by its EXIF orientation"""
+
+    get_exif = getattr(image, '_getexif', None)
+    exif = get_exif() if get_exif else None
+    transpose = ORIENTATION_TRANSPOSE.get((exif or {}).get(EXIF_ORIENTATION))
+
+    if transpose is None:
+        return image
+
+    return image.transpose(transpose)
+
+
+def _delete_files(names):
+    """Delete files from the storage ignoring the missing ones"""
+
+    for name in names:
+        try:
+            default_storage.delete(name)
+        except OSError:
+            logger.warning('Could not delete %s', os.path.basename(name))
@@ -0,0 +1,97 @@
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+RANGE_RE = re.compile(r'^bytes=(?P<start>\d*)-(?P<end>\d*)$')
+
+
+def send_media_file(request, name):
+    """
+    Return a response sending a media file through the configured backend.
+
+    With the 'nginx' backend the transfer is handed to the front proxy with
+    X-Accel-Redirect and with 'sendfile' with X-Sendfile, so the worker only
+    sends headers. The proxies answer Range requests themselves. The 'django'
+    backend streams the file from Python and is meant for development.
+    """
+
+    path = default_storage.path(name)
+
+    try:
+        stat = os.stat(path)
+    except OSError:
+        raise Http404
+
+    etag = quote_etag(f'{int(stat.st_mtime)}-{stat.st_size:x}')
+    not_modified = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(stat.st_mtime)
+    )
+    if not_modified is not None:
+        return not_modified
+
+    backend = settings.MEDIA_SERVE_BACKEND
+
+    if backend == 'nginx':
+        response = HttpResponse()
+        response['X-Accel-Redirect'] = (
+            settings.MEDIA_ACCEL_REDIRECT_PREFIX + name
+        )
+    elif backend == 'sendfile':
+        response = HttpResponse()
+        response['X-Sendfile'] = os.path.abspath(path)
+    else:
+        response = _file_response(request, path, stat.st_size)
+
+    content_type, encoding = mimetypes.guess_type(path)
+    response['Content-Type'] = content_type or 'application/octet-stream'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Accept-Ranges'] = 'bytes'
+    # Media is private to the owner of the recipe
+    response['Cache-Control'] = 'private, max-age=86400'
+
+    return response
+
+
+def _file_response(request, path, size):
+    """Stream the file, or the single byte range requested, from Python"""
+
+    match = RANGE_RE.match(request.META.get('HTTP_RANGE', ''))
+
+    if not match or not (match.group('start') or match.group('end')):
+        response = FileResponse(open(path, 'rb'))
+        response['Content-Length'] = size
+        return response
+
+    start, end = match.group('start'), match.group('end')
+    if start:
+        start = int(start)
+        end = min(int(end), size - 1) if end else size - 1
+    else:
+        # A suffix range asks for the last bytes of the file
+        start = max(size - int(end), 0)
+        end = size - 1
+
+    if start > end or start >= size:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    with open(path, 'rb') as media_file:
+        media_file.seek(start)
+        response = HttpResponse(
+            media_file.read(end - start + 1),
+            status=206
+        )
+
+    response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return response
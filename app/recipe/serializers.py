@@ -1,9 +1,40 @@
 
 from rest_framework import serializers
-from core.models import Tag, Ingredient, Recipe
+from core.models import Tag, Ingredient, Recipe, RecipeImageRendition
 
 
-class TagSerializer(serializers.ModelSerializer):
+class UniqueNameMixin:
+    """Reject names the user already has, ignoring case"""
+
+    def validate_name(self, value):
+        request = self.context.get('request')
+        model = self.Meta.model
+
+        if request and model.objects.filter(
+            user_id=request.user.id,
+            name__iexact=value
+        ).exclude(pk=getattr(self.instance, 'pk', None)).exists():
+            raise serializers.ValidationError(
+                f'{model._meta.verbose_name.capitalize()} already exists.'
+            )
+
+        return value
+
+
+class UserPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Primary key field accepting only the objects of the request user"""
+
+    def get_queryset(self):
+        request = self.context.get('request')
+        queryset = super().get_queryset()
+
+        if request is None:
+            return queryset.none()
+
+        return queryset.filter(user_id=request.user.id)
+
+
+class TagSerializer(UniqueNameMixin, serializers.ModelSerializer):
     """
     Serializer for tag model
     """
@@ -14,7 +45,7 @@ class TagSerializer(serializers.ModelSerializer):
         read_only_fields = ('id',)
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(UniqueNameMixin, serializers.ModelSerializer):
     """Serializer for ingredient"""
 
     class Meta:
@@ -24,15 +55,80 @@ class IngredientSerializer(serializers.ModelSerializer):
         read_only_fields = ('id',)
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class TagCountSerializer(TagSerializer):
+    """Serializer for tag with the number of recipies using it"""
+
+    assigned_count = serializers.IntegerField(read_only=True)
+
+    class Meta(TagSerializer.Meta):
+        fields = TagSerializer.Meta.fields + ['assigned_count']
+
+
+class IngredientCountSerializer(IngredientSerializer):
+    """Serializer for ingredient with the number of recipies using it"""
+
+    assigned_count = serializers.IntegerField(read_only=True)
+
+    class Meta(IngredientSerializer.Meta):
+        fields = IngredientSerializer.Meta.fields + ['assigned_count']
+
+
+class NameUpsertSerializer(serializers.Serializer):
+    """Serializer for a list of tag or ingredient names to upsert"""
+
+    max_names = 500
+
+    names = serializers.ListField(
+        child=serializers.CharField(max_length=255)
+    )
+
+    def validate_names(self, value):
+        """Limit the number of names of a request"""
+
+        if len(value) > self.max_names:
+            raise serializers.ValidationError(
+                f'At most {self.max_names} names are allowed.'
+            )
+
+        return value
+
+
+class SparseFieldsMixin:
+    """
+    Serializer mixin keeping only the ``fields`` given and nesting the
+    ``expand`` relations with their serializer from ``expandable_fields``.
+    """
+
+    expandable_fields = {}
+
+    def __init__(self, *args, fields=None, expand=(), **kwargs):
+        super().__init__(*args, **kwargs)
+
+        for name in expand:
+            self.fields[name] = self.expandable_fields[name](
+                many=True,
+                read_only=True
+            )
+
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class RecipeSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for Recipe model"""
 
-    ingredients = serializers.PrimaryKeyRelatedField(
+    expandable_fields = {
+        'tags': TagSerializer,
+        'ingredients': IngredientSerializer,
+    }
+
+    ingredients = UserPrimaryKeyRelatedField(
         many=True,
         queryset=Ingredient.objects.all()
     )
 
-    tags = serializers.PrimaryKeyRelatedField(
+    tags = UserPrimaryKeyRelatedField(
         many=True,
         queryset=Tag.objects.all(),
     )
@@ -49,6 +145,34 @@ class RecipeSerializer(serializers.ModelSerializer):
         read_only_field = ('id',)
 
 
+class RecipeBulkSerializer(serializers.Serializer):
+    """Serializer for a batch of recipe creates, updates and deletes"""
+
+    max_items = 500
+
+    create = RecipeSerializer(many=True, required=False)
+    update = serializers.ListField(
+        child=serializers.DictField(),
+        required=False
+    )
+    delete = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False
+    )
+
+    def validate(self, attrs):
+        """Limit the number of operations of a batch"""
+
+        count = sum(len(items) for items in attrs.values())
+
+        if count > self.max_items:
+            raise serializers.ValidationError(
+                f'At most {self.max_items} operations are allowed.'
+            )
+
+        return attrs
+
+
 class RecipeDetailSerializer(RecipeSerializer):
     """Serializer a recipe detail"""
 
@@ -56,11 +180,34 @@ class RecipeDetailSerializer(RecipeSerializer):
     tags = TagSerializer(many=True, read_only=True)
 
 
+class RecipeImageRenditionSerializer(serializers.ModelSerializer):
+    """Serializer for a resized recipe image"""
+
+    class Meta:
+        model = RecipeImageRendition
+        fields = ['name', 'image', 'width', 'height']
+        read_only_fields = fields
+
+
 class RecipeImageSerializer(serializers.ModelSerializer):
     """Serialize for uploding image to recipe"""
 
+    renditions = RecipeImageRenditionSerializer(many=True, read_only=True)
+
     class Meta:
         model = Recipe
-        fields = ['id', 'image']
+        fields = ['id', 'image', 'image_status', 'renditions']
 
         read_only = ('id',)
+        read_only_fields = ('image_status',)
+
+    def update(self, instance, validated_data):
+        """Reference images streamed to the storage instead of copying them"""
+
+        image = validated_data.get('image')
+        storage_name = getattr(image, 'storage_name', None)
+
+        if storage_name:
+            validated_data['image'] = storage_name
+
+        return super().update(instance, validated_data)
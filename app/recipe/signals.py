@@ -0,0 +1,56 @@
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+
+from core.models import RELATION_FIELDS, Ingredient, Recipe, Tag
+from recipe.cache import recipe_detail_cache
+
+
+def invalidate_related_recipies(instance):
+    """Drop the cached details of the recipies using a tag or ingredient"""
+
+    field = RELATION_FIELDS[type(instance)]
+    recipe_detail_cache.invalidate(
+        Recipe.objects.filter(**{field: instance}).values_list('id', flat=True)
+    )
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def invalidate_recipe(sender, instance, **kwargs):
+    """Drop the cached detail of a changed recipe"""
+    recipe_detail_cache.invalidate([instance.id])
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def invalidate_recipe_relations(sender, instance, action, reverse, pk_set,
+                                **kwargs):
+    """Drop the cached details of recipies whose relations changed"""
+
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            recipe_detail_cache.invalidate([instance.id])
+    elif action in ('post_add', 'post_remove'):
+        recipe_detail_cache.invalidate(pk_set)
+    elif action == 'pre_clear':
+        invalidate_related_recipies(instance)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+def invalidate_renamed(sender, instance, created, **kwargs):
+    """Drop the cached details of the recipies using a renamed object"""
+    if not created:
+        invalidate_related_recipies(instance)
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def invalidate_deleted(sender, instance, **kwargs):
+    """Drop the cached details of the recipies using a deleted object"""
+    invalidate_related_recipies(instance)
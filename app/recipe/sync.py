@@ -0,0 +1,115 @@
+"""
+Delta sync of the recipies, tags and ingredients of a user.
+
+Every write bumps the collection version of its user and stores the new
+version on the changed row, or on a tombstone when the row is deleted. The
+version a client last saw is its sync token: the changes are the rows with
+a greater version.
+
+Tombstones are purged after SYNC_TOMBSTONE_RETENTION days by the
+purge_tombstones command. The oldest token still supported is the greatest
+purged version of the user: an older token gets a full sync flagged with
+``reset``, and the client drops what it has before applying it.
+"""
+from itertools import chain
+
+from rest_framework.fields import DateTimeField
+
+from core.models import CollectionVersion, Ingredient, Recipe, Tag, Tombstone
+from recipe import serializers
+from recipe.fastpath import (
+    ValuesSerializer,
+    aggregate_relations,
+    fetch_relations,
+)
+
+
+# Response key, model, serializer and tombstone name of each collection
+COLLECTIONS = (
+    ('recipies', Recipe, serializers.RecipeSerializer, Tombstone.RECIPE),
+    ('tags', Tag, serializers.TagSerializer, Tombstone.TAG),
+    ('ingredients', Ingredient, serializers.IngredientSerializer,
+     Tombstone.INGREDIENT),
+)
+
+updated_at_field = DateTimeField()
+
+
+def get_changes(user, since=0, limit=500):
+    """
+    Return the changes of a user's collections after the version since.
+
+    Pages are cut on a version boundary, so all the rows written together
+    are returned together and a page may hold a few more than limit rows.
+    Tombstones are left out of a full sync as the client has nothing yet.
+    """
+
+    version = CollectionVersion.objects.current(user.id)
+    current = version.version
+
+    # Deletions after the token may have been purged
+    reset = 0 < since < version.purged_version
+    if reset:
+        since = 0
+
+    sources = [
+        model.objects.filter(user_id=user.id)
+        for _, model, _, _ in COLLECTIONS
+    ]
+    tombstones = Tombstone.objects.filter(user_id=user.id)
+    if since:
+        sources.append(tombstones)
+
+    versions = sorted(chain.from_iterable(
+        source.filter(
+            sync_version__gt=since,
+            sync_version__lte=current
+        ).order_by('sync_version').values_list(
+            'sync_version',
+            flat=True
+        )[:limit + 1]
+        for source in sources
+    ))
+
+    more = len(versions) > limit
+    token = versions[limit - 1] if more else current
+    window = {'sync_version__gt': since, 'sync_version__lte': token}
+
+    data = {'token': token, 'more': more, 'reset': reset}
+    deleted = {key: [] for key, _, _, _ in COLLECTIONS}
+
+    for key, model, serializer_class, _ in COLLECTIONS:
+        values_serializer = ValuesSerializer(serializer_class())
+        relations = values_serializer.relations
+
+        queryset = model.objects.filter(user_id=user.id, **window)
+        queryset = aggregate_relations(
+            queryset.order_by('id').values(
+                *values_serializer.values,
+                'updated_at'
+            ),
+            relations
+        )
+        rows = list(queryset)
+
+        if relations:
+            fetch_relations(rows, model, relations)
+
+        data[key] = values_serializer.to_representation(rows)
+        for item, row in zip(data[key], rows):
+            item['updated_at'] = updated_at_field.to_representation(
+                row['updated_at']
+            )
+
+    if since:
+        names = {name: key for key, _, _, name in COLLECTIONS}
+        rows = tombstones.filter(**window).order_by('object_id').values_list(
+            'model',
+            'object_id'
+        )
+        for name, object_id in rows:
+            deleted[names[name]].append(object_id)
+
+    data['deleted'] = deleted
+
+    return data
@@ -0,0 +1,156 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.urls import reverse
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+
+
+RECIPE_URL = reverse('recipe:recipe-list')
+TAG_URL = reverse('recipe:tag-list')
+INGREDIENT_URL = reverse('recipe:ingredient-list')
+BULK_URL = reverse('recipe:recipe-bulk')
+
+
+def sample_recipe(user, **params):
+    """Create and return a sample recipe"""
+
+    defaults = {
+        'title': 'Sample recipe',
+        'time_minutes': 10,
+        'price': 5.00
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class ConditionalListApiTests(TestCase):
+    """Test list responses are revalidated with ETags"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@londonappdev.com',
+            'testpass'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def revalidate(self, url, etag):
+        """Send a conditional GET for a previously seen ETag"""
+        return self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_unchanged_lists_not_modified(self):
+        """Test an unchanged list is answered with 304"""
+
+        sample_recipe(user=self.user)
+        Tag.objects.create(user=self.user, name='Vegan')
+
+        for url in (RECIPE_URL, TAG_URL, INGREDIENT_URL):
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertIn('private', res['Cache-Control'])
+            self.assertIn('Authorization', res['Vary'])
+
+            res = self.revalidate(url, res['ETag'])
+
+            self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+            self.assertEqual(res.content, b'')
+
+    def test_not_modified_skips_collection_queries(self):
+        """Test a revalidation does not query the recipe tables"""
+
+        sample_recipe(user=self.user)
+        etag = self.client.get(RECIPE_URL)['ETag']
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.revalidate(RECIPE_URL, etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('core_recipe', queries[0]['sql'])
+
+    def test_recipe_change_modifies_list(self):
+        """Test saving a recipe changes the recipe list ETag"""
+
+        recipe = sample_recipe(user=self.user)
+        etag = self.client.get(RECIPE_URL)['ETag']
+
+        recipe.title = 'Changed'
+        recipe.save()
+        res = self.revalidate(RECIPE_URL, etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+
+    def test_tag_relations_modify_list(self):
+        """Test adding and removing tags changes the recipe list ETag"""
+
+        recipe = sample_recipe(user=self.user)
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+
+        etag = self.client.get(RECIPE_URL)['ETag']
+        recipe.tags.add(tag)
+        res = self.revalidate(RECIPE_URL, etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        etag = res['ETag']
+        recipe.tags.remove(tag)
+        res = self.revalidate(RECIPE_URL, etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_tag_rename_modifies_list(self):
+        """Test renaming a tag changes the tag list ETag"""
+
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        etag = self.client.get(TAG_URL)['ETag']
+
+        tag.name = 'Vegetarian'
+        tag.save()
+        res = self.revalidate(TAG_URL, etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'][0]['name'], 'Vegetarian')
+
+    def test_bulk_write_modifies_list(self):
+        """Test the bulk endpoint changes the recipe list ETag"""
+
+        recipe = sample_recipe(user=self.user)
+        etag = self.client.get(RECIPE_URL)['ETag']
+
+        self.client.post(
+            BULK_URL,
+            {'update': [{'id': recipe.id, 'title': 'Changed'}]},
+            format='json'
+        )
+        res = self.revalidate(RECIPE_URL, etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_etag_depends_on_query(self):
+        """Test filtered and paginated lists get their own ETags"""
+
+        etag = self.client.get(TAG_URL)['ETag']
+
+        res = self.revalidate(TAG_URL + '?assigned_only=1', etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+
+    def test_etag_depends_on_user(self):
+        """Test another user's changes do not modify the list"""
+
+        other = get_user_model().objects.create_user(
+            'other@londonappdev.com',
+            'testpass'
+        )
+        etag = self.client.get(TAG_URL)['ETag']
+
+        Tag.objects.create(user=other, name='Vegan')
+        res = self.revalidate(TAG_URL, etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
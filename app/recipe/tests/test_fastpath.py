@@ -0,0 +1,171 @@
+import unittest
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Count
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Recipe, Tag
+from recipe import serializers
+from recipe.fastpath import aggregate_relations
+
+
+RECIPE_URL = reverse('recipe:recipe-list')
+TAG_URL = reverse('recipe:tag-list')
+INGREDIENT_URL = reverse('recipe:ingredient-list')
+
+
+class ValuesListTests(TestCase):
+    """Test the values based list path renders like the serializers"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'fast@londonappdev.com',
+            'testpass'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        tags = [
+            Tag.objects.create(user=self.user, name=name)
+            for name in ('Vegan', 'Dessert', 'Ünicode')
+        ]
+        ingredients = [
+            Ingredient.objects.create(user=self.user, name=name)
+            for name in ('Salt', 'Kale')
+        ]
+
+        Recipe.objects.create(
+            user=self.user,
+            title='Empty',
+            time_minutes=5,
+            price='0.50'
+        )
+        recipe = Recipe.objects.create(
+            user=self.user,
+            title='Full',
+            time_minutes=60,
+            price='12.00',
+            link='https://example.com/full'
+        )
+        recipe.tags.add(tags[2], tags[0])
+        recipe.ingredients.add(*ingredients)
+        tags[1].recipe_set.add(recipe)
+
+    def assertRendersLike(self, url, serializer_class, queryset):
+        """Assert a list renders the same bytes as the serializer"""
+
+        res = self.client.get(url)
+        expected = serializer_class(
+            queryset,
+            many=True,
+            context={'request': res.wsgi_request}
+        ).data
+
+        self.assertEqual(
+            JSONRenderer().render(res.data['results']),
+            JSONRenderer().render(expected)
+        )
+
+    def test_recipe_list_matches_serializer(self):
+        """Test recipies, decimals and relation ids render the same"""
+
+        self.assertRendersLike(
+            RECIPE_URL,
+            serializers.RecipeSerializer,
+            Recipe.objects.order_by('-id').prefetch_related(
+                'tags',
+                'ingredients'
+            )
+        )
+
+    def test_tag_list_matches_serializer(self):
+        """Test tags and ingredients render the same"""
+
+        self.assertRendersLike(
+            TAG_URL,
+            serializers.TagSerializer,
+            Tag.objects.order_by('-name', 'id')
+        )
+        self.assertRendersLike(
+            INGREDIENT_URL,
+            serializers.IngredientSerializer,
+            Ingredient.objects.order_by('-name', 'id')
+        )
+
+    def test_assigned_count_matches_serializer(self):
+        """Test annotated counts render the same"""
+
+        self.assertRendersLike(
+            TAG_URL + '?assigned_count=1',
+            serializers.TagCountSerializer,
+            Tag.objects.annotate(
+                assigned_count=Count('recipe')
+            ).order_by('-name', 'id')
+        )
+
+    def test_list_does_not_build_serializers(self):
+        """Test list rows are not passed through the serializer"""
+
+        with patch.object(
+            serializers.RecipeSerializer,
+            'to_representation',
+            side_effect=AssertionError
+        ):
+            res = self.client.get(RECIPE_URL)
+
+        self.assertIsInstance(res.data['results'][0], dict)
+        self.assertEqual(res.data['results'][1]['ingredients'], [])
+
+
+@unittest.skipUnless(
+    connection.vendor == 'postgresql',
+    'Requires ArrayAgg'
+)
+class AggregateRelationsTests(TestCase):
+    """Test the relation ids aggregated on PostgreSQL"""
+
+    def test_relations_not_multiplied(self):
+        """Test each relation is aggregated apart from the other"""
+
+        user = get_user_model().objects.create_user(
+            'agg@londonappdev.com',
+            'testpass'
+        )
+        tags = [
+            Tag.objects.create(user=user, name=name)
+            for name in ('Vegan', 'Dessert', 'Quick')
+        ]
+        ingredients = [
+            Ingredient.objects.create(user=user, name=name)
+            for name in ('Salt', 'Kale')
+        ]
+        recipe = Recipe.objects.create(
+            user=user,
+            title='Full',
+            time_minutes=60,
+            price='12.00'
+        )
+        recipe.tags.add(*tags)
+        recipe.ingredients.add(*ingredients)
+
+        queryset = aggregate_relations(
+            Recipe.objects.filter(pk=recipe.pk).values('id'),
+            {'tags': None, 'ingredients': None}
+        )
+        row = queryset.get()
+
+        self.assertEqual(
+            sorted(row['tags_ids']),
+            sorted(tag.id for tag in tags)
+        )
+        self.assertEqual(
+            sorted(row['ingredients_ids']),
+            sorted(ingredient.id for ingredient in ingredients)
+        )
+        self.assertNotIn('GROUP BY "core_recipe"', str(queryset.query))
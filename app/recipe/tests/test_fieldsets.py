@@ -0,0 +1,151 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Recipe, Tag
+from recipe.fastpath import cached_values_serializer
+
+
+RECIPE_URL = reverse('recipe:recipe-list')
+
+
+def detail_url(recipe_id):
+    """Return recipe detail URL"""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+class RecipeFieldsetApiTests(TestCase):
+    """Test sparse fieldsets and expanded relations of recipies"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'fields@londonappdev.com',
+            'testpass'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.tag = Tag.objects.create(user=self.user, name='Vegan')
+        self.ingredient = Ingredient.objects.create(
+            user=self.user,
+            name='Kale'
+        )
+
+    def create_recipe(self, title='Sample recipe'):
+        recipe = Recipe.objects.create(
+            user=self.user,
+            title=title,
+            time_minutes=10,
+            price=5.00
+        )
+        recipe.tags.add(self.tag)
+        recipe.ingredients.add(self.ingredient)
+        return recipe
+
+    def test_list_fields(self):
+        """Test only the fields asked for are listed"""
+
+        recipe = self.create_recipe()
+
+        res = self.client.get(RECIPE_URL, {'fields': 'id,title'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data['results'],
+            [{'id': recipe.id, 'title': recipe.title}]
+        )
+
+    def test_equal_fieldsets_share_serializer(self):
+        """Test reordered or repeated fields reuse one cached serializer"""
+
+        recipe = self.create_recipe()
+        self.client.get(RECIPE_URL, {'fields': 'id,title'})
+        misses = cached_values_serializer.cache_info().misses
+
+        res = self.client.get(RECIPE_URL, {'fields': 'title,id,title'})
+
+        self.assertEqual(
+            res.data['results'],
+            [{'id': recipe.id, 'title': recipe.title}]
+        )
+        self.assertEqual(cached_values_serializer.cache_info().misses, misses)
+        self.assertIsNotNone(cached_values_serializer.cache_info().maxsize)
+
+    def test_list_fields_without_id_paginates(self):
+        """Test pages can be followed when the id is not rendered"""
+
+        self.create_recipe('First')
+        self.create_recipe('Second')
+
+        res = self.client.get(RECIPE_URL, {'fields': 'title', 'page_size': 1})
+        self.assertEqual(res.data['results'], [{'title': 'Second'}])
+
+        res = self.client.get(res.data['next'])
+        self.assertEqual(res.data['results'], [{'title': 'First'}])
+
+    def test_list_expand(self):
+        """Test expanded relations are nested in the list"""
+
+        self.create_recipe()
+
+        res = self.client.get(RECIPE_URL, {'expand': 'tags,ingredients'})
+        recipe = res.data['results'][0]
+
+        self.assertEqual(
+            recipe['tags'],
+            [{'id': self.tag.id, 'name': self.tag.name}]
+        )
+        self.assertEqual(
+            recipe['ingredients'],
+            [{'id': self.ingredient.id, 'name': self.ingredient.name}]
+        )
+
+    def test_list_expand_query_count_constant(self):
+        """Test expanding relations does not run a query per recipe"""
+
+        self.create_recipe()
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(RECIPE_URL, {'expand': 'tags'})
+
+        for i in range(5):
+            self.create_recipe(f'Recipe {i}')
+        with CaptureQueriesContext(connection) as many:
+            res = self.client.get(RECIPE_URL, {'expand': 'tags'})
+
+        self.assertEqual(len(res.data['results']), 6)
+        self.assertEqual(len(few), len(many))
+
+    def test_retrieve_fields_narrow_query(self):
+        """Test the detail only selects the columns asked for"""
+
+        recipe = self.create_recipe()
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(
+                detail_url(recipe.id),
+                {'fields': 'id,title'}
+            )
+
+        self.assertEqual(res.data, {'id': recipe.id, 'title': recipe.title})
+        recipe_queries = [
+            query['sql'] for query in queries
+            if 'FROM "core_recipe"' in query['sql']
+        ]
+        self.assertEqual(len(recipe_queries), 1)
+        self.assertNotIn('price', recipe_queries[0])
+        self.assertFalse(
+            any('core_tag' in query['sql'] for query in queries)
+        )
+
+    def test_unknown_fields_rejected(self):
+        """Test unknown fields and relations return 400"""
+
+        for params in ({'fields': 'id,secret'}, {'expand': 'title'}):
+            res = self.client.get(RECIPE_URL, params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -12,6 +12,8 @@ from recipe.serializers import IngredientSerializer
 
 
 INGREDIENT_URL = reverse('recipe:ingredient-list')
+INGREDIENT_UPSERT_URL = reverse('recipe:ingredient-upsert')
+INGREDIENT_AUTOCOMPLETE_URL = reverse('recipe:ingredient-autocomplete')
 
 
 class TestsPublicIngredientApi(TestCase):
@@ -56,7 +58,7 @@ class TestPrivateIngredientApi(TestCase):
         serializer = IngredientSerializer(ingredients, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_ingredients_limited_to_user(self):
 
@@ -72,8 +74,8 @@ class TestPrivateIngredientApi(TestCase):
         res = self.client.get(INGREDIENT_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['name'], ingredient.name)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['name'], ingredient.name)
 
     def test_ingredient_created_successful(self):
         """ test if ingredient is created"""
@@ -90,6 +92,31 @@ class TestPrivateIngredientApi(TestCase):
 
         self.assertTrue(exist)
 
+    def test_upsert_ingredients(self):
+        """Test upserting ingredient names returns every id"""
+
+        salt = Ingredient.objects.create(user=self.user, name='salt')
+
+        res = self.client.post(
+            INGREDIENT_UPSERT_URL,
+            {'names': ['Salt', 'pepper']},
+            format='json'
+        )
+
+        pepper = Ingredient.objects.get(user=self.user, name='pepper')
+        self.assertEqual(res.data, {'Salt': salt.id, 'pepper': pepper.id})
+
+    def test_upsert_ingredients_invalid(self):
+        """Test upserting needs a list of names"""
+
+        res = self.client.post(
+            INGREDIENT_UPSERT_URL,
+            {'names': ['']},
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_create_ingredient_invalid(self):
         """Test creating ingreadient invalid"""
 
@@ -123,8 +150,8 @@ class TestPrivateIngredientApi(TestCase):
         serializer1 = IngredientSerializer(ingredient1)
         serializer2 = IngredientSerializer(ingredient2)
 
-        self.assertIn(serializer1.data, res.data)
-        self.assertNotIn(serializer2.data, res.data)
+        self.assertIn(serializer1.data, res.data['results'])
+        self.assertNotIn(serializer2.data, res.data['results'])
 
     def test_retrieve_ingredients_unique(self):
         """Test filtering ingredietns by assigened returns unique items"""
@@ -157,4 +184,43 @@ class TestPrivateIngredientApi(TestCase):
 
         res = self.client.get(INGREDIENT_URL, {'assigned_only': 1})
 
-        self.assertEqual(len(res.data), 1)
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_retrieve_ingredients_assigned_count(self):
+        """Test ingredients include the number of recipies using them"""
+
+        ingredient1 = Ingredient.objects.create(user=self.user, name='apple')
+        ingredient2 = Ingredient.objects.create(user=self.user, name='pear')
+
+        recipe = Recipe.objects.create(
+            user=self.user,
+            title='juice',
+            time_minutes=3,
+            price=6
+        )
+        recipe.ingredients.add(ingredient1)
+
+        res = self.client.get(INGREDIENT_URL, {'assigned_count': 1})
+
+        self.assertEqual(res.data['results'], [
+            {'id': ingredient2.id, 'name': 'pear', 'assigned_count': 0},
+            {'id': ingredient1.id, 'name': 'apple', 'assigned_count': 1},
+        ])
+
+    def test_autocomplete_ingredients(self):
+        """Test ingredients are autocompleted by prefix and by q"""
+
+        for ingredient_name in ('Salt', 'Salmon', 'Sea salt', 'Pepper'):
+            Ingredient.objects.create(user=self.user, name=ingredient_name)
+
+        res = self.client.get(INGREDIENT_AUTOCOMPLETE_URL, {'prefix': 'sal'})
+        self.assertEqual(
+            [ingredient['name'] for ingredient in res.data],
+            ['Salmon', 'Salt']
+        )
+
+        res = self.client.get(INGREDIENT_AUTOCOMPLETE_URL, {'q': 'salt'})
+        self.assertEqual(
+            [ingredient['name'] for ingredient in res.data],
+            ['Salt', 'Sea salt']
+        )
@@ -0,0 +1,180 @@
+import os
+import re
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, RecipeImageRendition
+
+
+CONTENT = bytes(range(256)) * 4
+
+
+class FakeAccelProxy:
+    """
+    Test double for nginx resolving X-Accel-Redirect responses.
+
+    Like the proxy it maps the internal location to MEDIA_ROOT and answers
+    Range requests from the file.
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    def get(self, url, **extra):
+        response = self.client.get(url, **extra)
+        location = response.get('X-Accel-Redirect')
+
+        if location is None:
+            return response.status_code, response, b''
+
+        prefix = settings.MEDIA_ACCEL_REDIRECT_PREFIX
+        assert location.startswith(prefix)
+        path = os.path.join(settings.MEDIA_ROOT, location[len(prefix):])
+
+        with open(path, 'rb') as media_file:
+            body = media_file.read()
+
+        match = re.match(r'bytes=(\d+)-(\d+)', extra.get('HTTP_RANGE', ''))
+        if match:
+            start, end = int(match.group(1)), int(match.group(2))
+            return status.HTTP_206_PARTIAL_CONTENT, response, body[
+                start:end + 1
+            ]
+
+        return status.HTTP_200_OK, response, body
+
+
+@override_settings(
+    MEDIA_ROOT=tempfile.mkdtemp(),
+    MEDIA_SERVE_BACKEND='nginx'
+)
+class RecipeMediaTests(TestCase):
+    """Test serving recipe images"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'media@media.com',
+            '123456'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.proxy = FakeAccelProxy(self.client)
+
+        self.recipe = Recipe.objects.create(
+            user=self.user,
+            title='Soup',
+            time_minutes=5,
+            price=5
+        )
+        self.recipe.image.save('soup.jpg', ContentFile(CONTENT))
+        self.url = self.recipe.image.url
+
+    def tearDown(self):
+        default_storage.delete(self.recipe.image.name)
+
+    def test_owner_gets_image_through_proxy(self):
+        """Test the owner's image is handed to the proxy"""
+
+        code, res, body = self.proxy.get(self.url)
+
+        self.assertEqual(code, status.HTTP_200_OK)
+        self.assertEqual(
+            res['X-Accel-Redirect'],
+            '/protected-media/' + self.recipe.image.name
+        )
+        self.assertEqual(res['Content-Type'], 'image/jpeg')
+        self.assertEqual(res.content, b'')
+        self.assertEqual(body, CONTENT)
+
+    def test_rendition_served(self):
+        """Test renditions of the owner's image are served too"""
+
+        rendition = RecipeImageRendition(
+            recipe=self.recipe,
+            name='thumb',
+            width=1,
+            height=1
+        )
+        rendition.image.save('thumb.jpg', ContentFile(b'thumb'))
+
+        code, res, body = self.proxy.get(rendition.image.url)
+
+        self.assertEqual(code, status.HTTP_200_OK)
+        self.assertEqual(body, b'thumb')
+        default_storage.delete(rendition.image.name)
+
+    def test_other_users_image_not_found(self):
+        """Test images of other users are not served"""
+
+        user2 = get_user_model().objects.create_user('o@o.com', '123456')
+        client = APIClient()
+        client.force_authenticate(user2)
+
+        res = client.get(self.url)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertNotIn('X-Accel-Redirect', res)
+
+    def test_login_required(self):
+        """Test anonymous requests are rejected"""
+
+        res = APIClient().get(self.url)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_if_none_match_not_modified(self):
+        """Test a matching ETag returns 304 without redirecting"""
+
+        res = self.client.get(self.url)
+
+        res = self.client.get(self.url, HTTP_IF_NONE_MATCH=res['ETag'])
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertNotIn('X-Accel-Redirect', res)
+
+    def test_range_handled_by_proxy(self):
+        """Test range requests are passed to the proxy"""
+
+        code, res, body = self.proxy.get(self.url, HTTP_RANGE='bytes=10-19')
+
+        self.assertEqual(res['Accept-Ranges'], 'bytes')
+        self.assertEqual(code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(body, CONTENT[10:20])
+
+    @override_settings(MEDIA_SERVE_BACKEND='sendfile')
+    def test_sendfile_backend(self):
+        """Test the sendfile backend points to the file on disk"""
+
+        res = self.client.get(self.url)
+
+        self.assertEqual(
+            res['X-Sendfile'],
+            os.path.abspath(self.recipe.image.path)
+        )
+
+    @override_settings(MEDIA_SERVE_BACKEND='django')
+    def test_django_backend_range(self):
+        """Test the development backend answers range requests"""
+
+        res = self.client.get(self.url, HTTP_RANGE='bytes=10-19')
+
+        self.assertEqual(res.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(res.content, CONTENT[10:20])
+        self.assertEqual(res['Content-Range'], f'bytes 10-19/{len(CONTENT)}')
+
+        res = self.client.get(self.url, HTTP_RANGE='bytes=5000-')
+        self.assertEqual(
+            res.status_code,
+            status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+        )
+
+        res = self.client.get(self.url)
+        self.assertEqual(b''.join(res.streaming_content), CONTENT)
@@ -1,10 +1,15 @@
+import io
 import tempfile
 import os
+from unittest.mock import patch
 
 from PIL import Image
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 
@@ -12,10 +17,14 @@ from rest_framework.test import APIClient
 from rest_framework import status
 
 
-from core.models import Recipe, Tag, Ingredient
+from core.models import CollectionVersion, Recipe, Tag, Ingredient
+from recipe.cache import recipe_detail_cache
+from recipe.pagination import RecipeCursorPagination
 from recipe.serializers import RecipeSerializer, RecipeDetailSerializer
+from recipe.uploadhandlers import RecipeImageUploadHandler
 
 RECIPE_URL = reverse('recipe:recipe-list')
+BULK_URL = reverse('recipe:recipe-bulk')
 
 # /api/recipe/recipies
 #  api/recipe/recipies/id
@@ -76,6 +85,9 @@ class PrivateRecipeApi(TestCase):
     """
 
     def setUp(self):
+        # Test transactions never commit, so details are not invalidated
+        recipe_detail_cache.shared.clear()
+        recipe_detail_cache.clear()
         self.client = APIClient()
         self.user = get_user_model().objects.create_user(
             '123@123.com',
@@ -95,7 +107,7 @@ class PrivateRecipeApi(TestCase):
         serializer = RecipeSerializer(recipies, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_recipies_limited_to_user(self):
         """TEst rtetrieving recipies  limities to the user"""
@@ -113,7 +125,46 @@ class PrivateRecipeApi(TestCase):
         recipies = Recipe.objects.filter(user=self.user)
         serializer = RecipeSerializer(recipies, many=True)
 
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
+
+    def test_recipies_paginated_by_cursor(self):
+        """Test recipies are paginated newest first following the cursor"""
+
+        recipies = [sample_recipe(self.user) for _ in range(5)]
+
+        res = self.client.get(RECIPE_URL, {'page_size': 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [recipe['id'] for recipe in res.data['results']],
+            [recipies[4].id, recipies[3].id]
+        )
+
+        seen = []
+        url = res.data['next']
+        while url:
+            res = self.client.get(url)
+            seen += [recipe['id'] for recipe in res.data['results']]
+            url = res.data['next']
+
+        self.assertEqual(
+            seen,
+            [recipies[2].id, recipies[1].id, recipies[0].id]
+        )
+
+    def test_recipies_page_size_limited(self):
+        """Test the requested page size is capped"""
+
+        for _ in range(3):
+            sample_recipe(self.user)
+
+        with patch.object(RecipeCursorPagination, 'page_size', 1):
+            res = self.client.get(RECIPE_URL)
+        self.assertEqual(len(res.data['results']), 1)
+
+        with patch.object(RecipeCursorPagination, 'max_page_size', 2):
+            res = self.client.get(RECIPE_URL, {'page_size': 1000})
+        self.assertEqual(len(res.data['results']), 2)
 
     def test_view_recipe_datail(self):
 
@@ -127,6 +178,47 @@ class PrivateRecipeApi(TestCase):
 
         self.assertEqual(res.data, serializer.data)
 
+    def test_list_recipes_query_count_constant(self):
+        """Test listing recipies does not run a query per recipe"""
+
+        def add_recipes(count):
+            for i in range(count):
+                recipe = sample_recipe(user=self.user, title=f'recipe {i}')
+                recipe.tags.add(
+                    sample_tag(user=self.user, name=f'tag {recipe.id}')
+                )
+                recipe.ingredients.add(
+                    sample_ingredient(user=self.user, name=f'ing {recipe.id}')
+                )
+
+        add_recipes(2)
+        with CaptureQueriesContext(connection) as few:
+            res = self.client.get(RECIPE_URL)
+        self.assertEqual(len(res.data['results']), 2)
+
+        add_recipes(8)
+        with CaptureQueriesContext(connection) as many:
+            res = self.client.get(RECIPE_URL)
+        self.assertEqual(len(res.data['results']), 10)
+
+        self.assertEqual(len(few), len(many))
+
+    def test_view_recipe_detail_query_count(self):
+        """Test recipe detail fetches tags and ingredients in one query each"""
+
+        recipe = sample_recipe(user=self.user)
+        for name in ('a', 'b', 'c'):
+            recipe.tags.add(sample_tag(user=self.user, name=name))
+            recipe.ingredients.add(
+                sample_ingredient(user=self.user, name=name)
+            )
+
+        with self.assertNumQueries(3):
+            res = self.client.get(detail_url(recipe.id))
+
+        self.assertEqual(len(res.data['tags']), 3)
+        self.assertEqual(len(res.data['ingredients']), 3)
+
     def test_create_basic_recipe(self):
         """Test creating a recipe"""
 
@@ -195,7 +287,7 @@ class PrivateRecipeApi(TestCase):
 
         recipe = sample_recipe(user=self.user)
         recipe.tags.add(sample_tag(user=self.user))
-        new_tag = sample_tag(user=self.user)
+        new_tag = sample_tag(user=self.user, name='Dessert')
 
         pyload = {
             'title': 'chiken',
@@ -234,6 +326,420 @@ class PrivateRecipeApi(TestCase):
         self.assertEqual(tags.count(), 0)
 
 
+class RecipeBulkApiTests(TestCase):
+    """Test the bulk recipe endpoint"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'bulk@bulk.com',
+            '123456'
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_create_update_delete(self):
+        """Test creating, updating and deleting recipies in one request"""
+
+        tag1 = sample_tag(user=self.user, name='vegan')
+        tag2 = sample_tag(user=self.user, name='fast')
+        ingredient = sample_ingredient(user=self.user)
+        updated = sample_recipe(user=self.user, title='Old')
+        updated.tags.add(tag1)
+        kept = sample_recipe(user=self.user, title='Kept')
+        kept.tags.add(tag1)
+        deleted = sample_recipe(user=self.user, title='Gone')
+
+        payload = {
+            'create': [
+                {
+                    'title': 'Soup',
+                    'time_minutes': 10,
+                    'price': '2.50',
+                    'tags': [tag1.id, tag2.id],
+                    'ingredients': [ingredient.id],
+                },
+                {
+                    'title': 'Salad',
+                    'time_minutes': 5,
+                    'price': '1.00',
+                    'tags': [],
+                    'ingredients': [],
+                },
+            ],
+            'update': [
+                {'id': updated.id, 'title': 'New', 'tags': [tag2.id]},
+                {'id': kept.id, 'price': '9.99'},
+            ],
+            'delete': [deleted.id],
+        }
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        soup = Recipe.objects.get(id=res.data['create'][0]['id'])
+        self.assertEqual(soup.title, 'Soup')
+        self.assertEqual(set(soup.tags.all()), {tag1, tag2})
+        self.assertEqual(list(soup.ingredients.all()), [ingredient])
+        salad = Recipe.objects.get(id=res.data['create'][1]['id'])
+        self.assertEqual(salad.title, 'Salad')
+        self.assertFalse(salad.tags.exists())
+
+        updated.refresh_from_db()
+        self.assertEqual(updated.title, 'New')
+        self.assertEqual(list(updated.tags.all()), [tag2])
+        kept.refresh_from_db()
+        self.assertEqual(str(kept.price), '9.99')
+        self.assertEqual(list(kept.tags.all()), [tag1])
+
+        self.assertFalse(Recipe.objects.filter(id=deleted.id).exists())
+        self.assertEqual(
+            res.data['update'],
+            [{'id': updated.id}, {'id': kept.id}]
+        )
+        self.assertEqual(res.data['delete'], [{'id': deleted.id}])
+
+    def test_bulk_invalid_items_write_nothing(self):
+        """Test an invalid item rejects the whole batch with its errors"""
+
+        user2 = get_user_model().objects.create_user('o@o.com', '123456')
+        other = sample_recipe(user=user2)
+        recipe = sample_recipe(user=self.user)
+
+        payload = {
+            'create': [{
+                'title': 'Soup',
+                'time_minutes': 10,
+                'price': '1',
+                'tags': [],
+                'ingredients': [],
+            }],
+            'update': [
+                {'id': recipe.id, 'title': 'Changed'},
+                {'id': recipe.id, 'time_minutes': 'soon'},
+            ],
+            'delete': [other.id],
+        }
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data['update'][0], {})
+        self.assertIn('time_minutes', res.data['update'][1])
+        self.assertIn('id', res.data['delete'][0])
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 1)
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.title, 'Sample recipe')
+        self.assertTrue(Recipe.objects.filter(id=other.id).exists())
+
+    def test_bulk_rejects_relations_of_other_users(self):
+        """Test tags and ingredients of another user cannot be linked"""
+
+        user2 = get_user_model().objects.create_user('o@o.com', '123456')
+        tag = sample_tag(user=user2)
+        ingredient = sample_ingredient(user=user2)
+        recipe = sample_recipe(user=self.user)
+
+        res = self.client.post(BULK_URL, {
+            'create': [{
+                'title': 'Soup',
+                'time_minutes': 10,
+                'price': '1',
+                'tags': [tag.id],
+                'ingredients': [ingredient.id],
+            }],
+        }, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('tags', res.data['create'][0])
+        self.assertIn('ingredients', res.data['create'][0])
+
+        res = self.client.post(BULK_URL, {
+            'update': [{'id': recipe.id, 'tags': [tag.id]}],
+        }, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('tags', res.data['update'][0])
+        self.assertFalse(recipe.tags.exists())
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 1)
+
+    def test_bulk_bumps_version_once(self):
+        """Test a batch takes a single collection version"""
+
+        before = CollectionVersion.objects.current(self.user.id).version
+        item = {
+            'time_minutes': 10,
+            'price': '1',
+            'tags': [],
+            'ingredients': [],
+        }
+
+        res = self.client.post(BULK_URL, {
+            'create': [dict(item, title=title) for title in 'abc']
+        }, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            CollectionVersion.objects.current(self.user.id).version,
+            before + 1
+        )
+        self.assertEqual(
+            set(Recipe.objects.values_list('sync_version', flat=True)),
+            {before + 1}
+        )
+
+    def test_bulk_create_errors_per_item(self):
+        """Test invalid creates are reported by position"""
+
+        payload = {
+            'create': [
+                {
+                    'title': 'Soup',
+                    'time_minutes': 10,
+                    'price': '1',
+                    'tags': [],
+                    'ingredients': [],
+                },
+                {'title': 'Salad', 'tags': [], 'ingredients': []},
+            ]
+        }
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data['create'][0], {})
+        self.assertIn('price', res.data['create'][1])
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_bulk_size_limited(self):
+        """Test batches with too many operations are rejected"""
+
+        res = self.client.post(
+            BULK_URL,
+            {'delete': list(range(1000))},
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+# JPEG APP1 segment with an EXIF orientation of 6 (rotated 90 degrees)
+EXIF_ROTATED = (
+    b'Exif\x00\x00MM\x00\x2a\x00\x00\x00\x08\x00\x01'
+    b'\x01\x12\x00\x03\x00\x00\x00\x01\x00\x06\x00\x00'
+    b'\x00\x00\x00\x00'
+)
+
+
+@override_settings(
+    MEDIA_ROOT=tempfile.mkdtemp(),
+    RECIPE_IMAGE_PROCESSING='sync'
+)
+class RecipeImageProcessingTests(TestCase):
+    """Test resizing of uploaded recipe images"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            '12@12.com',
+            '1234567'
+        )
+        self.client.force_authenticate(self.user)
+        self.recipe = sample_recipe(user=self.user)
+
+    def upload(self, size=(3000, 1500), **save_kwargs):
+        """Upload a JPEG image of the given size to the recipe"""
+
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as ntf:
+            Image.new('RGB', size).save(ntf, format='JPEG', **save_kwargs)
+            ntf.seek(0)
+            return self.client.post(
+                image_upload_url(self.recipe.id),
+                {'image': ntf},
+                format='multipart'
+            )
+
+    def test_upload_creates_renditions(self):
+        """Test uploading an image creates the resized renditions"""
+
+        res = self.upload()
+        uploaded = res.data['image']
+
+        res = self.client.get(image_upload_url(self.recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['image_status'], Recipe.IMAGE_READY)
+        sizes = {
+            rendition['name']: (rendition['width'], rendition['height'])
+            for rendition in res.data['renditions']
+        }
+        self.assertEqual(sizes, {
+            'full': (2048, 1024),
+            'medium': (800, 400),
+            'thumb': (200, 100),
+        })
+
+        self.recipe.refresh_from_db()
+        full = self.recipe.renditions.get(name='full')
+        self.assertEqual(self.recipe.image.name, full.image.name)
+        self.assertTrue(os.path.exists(self.recipe.image.path))
+        self.assertNotEqual(uploaded, res.data['image'])
+
+    def test_upload_applies_and_strips_exif(self):
+        """Test renditions are rotated as told by EXIF and have no EXIF"""
+
+        self.upload(size=(300, 150), exif=EXIF_ROTATED)
+
+        thumb = self.recipe.renditions.get(name='thumb')
+        self.assertEqual((thumb.width, thumb.height), (100, 200))
+
+        with Image.open(thumb.image.path) as image:
+            self.assertEqual(image.size, (100, 200))
+            self.assertNotIn('exif', image.info)
+
+    def test_processing_failure_recorded(self):
+        """Test a failure while resizing is reported in the status"""
+
+        with patch('recipe.images._render', side_effect=OSError), \
+                self.assertLogs('recipe.images', 'ERROR'):
+            res = self.upload()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_status, Recipe.IMAGE_FAILED)
+        self.assertFalse(self.recipe.renditions.exists())
+
+    @override_settings(RECIPE_IMAGE_PROCESSING='thread')
+    def test_upload_returns_before_processing(self):
+        """Test the upload is processed after the request returns"""
+
+        with patch('recipe.images.process_recipe_image') as process:
+            res = self.upload()
+
+        self.assertEqual(res.data['image_status'], Recipe.IMAGE_PENDING)
+        process.assert_not_called()
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class RecipeImageStreamingTests(TestCase):
+    """Test the streaming upload of recipe images"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            '12@12.com',
+            '1234567'
+        )
+        self.client.force_authenticate(self.user)
+        self.recipe = sample_recipe(user=self.user)
+
+    def upload(self, image, image_format='PNG'):
+        """Upload a Pillow image to the recipe"""
+
+        with tempfile.NamedTemporaryFile(suffix='.png') as ntf:
+            image.save(ntf, format=image_format)
+            ntf.seek(0)
+            return self.client.post(
+                image_upload_url(self.recipe.id),
+                {'image': ntf},
+                format='multipart'
+            )
+
+    def stored_files(self):
+        """Return the files written to the media root"""
+
+        return [
+            name
+            for _, _, names in os.walk(settings.MEDIA_ROOT)
+            for name in names
+        ]
+
+    def noise(self, size):
+        """Return an image that does not compress"""
+        return Image.frombytes('RGB', size, os.urandom(size[0] * size[1] * 3))
+
+    def test_upload_stored_without_copy(self):
+        """Test the uploaded file is written once, where it is kept"""
+
+        res = self.upload(self.noise((100, 100)))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.recipe.refresh_from_db()
+        self.assertEqual(
+            self.stored_files(),
+            [os.path.basename(self.recipe.image.name)]
+        )
+
+    @override_settings(RECIPE_IMAGE_MAX_UPLOAD_SIZE=1000)
+    def test_request_too_large_rejected(self):
+        """Test a request larger than the limit is rejected unread"""
+
+        res = self.upload(self.noise((100, 100)))
+
+        self.assertEqual(
+            res.status_code,
+            status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        )
+        self.assertEqual(self.stored_files(), [])
+
+    @override_settings(RECIPE_IMAGE_MAX_UPLOAD_SIZE=20000)
+    def test_file_too_large_rejected_while_streaming(self):
+        """Test a file growing past the limit is rejected and removed"""
+
+        res = self.upload(self.noise((100, 100)))
+
+        self.assertEqual(
+            res.status_code,
+            status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        )
+        self.assertEqual(self.stored_files(), [])
+        self.recipe.refresh_from_db()
+        self.assertFalse(self.recipe.image)
+
+    @override_settings(RECIPE_IMAGE_MAX_PIXELS=100 * 100)
+    def test_too_many_pixels_rejected(self):
+        """Test decompression bombs are rejected from the header"""
+
+        res = self.upload(Image.new('RGB', (101, 100)))
+
+        self.assertEqual(
+            res.status_code,
+            status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        )
+        self.assertEqual(self.stored_files(), [])
+
+    def test_interrupted_upload_closed_and_removed(self):
+        """Test a partial file is closed and deleted if parsing fails"""
+
+        content = io.BytesIO()
+        self.noise((100, 100)).save(content, format='PNG')
+        handler = RecipeImageUploadHandler()
+        handler.new_file('image', 'image.png', 'image/png', None)
+        handler.receive_data_chunk(content.getvalue()[:5000], 0)
+        destination = handler.destination
+
+        self.assertEqual(len(self.stored_files()), 1)
+
+        handler.upload_interrupted()
+
+        self.assertTrue(destination.closed)
+        self.assertEqual(self.stored_files(), [])
+
+    def test_not_an_image_rejected(self):
+        """Test a file that is not an image is rejected and removed"""
+
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as ntf:
+            ntf.write(b'not an image' * 100)
+            ntf.seek(0)
+            res = self.client.post(
+                image_upload_url(self.recipe.id),
+                {'image': ntf},
+                format='multipart'
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.stored_files(), [])
+
+
 class RecipeImageUploadTests(TestCase):
     """
     docstring
@@ -298,9 +804,9 @@ class RecipeImageUploadTests(TestCase):
         serializer2 = RecipeSerializer(recipe2)
         serializer3 = RecipeSerializer(recipe3)
 
-        self.assertIn(serializer1.data, res.data)
-        self.assertIn(serializer2.data, res.data)
-        self.assertNotIn(serializer3.data, res.data)
+        self.assertIn(serializer1.data, res.data['results'])
+        self.assertIn(serializer2.data, res.data['results'])
+        self.assertNotIn(serializer3.data, res.data['results'])
 
     def test_filter_by_ingredients(self):
         """TEst returning recipies with specific iingredients"""
@@ -322,6 +828,174 @@ class RecipeImageUploadTests(TestCase):
         serializer2 = RecipeSerializer(recipe2)
         serializer3 = RecipeSerializer(recipe3)
 
-        self.assertIn(serializer1.data, res.data)
-        self.assertIn(serializer2.data, res.data)
-        self.assertNotIn(serializer3.data, res.data)
+        self.assertIn(serializer1.data, res.data['results'])
+        self.assertIn(serializer2.data, res.data['results'])
+        self.assertNotIn(serializer3.data, res.data['results'])
+
+    def test_filter_by_tags_returns_unique_recipies(self):
+        """Test a recipe matching several tags is returned once"""
+
+        recipe = sample_recipe(user=self.user)
+        tag1 = sample_tag(user=self.user, name='vegan')
+        tag2 = sample_tag(user=self.user, name='vegetarian')
+        recipe.tags.add(tag1, tag2)
+
+        res = self.client.get(RECIPE_URL, {'tags': f'{tag1.id},{tag2.id}'})
+
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_filter_by_all_tags(self):
+        """Test match=all returns only recipies with every tag"""
+
+        recipe1 = sample_recipe(user=self.user, title='Thai food')
+        recipe2 = sample_recipe(user=self.user, title='Thai vegetables')
+        tag1 = sample_tag(user=self.user, name='vegan')
+        tag2 = sample_tag(user=self.user, name='vegetarian')
+        ingredient = sample_ingredient(user=self.user)
+        recipe1.tags.add(tag1, tag2)
+        recipe1.ingredients.add(ingredient)
+        recipe2.tags.add(tag1)
+        recipe2.ingredients.add(ingredient)
+
+        res = self.client.get(RECIPE_URL, {
+            'tags': f'{tag1.id},{tag2.id}',
+            'ingredients': f'{ingredient.id}',
+            'match': 'all',
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [recipe['id'] for recipe in res.data['results']],
+            [recipe1.id]
+        )
+
+    def test_filter_invalid_params(self):
+        """Test invalid filter parameters return bad request"""
+
+        invalid = (
+            {'tags': '1,abc'},
+            {'ingredients': ','},
+            {'tags': ','.join(str(i) for i in range(1000))},
+            {'tags': '1', 'match': 'some'},
+            {'max_time': '-1'},
+            {'min_price': 'cheap'},
+            {'max_price': 'NaN'},
+            {'ordering': 'title'},
+        )
+
+        for params in invalid:
+            res = self.client.get(RECIPE_URL, params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class RecipeRangeOrderingApiTests(TestCase):
+    """Test filtering recipies by time and price and ordering them"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'range@londonappdev.com',
+            'testpass'
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_filter_by_time_and_price(self):
+        """Test max_time and the price range are inclusive and combined"""
+
+        quick = sample_recipe(user=self.user, time_minutes=10, price=5)
+        sample_recipe(user=self.user, time_minutes=11, price=5)
+        sample_recipe(user=self.user, time_minutes=5, price='9.99')
+        cheap = sample_recipe(user=self.user, time_minutes=1, price='1.50')
+
+        res = self.client.get(RECIPE_URL, {
+            'max_time': 10,
+            'min_price': '1.50',
+            'max_price': 5,
+        })
+
+        self.assertEqual(
+            [recipe['id'] for recipe in res.data['results']],
+            [cheap.id, quick.id]
+        )
+
+    def test_ordering_paginates_by_keyset(self):
+        """Test ordered pages follow the field then the id"""
+
+        recipies = [
+            sample_recipe(user=self.user, time_minutes=minutes)
+            for minutes in (30, 10, 20, 10, 5)
+        ]
+
+        res = self.client.get(RECIPE_URL, {
+            'ordering': 'time_minutes',
+            'page_size': 2,
+        })
+        ids = [recipe['id'] for recipe in res.data['results']]
+        while res.data['next']:
+            res = self.client.get(res.data['next'])
+            ids += [recipe['id'] for recipe in res.data['results']]
+
+        self.assertEqual(ids, [
+            recipies[4].id,
+            recipies[1].id,
+            recipies[3].id,
+            recipies[2].id,
+            recipies[0].id,
+        ])
+
+    def test_ordering_pages_through_ties(self):
+        """Test rows sharing the ordering value are listed once each way"""
+
+        recipies = [
+            sample_recipe(user=self.user, price=price)
+            for price in (2, 2, 2, 2, 2, 1, 2)
+        ]
+
+        res = self.client.get(RECIPE_URL, {
+            'ordering': '-price',
+            'page_size': 2,
+        })
+        pages = [res.data]
+        while res.data['next']:
+            res = self.client.get(res.data['next'])
+            pages.append(res.data)
+        ids = [recipe['id'] for page in pages for recipe in page['results']]
+
+        expected = [recipe.id for recipe in reversed(recipies)]
+        expected.remove(recipies[5].id)
+        self.assertEqual(ids, expected + [recipies[5].id])
+
+        res = self.client.get(pages[-1]['previous'])
+        self.assertEqual(
+            [recipe['id'] for recipe in res.data['results']],
+            [recipe['id'] for recipe in pages[-2]['results']]
+        )
+
+    def test_invalid_cursor_rejected(self):
+        """Test a cursor whose position does not match the ordering fails"""
+
+        res = self.client.get(RECIPE_URL, {'cursor': 'cD0x'})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_ordering_combined_with_filters(self):
+        """Test ordering by price applies to the filtered recipies"""
+
+        tag = sample_tag(user=self.user, name='quick')
+        recipe1 = sample_recipe(user=self.user, price=3)
+        recipe2 = sample_recipe(user=self.user, price=8)
+        sample_recipe(user=self.user, price=1)
+        recipe1.tags.add(tag)
+        recipe2.tags.add(tag)
+
+        res = self.client.get(RECIPE_URL, {
+            'tags': tag.id,
+            'max_time': 60,
+            'ordering': '-price',
+        })
+
+        self.assertEqual(
+            [recipe['price'] for recipe in res.data['results']],
+            ['8.00', '3.00']
+        )
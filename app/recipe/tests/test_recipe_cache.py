@@ -0,0 +1,216 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import (
+    SimpleTestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Recipe, Tag
+from recipe.cache import LRUCache, RecipeDetailCache, recipe_detail_cache
+
+
+BULK_URL = reverse('recipe:recipe-bulk')
+
+
+def detail_url(recipe_id):
+    """Return recipe detail URL"""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+class LRUCacheTests(SimpleTestCase):
+    """Test the in-process LRU tier"""
+
+    def test_least_recently_used_evicted(self):
+        """Test the least recently used item is dropped when full"""
+
+        cache = LRUCache(max_size=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c'), 3)
+
+
+@override_settings(RECIPE_DETAIL_CACHE_ENABLED=True)
+class RecipeDetailCacheTests(TransactionTestCase):
+    """Test cached recipe details are invalidated precisely"""
+
+    def setUp(self):
+        recipe_detail_cache.shared.clear()
+        recipe_detail_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            'cache@londonappdev.com',
+            'testpass'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.recipe = Recipe.objects.create(
+            user=self.user,
+            title='Sample recipe',
+            time_minutes=10,
+            price=5.00
+        )
+        self.tag = Tag.objects.create(user=self.user, name='Vegan')
+        self.recipe.tags.add(self.tag)
+
+    def get_detail(self):
+        res = self.client.get(detail_url(self.recipe.id))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.json()
+
+    def test_cached_detail_needs_no_queries(self):
+        """Test a repeated detail request is served from the LRU"""
+
+        first = self.get_detail()
+
+        with self.assertNumQueries(0):
+            second = self.get_detail()
+
+        self.assertEqual(first, second)
+        self.assertEqual(recipe_detail_cache.stats['local']['hits'], 1)
+        self.assertEqual(recipe_detail_cache.stats['local']['hit_rate'], 0.5)
+
+    def test_shared_tier_refills_local(self):
+        """Test an entry missing from the LRU is read from the shared cache"""
+
+        self.get_detail()
+        recipe_detail_cache.local.clear()
+
+        with self.assertNumQueries(0):
+            self.get_detail()
+
+        self.assertEqual(recipe_detail_cache.stats['shared']['hits'], 1)
+        self.assertEqual(len(recipe_detail_cache.local), 1)
+
+    def test_invalidation_reaches_other_processes(self):
+        """Test a write through one cache makes another one miss"""
+
+        other = RecipeDetailCache()
+        content, key = recipe_detail_cache.get(self.user.id, self.recipe.id)
+        recipe_detail_cache.set(key, b'{}')
+
+        self.assertEqual(other.get(self.user.id, self.recipe.id)[0], b'{}')
+
+        recipe_detail_cache.invalidate([self.recipe.id])
+
+        self.assertIsNone(other.get(self.user.id, self.recipe.id)[0])
+
+    def test_disabled_without_shared_cache(self):
+        """Test details are not cached unless the cache is enabled"""
+
+        with self.settings(RECIPE_DETAIL_CACHE_ENABLED=False):
+            self.get_detail()
+            with self.assertNumQueries(3):
+                self.get_detail()
+
+    def test_filtered_detail_not_served_from_cache(self):
+        """Test filters still apply to a cached recipe detail"""
+
+        self.get_detail()
+
+        res = self.client.get(
+            detail_url(self.recipe.id),
+            {'tags': self.tag.id + 1}
+        )
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+        res = self.client.get(detail_url(self.recipe.id), {'max_time': 5})
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_recipe_save_invalidates(self):
+        """Test saving the recipe drops its cached detail"""
+
+        self.get_detail()
+        self.recipe.title = 'Changed'
+        self.recipe.save()
+
+        self.assertEqual(self.get_detail()['title'], 'Changed')
+
+    def test_invalidated_on_commit(self):
+        """Test the cached detail is dropped once the change commits"""
+
+        self.get_detail()
+
+        with transaction.atomic():
+            self.recipe.title = 'Changed'
+            self.recipe.save()
+            self.assertEqual(self.get_detail()['title'], 'Sample recipe')
+
+        self.assertEqual(self.get_detail()['title'], 'Changed')
+
+    def test_detail_key_uses_integer_id(self):
+        """Test spellings of the same id share one cached detail"""
+
+        self.get_detail()
+
+        res = self.client.get(detail_url(f'0{self.recipe.id}'))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(recipe_detail_cache.stats['local']['hits'], 1)
+
+    def test_relation_changes_invalidate(self):
+        """Test adding tags or ingredients from either side is visible"""
+
+        self.get_detail()
+        ingredient = Ingredient.objects.create(user=self.user, name='Salt')
+        self.recipe.ingredients.add(ingredient)
+        self.assertEqual(len(self.get_detail()['ingredients']), 1)
+
+        other = Tag.objects.create(user=self.user, name='Dessert')
+        other.recipe_set.add(self.recipe)
+        self.assertEqual(len(self.get_detail()['tags']), 2)
+
+        other.recipe_set.clear()
+        self.assertEqual(len(self.get_detail()['tags']), 1)
+
+    def test_tag_rename_invalidates(self):
+        """Test renaming a referenced tag drops the cached detail"""
+
+        self.get_detail()
+        self.tag.name = 'Vegetarian'
+        self.tag.save()
+
+        self.assertEqual(self.get_detail()['tags'][0]['name'], 'Vegetarian')
+
+    def test_tag_delete_invalidates(self):
+        """Test deleting a referenced tag drops the cached detail"""
+
+        self.get_detail()
+        self.tag.delete()
+
+        self.assertEqual(self.get_detail()['tags'], [])
+
+    def test_bulk_update_invalidates(self):
+        """Test recipies updated in bulk drop their cached detail"""
+
+        self.get_detail()
+        self.client.post(
+            BULK_URL,
+            {'update': [{'id': self.recipe.id, 'tags': []}]},
+            format='json'
+        )
+
+        self.assertEqual(self.get_detail()['tags'], [])
+
+    def test_cached_detail_not_shared_between_users(self):
+        """Test another user cannot read a cached detail"""
+
+        self.get_detail()
+        other = get_user_model().objects.create_user(
+            'other@londonappdev.com',
+            'testpass'
+        )
+        self.client.force_authenticate(other)
+
+        res = self.client.get(detail_url(self.recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
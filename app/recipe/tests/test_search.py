@@ -0,0 +1,172 @@
+import unittest
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Recipe, Tag
+
+
+RECIPE_URL = reverse('recipe:recipe-list')
+
+
+class RecipeSearchApiTests(TestCase):
+    """Test searching recipies with ?q="""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'search@londonappdev.com',
+            'testpass'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_recipe(self, title, tags=(), ingredients=(), user=None):
+        recipe = Recipe.objects.create(
+            user=user or self.user,
+            title=title,
+            time_minutes=10,
+            price=5.00
+        )
+        for name in tags:
+            recipe.tags.add(
+                Tag.objects.get_or_create(user=recipe.user, name=name)[0]
+            )
+        for name in ingredients:
+            recipe.ingredients.add(
+                Ingredient.objects.get_or_create(
+                    user=recipe.user,
+                    name=name
+                )[0]
+            )
+        return recipe
+
+    def search(self, q, **params):
+        res = self.client.get(RECIPE_URL, {'q': q, **params})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [recipe['title'] for recipe in res.data['results']]
+
+    def test_search_title_tags_and_ingredients(self):
+        """Test titles, tag names and ingredient names are searched"""
+
+        self.create_recipe('Chocolate cake')
+        self.create_recipe('Pancakes', tags=['Chocolatey'])
+        self.create_recipe('Brownies', ingredients=['Chocolate chips'])
+        self.create_recipe('Salad', tags=['Vegan'])
+
+        self.assertCountEqual(
+            self.search('chocol'),
+            ['Chocolate cake', 'Pancakes', 'Brownies']
+        )
+
+    def test_every_term_must_match(self):
+        """Test all the terms of a search must match"""
+
+        self.create_recipe('Chocolate cake')
+        self.create_recipe('Chocolate mousse', tags=['Dessert'])
+
+        self.assertEqual(self.search('choc dessert'), ['Chocolate mousse'])
+
+    def test_title_matches_ranked_first(self):
+        """Test recipies matching in the title come before the others"""
+
+        self.create_recipe('Chocolate cake')
+        self.create_recipe('Brownies', tags=['Chocolate', 'Chocolate dark'])
+
+        self.assertEqual(
+            self.search('chocolate'),
+            ['Chocolate cake', 'Brownies']
+        )
+
+    def test_search_paginates_by_rank(self):
+        """Test the pages of a search follow the rank"""
+
+        for i in range(3):
+            self.create_recipe(f'Chocolate {i}')
+        self.create_recipe('Brownies', tags=['Chocolate'])
+
+        res = self.client.get(RECIPE_URL, {'q': 'chocolate', 'page_size': 2})
+        titles = [recipe['title'] for recipe in res.data['results']]
+        while res.data['next']:
+            res = self.client.get(res.data['next'])
+            titles += [recipe['title'] for recipe in res.data['results']]
+
+        self.assertEqual(
+            titles,
+            ['Chocolate 2', 'Chocolate 1', 'Chocolate 0', 'Brownies']
+        )
+
+    def test_search_limited_to_user(self):
+        """Test the recipies of other users are not searched"""
+
+        other = get_user_model().objects.create_user(
+            'other@londonappdev.com',
+            'testpass'
+        )
+        self.create_recipe('Chocolate cake', user=other)
+
+        self.assertEqual(self.search('chocolate'), [])
+
+    def test_search_without_words_lists_all(self):
+        """Test a search without any word is ignored"""
+
+        self.create_recipe('Chocolate cake')
+
+        self.assertEqual(self.search('  &! '), ['Chocolate cake'])
+
+
+@unittest.skipUnless(
+    connection.vendor == 'postgresql',
+    'Requires the PostgreSQL search triggers'
+)
+class RecipeSearchVectorTests(TestCase):
+    """Test the database triggers maintaining the search vector"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'vector@londonappdev.com',
+            'testpass'
+        )
+        self.recipe = Recipe.objects.create(
+            user=self.user,
+            title='Pancakes',
+            time_minutes=10,
+            price=5.00
+        )
+
+    def matches(self, q):
+        return Recipe.objects.filter(search_vector=q).exists()
+
+    def test_vector_refreshed_only_with_title(self):
+        """Test updates leaving the title alone skip the trigger"""
+
+        recipies = Recipe.objects.filter(pk=self.recipe.pk)
+
+        recipies.update(search_vector=None, sync_version=0)
+        self.assertFalse(self.matches('pancakes'))
+
+        recipies.get().save()
+        recipies.update(title='Pancakes')
+        self.assertFalse(self.matches('pancakes'))
+
+        recipies.update(title='Waffles')
+        self.assertTrue(self.matches('waffles'))
+
+    def test_vector_follows_tags(self):
+        """Test tags and their renames are reflected in the vector"""
+
+        tag = Tag.objects.create(user=self.user, name='Breakfast')
+        self.recipe.tags.add(tag)
+        self.assertTrue(self.matches('breakfast'))
+
+        tag.name = 'Brunch'
+        tag.save()
+        self.assertTrue(self.matches('brunch'))
+        self.assertFalse(self.matches('breakfast'))
+
+        self.recipe.tags.remove(tag)
+        self.assertFalse(self.matches('brunch'))
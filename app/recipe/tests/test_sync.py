@@ -0,0 +1,307 @@
+import datetime
+from importlib import import_module
+from io import StringIO
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse
+from django.test import TestCase
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import CollectionVersion, Ingredient, Recipe, Tag, Tombstone
+from recipe.views import SyncView
+
+
+SYNC_URL = reverse('recipe:sync')
+BULK_URL = reverse('recipe:recipe-bulk')
+
+
+def sample_recipe(user, **params):
+    """Create and return a sample recipe"""
+
+    defaults = {
+        'title': 'Sample recipe',
+        'time_minutes': 10,
+        'price': 5.00
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class PublicSyncApiTests(TestCase):
+    """Test the unauthenticated sync API"""
+
+    def test_login_required(self):
+        """Test authentication is required to sync"""
+
+        res = APIClient().get(SYNC_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateSyncApiTests(TestCase):
+    """Test the delta sync of the authenticated user"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@londonappdev.com',
+            'testpass'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def sync(self, since=None):
+        params = {} if since is None else {'since': since}
+        res = self.client.get(SYNC_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def test_full_sync_after_backfill(self):
+        """Test rows written before the delta sync are in a full sync"""
+
+        backfill = import_module(
+            'core.migrations.0016_backfill_sync_version'
+        ).backfill_sync_versions
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        recipe = sample_recipe(self.user)
+        Tag.objects.update(sync_version=0)
+        Recipe.objects.update(sync_version=0)
+
+        backfill(apps, None)
+
+        data = self.sync()
+        recipe.refresh_from_db()
+
+        self.assertEqual([item['id'] for item in data['tags']], [tag.id])
+        self.assertEqual(
+            [item['id'] for item in data['recipies']], [recipe.id]
+        )
+        self.assertGreater(recipe.sync_version, 0)
+        self.assertEqual(
+            CollectionVersion.objects.current(self.user.id).version,
+            recipe.sync_version
+        )
+        self.assertEqual(self.sync(data['token'])['recipies'], [])
+
+    def test_full_sync(self):
+        """Test syncing without a token returns the whole collection"""
+
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        ingredient = Ingredient.objects.create(user=self.user, name='Salt')
+        recipe = sample_recipe(self.user)
+        recipe.tags.add(tag)
+        recipe.ingredients.add(ingredient)
+        other = get_user_model().objects.create_user('other@12.com', 'pass')
+        sample_recipe(other)
+
+        data = self.sync()
+
+        self.assertFalse(data['more'])
+        self.assertEqual(len(data['recipies']), 1)
+        self.assertEqual(data['recipies'][0]['id'], recipe.id)
+        self.assertEqual(data['recipies'][0]['tags'], [tag.id])
+        self.assertEqual(data['recipies'][0]['ingredients'], [ingredient.id])
+        self.assertIn('updated_at', data['recipies'][0])
+        self.assertEqual(
+            data['tags'],
+            [{'id': tag.id, 'name': 'Vegan',
+              'updated_at': data['tags'][0]['updated_at']}]
+        )
+        self.assertEqual(
+            [item['id'] for item in data['ingredients']], [ingredient.id]
+        )
+        self.assertEqual(
+            data['deleted'], {'recipies': [], 'tags': [], 'ingredients': []}
+        )
+
+    def test_incremental_sync(self):
+        """Test only the objects changed after the token are returned"""
+
+        recipe1 = sample_recipe(self.user, title='First')
+        recipe2 = sample_recipe(self.user, title='Second')
+        token = self.sync()['token']
+
+        data = self.sync(token)
+        self.assertEqual(data['token'], token)
+        self.assertEqual(data['recipies'], [])
+
+        recipe2.title = 'Changed'
+        recipe2.save()
+        tag = Tag.objects.create(user=self.user, name='New')
+
+        data = self.sync(token)
+
+        self.assertEqual(
+            [item['title'] for item in data['recipies']], ['Changed']
+        )
+        self.assertEqual([item['id'] for item in data['tags']], [tag.id])
+        self.assertNotEqual(data['token'], token)
+        self.assertNotIn(
+            recipe1.id, [item['id'] for item in data['recipies']]
+        )
+
+    def test_deleted_objects_returned(self):
+        """Test deletions after the token are returned as ids"""
+
+        recipe = sample_recipe(self.user)
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        ids = recipe.id, tag.id
+        token = self.sync()['token']
+
+        recipe.delete()
+        tag.delete()
+
+        data = self.sync(token)
+
+        self.assertEqual(data['deleted']['recipies'], [ids[0]])
+        self.assertEqual(data['deleted']['tags'], [ids[1]])
+        self.assertEqual(data['recipies'], [])
+
+        self.assertEqual(self.sync()['deleted']['recipies'], [])
+
+    def test_relation_changes_touch_recipe(self):
+        """Test adding or deleting a tag marks its recipies as changed"""
+
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        recipe = sample_recipe(self.user)
+        token = self.sync()['token']
+
+        recipe.tags.add(tag)
+        data = self.sync(token)
+        self.assertEqual(data['recipies'][0]['tags'], [tag.id])
+
+        token = data['token']
+        tag_id = tag.id
+        tag.delete()
+        data = self.sync(token)
+        self.assertEqual(data['recipies'][0]['tags'], [])
+        self.assertEqual(data['deleted']['tags'], [tag_id])
+
+    def test_api_save_bumps_version_once(self):
+        """Test a recipe saved with its relations takes a single version"""
+
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        token = self.sync()['token']
+
+        res = self.client.post(reverse('recipe:recipe-list'), {
+            'title': 'Soup',
+            'time_minutes': 10,
+            'price': '2.00',
+            'tags': [tag.id],
+        })
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        data = self.sync(token)
+        self.assertEqual(data['token'], token + 1)
+        self.assertEqual(data['recipies'][0]['tags'], [tag.id])
+
+    def test_bulk_changes_synced(self):
+        """Test recipies written in bulk are returned with their changes"""
+
+        recipe = sample_recipe(self.user)
+        token = self.sync()['token']
+
+        res = self.client.post(BULK_URL, {
+            'create': [{
+                'title': 'New',
+                'time_minutes': 5,
+                'price': '1.00',
+                'tags': [],
+                'ingredients': [],
+            }],
+            'update': [{'id': recipe.id, 'title': 'Updated'}],
+        }, format='json')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        data = self.sync(token)
+
+        self.assertEqual(
+            sorted(item['title'] for item in data['recipies']),
+            ['New', 'Updated']
+        )
+
+    def test_sync_paginated(self):
+        """Test large changes are returned in pages linked by the token"""
+
+        for i in range(5):
+            sample_recipe(self.user, title=f'Recipe {i}')
+        SyncView.page_size = 2
+        self.addCleanup(setattr, SyncView, 'page_size', 500)
+
+        titles = []
+        data = {'more': True, 'token': None}
+        while data['more']:
+            data = self.sync(data['token'])
+            self.assertLessEqual(len(data['recipies']), 2)
+            titles += [item['title'] for item in data['recipies']]
+
+        self.assertEqual(titles, [f'Recipe {i}' for i in range(5)])
+
+    def test_invalid_token(self):
+        """Test a token that is not a version is rejected"""
+
+        for since in ('abc', '-1'):
+            res = self.client.get(SYNC_URL, {'since': since})
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_deleted_user_tombstones_removed(self):
+        """Test deleting a user drops the tombstones of its objects"""
+
+        recipe = sample_recipe(self.user)
+        recipe.delete()
+        self.assertTrue(Tombstone.objects.filter(user_id=self.user.id))
+
+        self.user.delete()
+
+        self.assertFalse(Tombstone.objects.exists())
+
+    def test_purge_tombstones(self):
+        """Test the purge command deletes only the expired tombstones"""
+
+        old, recent = sample_recipe(self.user), sample_recipe(self.user)
+        ids = old.id, recent.id
+        old.delete()
+        recent.delete()
+        Tombstone.objects.filter(object_id=ids[0]).update(
+            deleted_at=timezone.now() - datetime.timedelta(days=31)
+        )
+
+        out = StringIO()
+        call_command('purge_tombstones', days=30, batch_size=1, stdout=out)
+
+        self.assertIn('Purged 1 tombstones', out.getvalue())
+        self.assertEqual(
+            list(Tombstone.objects.values_list('object_id', flat=True)),
+            [ids[1]]
+        )
+
+    def test_token_before_purge_gets_full_sync(self):
+        """Test a token older than the purged tombstones resyncs fully"""
+
+        kept = sample_recipe(self.user)
+        deleted = sample_recipe(self.user)
+        token = self.sync()['token']
+
+        deleted.delete()
+        Tombstone.objects.update(
+            deleted_at=timezone.now() - datetime.timedelta(days=31)
+        )
+        call_command('purge_tombstones', days=30, stdout=StringIO())
+
+        data = self.sync(token)
+
+        self.assertTrue(data['reset'])
+        self.assertEqual(
+            [item['id'] for item in data['recipies']],
+            [kept.id]
+        )
+
+        data = self.sync(data['token'])
+
+        self.assertFalse(data['reset'])
+        self.assertEqual(data['recipies'], [])
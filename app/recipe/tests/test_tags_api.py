@@ -1,7 +1,9 @@
 from os import name
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.urls import reverse
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from rest_framework import status
 from rest_framework.test import APIClient
@@ -10,6 +12,8 @@ from core.models import Tag, Recipe
 from recipe.serializers import TagSerializer
 
 TAG_URL = reverse('recipe:tag-list')
+TAG_UPSERT_URL = reverse('recipe:tag-upsert')
+TAG_AUTOCOMPLETE_URL = reverse('recipe:tag-autocomplete')
 
 
 class TestPublicTagsApi(TestCase):
@@ -55,7 +59,24 @@ class PrivateTagaApiTest(TestCase):
         serializer = TagSerializer(tags, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
+
+    def test_tags_paginated_by_name(self):
+        """Test tags are paginated by name using a cursor"""
+
+        for tag_name in ('a', 'b', 'c'):
+            Tag.objects.create(user=self.user, name=tag_name)
+
+        res = self.client.get(TAG_URL, {'page_size': 2})
+
+        self.assertEqual(
+            [tag['name'] for tag in res.data['results']], ['c', 'b']
+        )
+
+        res = self.client.get(res.data['next'])
+
+        self.assertEqual([tag['name'] for tag in res.data['results']], ['a'])
+        self.assertIsNone(res.data['next'])
 
     def test_tags_limited_to_user(self):
         """Test that tag returned are fpr the authenticated user """
@@ -67,8 +88,8 @@ class PrivateTagaApiTest(TestCase):
         res = self.client.get(TAG_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['name'], tag.name)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['name'], tag.name)
 
     def test_create_tag_successful(self):
         """Test creating a new tag"""
@@ -82,6 +103,56 @@ class PrivateTagaApiTest(TestCase):
 
         self.assertTrue(exists)
 
+    def test_create_tag_duplicate_name(self):
+        """Test creating a tag with a name the user has is rejected"""
+
+        Tag.objects.create(user=self.user, name='Vegan')
+
+        res = self.client.post(TAG_URL, {'name': 'vegan'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_upsert_tags(self):
+        """Test upserting names creates only the missing tags"""
+
+        vegan = Tag.objects.create(user=self.user, name='Vegan')
+        user2 = get_user_model().objects.create_user('q@q.com', 'qwerty')
+        Tag.objects.create(user=user2, name='Lunch')
+
+        res = self.client.post(
+            TAG_UPSERT_URL,
+            {'names': ['vegan', 'Lunch', 'Dinner', 'LUNCH']},
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        tags = Tag.objects.filter(user=self.user)
+        self.assertEqual(
+            sorted(tag.name for tag in tags),
+            ['Dinner', 'Lunch', 'Vegan']
+        )
+        self.assertEqual(res.data, {
+            'vegan': vegan.id,
+            'Lunch': tags.get(name='Lunch').id,
+            'LUNCH': tags.get(name='Lunch').id,
+            'Dinner': tags.get(name='Dinner').id,
+        })
+
+    def test_upsert_tags_query_count(self):
+        """Test existing tags are resolved in a single query"""
+
+        for tag_name in ('a', 'b', 'c'):
+            Tag.objects.create(user=self.user, name=tag_name)
+
+        with self.assertNumQueries(1):
+            res = self.client.post(
+                TAG_UPSERT_URL,
+                {'names': ['a', 'b', 'c']},
+                format='json'
+            )
+
+        self.assertEqual(len(res.data), 3)
+
     def test_create_tag_invalid(self):
         """Test created a new tag with invlaid pyload"""
 
@@ -113,8 +184,8 @@ class PrivateTagaApiTest(TestCase):
         serializer1 = TagSerializer(tag1)
         serializer2 = TagSerializer(tag2)
 
-        self.assertIn(serializer1.data, res.data)
-        self.assertNotIn(serializer2.data, res.data)
+        self.assertIn(serializer1.data, res.data['results'])
+        self.assertNotIn(serializer2.data, res.data['results'])
 
     def test_retrieve_assigned_unique(self):
         """Test filtering tags by assigned retruns unique items"""
@@ -144,4 +215,91 @@ class PrivateTagaApiTest(TestCase):
 
         res = self.client.get(TAG_URL, {'assigned_only': 1})
 
-        self.assertEqual(len(res.data), 1)
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_retrieve_tags_without_distinct(self):
+        """Test listing tags does not de-duplicate rows"""
+
+        Tag.objects.create(user=self.user, name='Vegan')
+
+        for params in ({}, {'assigned_only': 1}):
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(TAG_URL, params)
+
+            for query in queries:
+                self.assertNotIn('DISTINCT', query['sql'])
+
+    def test_retrieve_tags_assigned_count(self):
+        """Test tags include the number of recipies using them on request"""
+
+        tag1 = Tag.objects.create(user=self.user, name='Vegan')
+        tag2 = Tag.objects.create(user=self.user, name='Lunch')
+        Tag.objects.create(user=self.user, name='Dinner')
+
+        for title in ('Poriide', 'Poriide ultra'):
+            recipe = Recipe.objects.create(
+                title=title,
+                time_minutes=5,
+                price=4,
+                user=self.user
+            )
+            recipe.tags.add(tag1)
+        recipe.tags.add(tag2)
+
+        res = self.client.get(
+            TAG_URL,
+            {'assigned_only': 1, 'assigned_count': 1}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'], [
+            {'id': tag1.id, 'name': 'Vegan', 'assigned_count': 2},
+            {'id': tag2.id, 'name': 'Lunch', 'assigned_count': 1},
+        ])
+
+    def test_invalid_flag_params_rejected(self):
+        """Test assigned_only and assigned_count must be booleans"""
+
+        for param in ('assigned_only', 'assigned_count'):
+            res = self.client.get(TAG_URL, {param: 'x'})
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn(param, res.data)
+
+    def test_autocomplete_tags_prefix(self):
+        """Test tags starting with a prefix are returned by name"""
+
+        for tag_name in ('Dinner', 'dessert', 'Breakfast', 'Vegan Desserts'):
+            Tag.objects.create(user=self.user, name=tag_name)
+        other = get_user_model().objects.create_user('other@12.com', 'pass')
+        Tag.objects.create(user=other, name='Deli')
+
+        res = self.client.get(TAG_AUTOCOMPLETE_URL, {'prefix': 'DE'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([tag['name'] for tag in res.data], ['dessert'])
+
+    def test_autocomplete_tags_q(self):
+        """Test names starting with q come before other matches"""
+
+        for tag_name in ('Vegan Desserts', 'Dessert', 'Dinner'):
+            Tag.objects.create(user=self.user, name=tag_name)
+
+        res = self.client.get(TAG_AUTOCOMPLETE_URL, {'q': 'dessert'})
+
+        self.assertEqual(
+            [tag['name'] for tag in res.data],
+            ['Dessert', 'Vegan Desserts']
+        )
+
+    def test_autocomplete_tags_limited(self):
+        """Test autocomplete returns a few tags and requires a term"""
+
+        for i in range(15):
+            Tag.objects.create(user=self.user, name=f'Tag {i}')
+
+        res = self.client.get(TAG_AUTOCOMPLETE_URL, {'prefix': 'tag'})
+        self.assertEqual(len(res.data), 10)
+
+        res = self.client.get(TAG_AUTOCOMPLETE_URL)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,192 @@
+import io
+
+from PIL import Image
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import (
+    FileUploadHandler,
+    SkipFile,
+    StopUpload,
+)
+from django.http import QueryDict
+from django.utils.datastructures import MultiValueDict
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+
+from core.models import recipe_image_file_path
+
+
+# Room left for the multipart boundaries and headers around the file
+MULTIPART_OVERHEAD = 16 * 1024
+
+ALLOWED_FORMATS = ('JPEG', 'PNG', 'GIF', 'WEBP')
+
+
+class ImageTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = _('Image file too large.')
+    default_code = 'image_too_large'
+
+
+class StoredImageFile(UploadedFile):
+    """
+    An uploaded image already written to its final place in the storage.
+
+    The file is read back from the storage for validation and closed with
+    the request like the other uploaded files.
+    """
+
+    def __init__(self, storage_name, name, content_type, size, charset):
+        self.storage_name = storage_name
+        super().__init__(
+            default_storage.open(storage_name, 'rb'),
+            name,
+            content_type,
+            size,
+            charset
+        )
+
+
+class RecipeImageUploadHandler(FileUploadHandler):
+    """
+    Stream a recipe image to the storage while it is received.
+
+    Requests larger than RECIPE_IMAGE_MAX_UPLOAD_SIZE are rejected before the
+    body is read and the image format and pixel size are checked as soon as
+    the header arrives, so oversized images and decompression bombs are
+    never buffered. The rejection is kept in ``error`` for the view.
+    """
+
+    field_name = 'image'
+    max_header_size = 256 * 1024
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.error = None
+        self.storage_name = None
+        self.destination = None
+
+    def handle_raw_input(self, input_data, META, content_length, boundary,
+                         encoding=None):
+        max_size = settings.RECIPE_IMAGE_MAX_UPLOAD_SIZE + MULTIPART_OVERHEAD
+
+        if content_length > max_size:
+            self.error = ImageTooLarge()
+            # Returning the data skips parsing, the body is never read
+            return QueryDict(encoding=encoding), MultiValueDict()
+
+    def new_file(self, field_name, *args, **kwargs):
+        super().new_file(field_name, *args, **kwargs)
+
+        if field_name != self.field_name:
+            raise SkipFile()
+
+        self._discard()
+        self.header = b''
+
+    def receive_data_chunk(self, raw_data, start):
+        if start + len(raw_data) > settings.RECIPE_IMAGE_MAX_UPLOAD_SIZE:
+            self._reject(ImageTooLarge())
+
+        if self.destination is not None:
+            self.destination.write(raw_data)
+            return None
+
+        self.header += raw_data
+        if self._check_header(complete=False):
+            self._open_destination()
+
+    def file_complete(self, file_size):
+        if self.destination is None:
+            self._check_header(complete=True)
+            self._open_destination()
+
+        try:
+            self.destination.close()
+        finally:
+            self.destination = None
+
+        return StoredImageFile(
+            self.storage_name,
+            self.file_name,
+            self.content_type,
+            file_size,
+            self.charset
+        )
+
+    def upload_complete(self):
+        # A destination still open belongs to a file that never completed
+        if self.error or self.destination is not None:
+            self._discard()
+
+    def upload_interrupted(self):
+        """Close and delete the partial file when the parsing failed"""
+        self._discard()
+
+    def discard(self):
+        """Delete the stored image, used when the upload is not saved"""
+        self._discard()
+
+    def _check_header(self, complete):
+        """
+        Validate the image format and size from the received bytes.
+
+        Return False while more bytes are needed to read the header.
+        """
+
+        try:
+            image = Image.open(io.BytesIO(self.header))
+        except Exception:
+            if complete or len(self.header) >= self.max_header_size:
+                self._reject(ValidationError({
+                    self.field_name: [_('Upload a valid image.')]
+                }))
+            return False
+
+        if image.format not in ALLOWED_FORMATS:
+            self._reject(ValidationError({
+                self.field_name: [_('Unsupported image format.')]
+            }))
+
+        width, height = image.size
+        if width * height > settings.RECIPE_IMAGE_MAX_PIXELS:
+            self._reject(ImageTooLarge(_('Image dimensions too large.')))
+
+        return True
+
+    def _open_destination(self):
+        """Create the file in the storage and write the header to it"""
+
+        # Saving an empty file reserves a free name in any storage
+        self.storage_name = default_storage.save(
+            recipe_image_file_path(None, self.file_name),
+            ContentFile(b'')
+        )
+        self.destination = default_storage.open(self.storage_name, 'wb')
+        self.destination.write(self.header)
+        self.header = b''
+
+    def _reject(self, error):
+        """Stop reading the request and remember why"""
+
+        self.error = error
+        self._discard()
+        raise StopUpload(connection_reset=True)
+
+    def _discard(self):
+        """Delete the file written so far, if any"""
+
+        if self.destination is not None:
+            try:
+                self.destination.close()
+            finally:
+                self.destination = None
+
+        if self.storage_name is not None:
+            default_storage.delete(self.storage_name)
+            self.storage_name = None
@@ -1,43 +1,138 @@
 
 # Create your views here.
+from django.db.models import Count, Exists, OuterRef, Prefetch, Q
+from django.http import Http404, HttpResponse
+from django.utils.translation import gettext_lazy as _
 from rest_framework import viewsets, mixins, status
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import BooleanField
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
 
+from core.authentication import (
+    CachedTokenAuthentication,
+    SignedTokenAuthentication,
+)
 from core.models import Tag, Ingredient, Recipe
-from recipe import serializers
-
-
-class BaseRecipeAtributes(viewsets.GenericViewSet,
+from core.signals import saving_relations
+from recipe import images, media, serializers
+from recipe.autocomplete import autocomplete
+from recipe.cache import recipe_detail_cache
+from recipe.bulk import RecipeBatch, upsert_by_name
+from recipe.conditional import ConditionalListMixin
+from recipe.sync import get_changes
+from recipe.fastpath import ValuesListMixin
+from recipe.filters import (
+    RecipeOrderingFilter,
+    RecipeRangeFilter,
+    RecipeRelationFilter,
+    RecipeSearchFilter,
+)
+from recipe.uploadhandlers import RecipeImageUploadHandler
+from recipe.pagination import (
+    RecipeCursorPagination,
+    RecipeAtributeCursorPagination,
+)
+
+
+class BaseRecipeAtributes(ConditionalListMixin,
+                          ValuesListMixin,
+                          viewsets.GenericViewSet,
                           mixins.ListModelMixin,
                           mixins.CreateModelMixin):
     """BAse classviewset for recipe atributes"""
 
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (
+        CachedTokenAuthentication,
+        SignedTokenAuthentication,
+    )
     permission_classes = (IsAuthenticated,)
+    pagination_class = RecipeAtributeCursorPagination
+    autocomplete_limit = 10
 
     def get_queryset(self):
         """Returns objects for the cuurrent authenticated user only"""
 
-        assigned_only = bool(
-            int(self.request.query_params.get('assigned_only', 0))
-        )
+        assigned_only = self._flag_param('assigned_only')
 
-        queryset = self.queryset
+        queryset = self.queryset.filter(user_id=self.request.user.id)
 
         if assigned_only:
-            queryset = queryset.filter(recipe__isnull=False)
+            # A correlated EXISTS stops at the first recipe and, unlike a
+            # join, never yields duplicates to remove with DISTINCT
+            queryset = queryset.annotate(
+                assigned=Exists(self.recipe_links)
+            ).filter(assigned=True)
+
+        if self._with_assigned_count():
+            queryset = queryset.annotate(assigned_count=Count('recipe'))
+
+        return queryset.order_by('-name', 'id')
+
+    def _with_assigned_count(self):
+        """Return if the number of recipies using each object is requested"""
+        return self._flag_param('assigned_count')
+
+    def _flag_param(self, param):
+        """Return the value of a boolean query parameter such as 0 or 1"""
+
+        try:
+            return BooleanField().to_internal_value(
+                self.request.query_params.get(param, '0')
+            )
+        except ValidationError as exc:
+            raise ValidationError({param: exc.detail})
+
+    def get_serializer_class(self):
+        """Return the serializer including assigned_count if requested"""
+
+        if self.action == 'list' and self._with_assigned_count():
+            return self.count_serializer_class
 
-        return queryset.filter(
-            user=self.request.user
-        ).order_by('-name').distinct()
+        if self.action == 'upsert':
+            return serializers.NameUpsertSerializer
+
+        return self.serializer_class
 
     def perform_create(self, serializer):
         """Create a new ingredient"""
-        serializer.save(user=self.request.user)
+        serializer.save(user_id=self.request.user.id)
+
+    @action(methods=['post'], detail=False)
+    def upsert(self, request):
+        """Return the id of each name, creating the missing ones"""
+
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        return Response(upsert_by_name(
+            self.queryset.model,
+            request.user,
+            serializer.validated_data['names']
+        ))
+
+    @action(methods=['get'], detail=False)
+    def autocomplete(self, request):
+        """Return the few names starting with ?prefix= or similar to ?q="""
+
+        prefix = request.query_params.get('prefix')
+        q = request.query_params.get('q')
+
+        if not (prefix or q):
+            raise ValidationError({
+                'q': _('Either prefix or q is required.')
+            })
+
+        return Response(autocomplete(
+            self.queryset.filter(user_id=request.user.id),
+            prefix=prefix or None,
+            q=q,
+            limit=self.autocomplete_limit
+        ))
 
 
 class TagViewSet(BaseRecipeAtributes):
@@ -45,43 +140,141 @@ class TagViewSet(BaseRecipeAtributes):
     """Manage tags in the database """
 
     serializer_class = serializers.TagSerializer
+    count_serializer_class = serializers.TagCountSerializer
     queryset = Tag.objects.all()
+    recipe_links = Recipe.tags.through.objects.filter(tag=OuterRef('pk'))
 
 
 class IngredientViewSet(BaseRecipeAtributes):
 
     serializer_class = serializers.IngredientSerializer
+    count_serializer_class = serializers.IngredientCountSerializer
     queryset = Ingredient.objects.all()
+    recipe_links = Recipe.ingredients.through.objects.filter(
+        ingredient=OuterRef('pk')
+    )
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(ConditionalListMixin,
+                    ValuesListMixin,
+                    viewsets.ModelViewSet):
     """Manage recipies in database """
 
     serializer_class = serializers.RecipeSerializer
     queryset = Recipe.objects.all()
     permission_classes = (IsAuthenticated,)
-    authentication_classes = (TokenAuthentication,)
-
-    def _params_to_ints(self, qs):
-        """Convert list of string id in a list of integers  """
-        return [int(iD) for iD in qs.split(',')]
+    authentication_classes = (
+        CachedTokenAuthentication,
+        SignedTokenAuthentication,
+    )
+    pagination_class = RecipeCursorPagination
+    filter_backends = (
+        RecipeRelationFilter,
+        RecipeRangeFilter,
+        RecipeSearchFilter,
+        RecipeOrderingFilter,
+    )
+
+    # Columns of tags/ingredients read by the serializer of each action
+    related_fields = {
+        'update': ('id',),
+        'partial_update': ('id',),
+        'retrieve': ('id', 'name'),
+    }
+
+    def initialize_request(self, request, *args, **kwargs):
+        """Stream image uploads through the size checking upload handler"""
+
+        drf_request = super().initialize_request(request, *args, **kwargs)
+
+        if self.action == 'upload_image':
+            self.upload_handler = RecipeImageUploadHandler(request)
+            request.upload_handlers = [self.upload_handler]
+
+        return drf_request
 
     def get_queryset(self):
         """ Retrieve recipies for the authenn user"""
-        tags = self.request.query_params.get('tags')
-        ingredients = self.request.query_params.get('ingredients')
 
-        queryset = self.queryset
+        queryset = self.queryset.filter(
+            user_id=self.request.user.id
+        ).order_by('-id')
+        fields = self.get_fieldset().get('fields')
+
+        if fields is not None:
+            queryset = queryset.only('id', *[
+                name for name in fields
+                if not Recipe._meta.get_field(name).many_to_many
+            ])
+
+        return self._prefetch_related(queryset, fields)
+
+    def _prefetch_related(self, queryset, fields=None):
+        """Prefetch the tags and ingredients the current action serializes"""
+
+        related_fields = self.related_fields.get(self.action)
+
+        if not related_fields:
+            return queryset
+
+        models = {'tags': Tag, 'ingredients': Ingredient}
+
+        return queryset.prefetch_related(*[
+            Prefetch(
+                name,
+                queryset=model.objects.only(*related_fields).order_by('id')
+            )
+            for name, model in models.items()
+            if fields is None or name in fields
+        ])
+
+    def get_fieldset(self):
+        """Return the fields and the relations to expand asked in the query"""
+
+        if self.action not in ('list', 'retrieve'):
+            return {}
+
+        if not hasattr(self, '_fieldset'):
+            self._fieldset = self._parse_fieldset()
+
+        return self._fieldset
+
+    def _parse_fieldset(self):
+        """Validate the fields and expand query parameters"""
+
+        serializer_class = self.get_serializer_class()
+        fieldset = {}
+
+        for param, choices in (
+            ('fields', serializer_class.Meta.fields),
+            ('expand', serializer_class.expandable_fields),
+        ):
+            value = self.request.query_params.get(param)
+
+            if not value:
+                continue
+
+            # Sorted and deduplicated, the same fieldset is one cache entry
+            names = tuple(sorted(set(value.split(','))))
+            unknown = set(names) - set(choices)
 
-        if tags:
-            tags_id = self._params_to_ints(tags)
-            queryset = queryset.filter(tags__id__in=tags_id)
+            if unknown:
+                raise ValidationError({
+                    param: _('Unknown fields: %(names)s.') % {
+                        'names': ', '.join(sorted(unknown))
+                    }
+                })
 
-        if ingredients:
-            ingredients_id = self._params_to_ints(ingredients)
-            queryset = queryset.filter(ingredients__id__in=ingredients_id)
+            fieldset[param] = names
 
-        return queryset.filter(user=self.request.user)
+        return fieldset
+
+    def get_serializer(self, *args, **kwargs):
+        """Return the serializer narrowed to the fields asked in the query"""
+
+        kwargs.update(self.get_fieldset())
+
+        return super().get_serializer(*args, **kwargs)
 
     def get_serializer_class(self):
         """retrieve a serilizer class for a spcific action like retrieve"""
@@ -93,30 +286,151 @@ class RecipeViewSet(viewsets.ModelViewSet):
 
             return serializers.RecipeImageSerializer
 
+        elif self.action == 'bulk':
+            return serializers.RecipeBulkSerializer
+
         return self.serializer_class
 
+    def retrieve(self, request, *args, **kwargs):
+        """Return the recipe detail, rendered from the cache when possible"""
+
+        # Filters apply to the detail too, so any query parameter but the
+        # format skips the cache rather than serve a filtered out recipe
+        if (not recipe_detail_cache.enabled or
+                not isinstance(request.accepted_renderer, JSONRenderer) or
+                request.accepted_media_type != JSONRenderer.media_type or
+                set(request.query_params) - {'format'}):
+            return super().retrieve(request, *args, **kwargs)
+
+        try:
+            recipe_id = int(kwargs['pk'])
+        except ValueError:
+            raise Http404
+
+        # Entries are keyed by owner, so a hit needs no ownership query
+        content, key = recipe_detail_cache.get(request.user.id, recipe_id)
+
+        if content is None:
+            response = super().retrieve(request, *args, **kwargs)
+            response.add_post_render_callback(
+                lambda rendered: recipe_detail_cache.set(
+                    key,
+                    rendered.content
+                )
+            )
+            return response
+
+        return HttpResponse(content, content_type=JSONRenderer.media_type)
+
     def perform_create(self, serializer):
         """Create a new recipe"""
-        serializer.save(user=self.request.user)
+        with saving_relations():
+            serializer.save(user_id=self.request.user.id)
+
+    def perform_update(self, serializer):
+        """Update a recipe with its tags and ingredients"""
+        with saving_relations():
+            serializer.save()
+
+    @action(methods=['post'], detail=False)
+    def bulk(self, request):
+        """Create, update and delete many recipies in one transaction"""
 
-    @action(methods=['post'], detail=True, url_path='upload-image')
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        batch = RecipeBatch(
+            request.user,
+            serializer.validated_data,
+            context=self.get_serializer_context()
+        )
+
+        if not batch.is_valid():
+            return Response(batch.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(batch.save(), status=status.HTTP_200_OK)
+
+    @action(methods=['get', 'post'], detail=True, url_path='upload-image')
     def upload_image(self, request, pk=None):
-        """Upload an image to recipe"""
+        """Upload an image to recipe or poll its processing status"""
 
         recipe = self.get_object()
-        serializer = self.get_serializer(
-            recipe,
-            data=request.data
-        )
+
+        if request.method == 'GET':
+            return Response(self.get_serializer(recipe).data)
+
+        try:
+            data = request.data
+        except Exception:
+            self.upload_handler.upload_interrupted()
+            raise
+
+        serializer = self.get_serializer(recipe, data=data)
+
+        if self.upload_handler.error:
+            raise self.upload_handler.error
 
         if serializer.is_valid():
-            serializer.save()
+            # Resizing happens in a background worker, the client polls
+            # image_status until the renditions are ready
+            serializer.save(image_status=Recipe.IMAGE_PENDING)
+            images.schedule_processing(recipe)
             return Response(
                 serializer.data,
                 status=status.HTTP_200_OK
             )
 
+        self.upload_handler.discard()
         return Response(
             serializer.errors,
             status=status.HTTP_400_BAD_REQUEST
         )
+
+
+class RecipeMediaView(APIView):
+    """Serve the images of the recipies of the authenticated user"""
+
+    authentication_classes = (
+        CachedTokenAuthentication,
+        SignedTokenAuthentication,
+    )
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request, path):
+        """Check the user owns the image and hand the transfer to the proxy"""
+
+        owned = Recipe.objects.filter(user_id=request.user.id).filter(
+            Q(image=path) | Q(renditions__image=path)
+        ).exists()
+
+        if not owned:
+            raise Http404
+
+        return media.send_media_file(request, path)
+
+
+class SyncView(APIView):
+    """Return the changes to the user's collections since a sync token"""
+
+    authentication_classes = (
+        CachedTokenAuthentication,
+        SignedTokenAuthentication,
+    )
+    permission_classes = (IsAuthenticated,)
+    # Rows returned per page, more are fetched with the returned token
+    page_size = 500
+
+    def get(self, request):
+        """Return the next page of changes, everything without since"""
+
+        since = request.query_params.get('since', '0')
+
+        try:
+            since = int(since)
+        except ValueError:
+            since = -1
+
+        if since < 0:
+            raise ValidationError({'since': _('Invalid sync token.')})
+
+        return Response(get_changes(request.user, since, self.page_size))
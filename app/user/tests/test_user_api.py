@@ -1,3 +1,6 @@
+from unittest.mock import patch
+
+from django.core.cache import cache
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 
@@ -5,6 +8,7 @@ from django.urls import reverse
 
 from rest_framework.test import APIClient
 from rest_framework import status
+from rest_framework.throttling import SimpleRateThrottle
 
 CREATE_USER_URL = reverse('user:create')
 TOKEN_URL = reverse('user:token')
@@ -22,6 +26,7 @@ class PublicUserApiTest(TestCase):
         """
         setUp
         """
+        cache.clear()
         self.client = APIClient()
 
     def test_create_valid_user_success(self):
@@ -172,3 +177,93 @@ class PublicUserApiTest(TestCase):
             self.assertEqual(self.user['name'], pyloda['name'])
             self.assertEqual(self.user.check_password(), pyloda['password'])
             self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+
+class LoginThrottleApiTest(TestCase):
+    """Test password checks are rate limited"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        create_user(email='1234@123.com', password='12345')
+
+    @patch.object(SimpleRateThrottle, 'THROTTLE_RATES', {
+        'login_ip': '100/min',
+        'login_email': '2/min',
+    })
+    def test_token_throttled_per_email(self):
+        """Test an account is locked after a few attempts from any address"""
+
+        for address in ('10.0.0.1', '10.0.0.2'):
+            res = self.client.post(
+                TOKEN_URL,
+                {'email': '1234@123.com', 'password': 'wrong'},
+                REMOTE_ADDR=address
+            )
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.post(
+            TOKEN_URL,
+            {'email': '1234@123.COM ', 'password': '12345'},
+            REMOTE_ADDR='10.0.0.3'
+        )
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        res = self.client.post(
+            TOKEN_URL,
+            {'email': 'other@123.com', 'password': '12345'}
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @patch.object(SimpleRateThrottle, 'THROTTLE_RATES', {
+        'login_ip': '100/min',
+        'login_email': '2/min',
+    })
+    def test_successful_logins_not_counted_per_email(self):
+        """Test only failed password checks count towards the email limit"""
+
+        for _ in range(3):
+            res = self.client.post(
+                TOKEN_URL,
+                {'email': '1234@123.com', 'password': '12345'}
+            )
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        res = self.client.post(
+            TOKEN_URL,
+            {'email': '1234@123.com', 'password': 'wrong'}
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.post(
+            TOKEN_URL,
+            {'email': '1234@123.com', 'password': '12345'}
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    @patch.object(SimpleRateThrottle, 'THROTTLE_RATES', {
+        'login_ip': '2/min',
+        'login_email': '100/min',
+    })
+    def test_token_and_create_throttled_per_ip(self):
+        """Test one address can only make a few password checks"""
+
+        for email in ('a@123.com', 'b@123.com'):
+            res = self.client.post(
+                TOKEN_URL,
+                {'email': email, 'password': '12345'}
+            )
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.post(
+            CREATE_USER_URL,
+            {'email': 'c@123.com', 'password': '12345', 'name': 'c'}
+        )
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        res = self.client.post(
+            TOKEN_URL,
+            {'email': '1234@123.com', 'password': '12345'},
+            REMOTE_ADDR='10.0.0.1'
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
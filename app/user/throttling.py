@@ -0,0 +1,58 @@
+import hashlib
+
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class LoginRateThrottle(SimpleRateThrottle):
+    """Limit the password checks and sign ups made from one IP address"""
+
+    scope = 'login_ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': self.get_ident(request)
+        }
+
+
+class LoginEmailRateThrottle(SimpleRateThrottle):
+    """
+    Limit the failed password checks of one account, whatever the address.
+
+    Only the attempts passed to ``record_failure`` are counted, so sending
+    the email of someone else cannot lock them out of their account.
+    """
+
+    scope = 'login_email'
+
+    def throttle_success(self):
+        return True
+
+    def record_failure(self, request, view):
+        """Count a failed password check of the request email"""
+
+        if self.rate is None:
+            return
+
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return
+
+        now = self.timer()
+        history = [
+            moment for moment in self.cache.get(key, [])
+            if moment > now - self.duration
+        ]
+        history.insert(0, now)
+        self.cache.set(key, history, self.duration)
+
+    def get_cache_key(self, request, view):
+        email = getattr(request.data, 'get', lambda key: None)('email')
+
+        if not isinstance(email, str) or not email:
+            return None
+
+        # Cache keys must not contain the raw address
+        ident = hashlib.sha256(email.strip().lower().encode()).hexdigest()
+
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
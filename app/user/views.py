@@ -1,27 +1,84 @@
 
-from rest_framework import generics, authentication, permissions
+from django.db import transaction
+
+from rest_framework import generics, permissions
 from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
 from rest_framework.settings import api_settings
+from rest_framework.views import APIView
 
+from core.authentication import (
+    CachedTokenAuthentication,
+    SignedTokenAuthentication,
+)
+from core.models import AuthToken
+from core.tokens import access_token_ttl, issue_access_token
 from user.serializers import UserSerializer, AuthTokenSerializer
+from user.throttling import LoginEmailRateThrottle, LoginRateThrottle
+
+
+def token_data(token):
+    """Return the response body of a newly issued token"""
+
+    data = {'token': token.key, 'expires': token.expires}
+
+    if access_token_ttl():
+        data['access_token'], data['access_expires'] = issue_access_token(
+            token.user_id
+        )
+
+    return data
 
 
 class CreateUserView(generics.CreateAPIView):
     """Create a new user in the system"""
     serializer_class = UserSerializer
+    throttle_classes = (LoginRateThrottle,)
 
 
 class CreateTokenView(ObtainAuthToken):
     """Create a new auth token for the user"""
     serializer_class = AuthTokenSerializer
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
+    throttle_classes = (LoginRateThrottle, LoginEmailRateThrottle)
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.serializer_class(
+            data=request.data,
+            context={'request': request}
+        )
+        if not serializer.is_valid():
+            LoginEmailRateThrottle().record_failure(request, self)
+            raise ValidationError(serializer.errors)
+
+        token = AuthToken.objects.issue(serializer.validated_data['user'])
+
+        return Response(token_data(token))
+
+
+class RefreshTokenView(APIView):
+    """Replace the token of the request with a new one"""
+
+    authentication_classes = (CachedTokenAuthentication,)
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def post(self, request):
+        with transaction.atomic():
+            token = AuthToken.objects.issue(request.user)
+            request.auth.delete()
+
+        return Response(token_data(token))
 
 
 class ManageUserView(generics.RetrieveUpdateAPIView):
     """manage the authenticated user """
 
     serializer_class = UserSerializer
-    authentication_classes = (authentication.TokenAuthentication,)
+    authentication_classes = (
+        CachedTokenAuthentication,
+        SignedTokenAuthentication,
+    )
     permission_classes = (permissions.IsAuthenticated,)
 
     def get_object(self):